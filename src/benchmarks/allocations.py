@@ -0,0 +1,150 @@
+import argparse
+import gc
+import json
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from common.file_manger import SystemsXmlFileManager
+from common.forecast_store import ForecastStore
+from common.forecasts_managers import ForecastManager, MultiSequenceManagerCreator
+from common.location_resolver import LocationResolver
+from converters.output_data_formatter import FinalOutputDataFormatter
+from loadtest.stub_server import AccuWeatherStubServer
+from loadtest.systems_generator import SyntheticSystemsGenerator
+
+
+class AllocationBenchmark:
+
+    """
+    Measures memory allocated by forecast cycles of all systems, without any network calls:
+    localization keys and forecasts are served from seeded location resolver and forecast store.
+
+    Peak of traced memory during single cycle shows how much is allocated by the cycle,
+    retained memory after all cycles shows leaks. Allocations are counted as memory blocks: blocks per cycle
+    are blocks allocated by the cycle and alive at its end (objects it built and its output), taken
+    from difference of tracemalloc snapshots, retained blocks are blocks left after all cycles. Two paths are compared:
+    rebuild - forecast manager, converters, formatters and component list are created in each cycle,
+    reuse - forecast managers are built once for each system and reused with precomputed component lists.
+    """
+
+    def __init__(self, systems: list, sequence_types: list = None):
+        self.systems = systems
+        self.location_resolver = self._get_seeded_location_resolver(systems)
+        self.forecast_store = self._get_seeded_forecast_store(self.location_resolver)
+        self.creator = MultiSequenceManagerCreator('benchmark-key', self.forecast_store,
+                                                   self.location_resolver, sequence_types)
+        self.output_formatter = FinalOutputDataFormatter()
+
+    def run(self, cycles: int) -> dict:
+        return dict(rebuild=self._measure(self._rebuild_cycle, cycles),
+                    reuse=self._measure(self._reuse_cycle, cycles))
+
+    def _rebuild_cycle(self) -> list:
+        built = []
+
+        for system in self.systems:
+            forecast_manager = self.creator._get_configured_forecast_manager()
+            data = forecast_manager.get_data(system)
+            output_formatter = FinalOutputDataFormatter()
+            built.append((forecast_manager, output_formatter, output_formatter.get_formatted_data(system, [data])))
+
+        return built
+
+    def _reuse_cycle(self) -> list:
+        built = []
+
+        for system in self.systems:
+            data = self.creator.get_data_for_system(system)
+            built.append(self.output_formatter.get_formatted_data(system, [data]))
+
+        return built
+
+    def _measure(self, cycle, cycles: int) -> dict:
+        cycle()
+        gc.collect()
+
+        start = time.perf_counter()
+        for _ in range(cycles):
+            cycle()
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        peaks = []
+        blocks = []
+        baseline = tracemalloc.get_traced_memory()[0]
+        baseline_snapshot = tracemalloc.take_snapshot()
+        for _ in range(cycles):
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            built = cycle()
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+            blocks.append(self._get_blocks_diff(tracemalloc.take_snapshot(), before))
+            del built
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+        retained_blocks = self._get_blocks_diff(tracemalloc.take_snapshot(), baseline_snapshot)
+        tracemalloc.stop()
+
+        return dict(ms_per_cycle=round(elapsed / cycles * 1000, 3),
+                    blocks_per_cycle=round(sum(blocks) / len(blocks)),
+                    peak_kib_per_cycle=round(sum(peaks) / len(peaks) / 1024, 1),
+                    retained_blocks=retained_blocks,
+                    retained_kib=round(retained / 1024, 1))
+
+    @staticmethod
+    def _get_blocks_diff(snapshot: tracemalloc.Snapshot, previous: tracemalloc.Snapshot) -> int:
+        """Count of memory blocks allocated between snapshots and still alive, allocations of tracemalloc
+        itself are not counted."""
+
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        stats = snapshot.filter_traces(filters).compare_to(previous.filter_traces(filters), 'filename')
+
+        return sum(stat.count_diff for stat in stats)
+
+    @staticmethod
+    def _get_seeded_location_resolver(systems: list) -> LocationResolver:
+        locations = {}
+
+        for system in systems:
+            manager = ForecastManager()
+            manager.prepare(system)
+            for component in manager.component_list:
+                geo_position = ForecastManager._get_converted_geoposition(component)
+                locations.setdefault(geo_position, str(len(locations)))
+
+        return LocationResolver(locations)
+
+    @staticmethod
+    def _get_seeded_forecast_store(location_resolver: LocationResolver) -> ForecastStore:
+        forecast_store = ForecastStore(max_age=10 ** 9, min_remaining_hours=0)
+        now = datetime.now(timezone.utc)
+
+        for loc_key in set(location_resolver.get_locations().values()):
+            forecast_store.add_entry(loc_key, now, AccuWeatherStubServer.get_hourly_forecasts(loc_key, 120))
+
+        return forecast_store
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description='Allocations per cycle of rebuilt and reused forecast managers.')
+    parser.add_argument('--systems', type=int, default=200, help='count of generated system files')
+    parser.add_argument('--components', type=int, default=10, help='count of components in each system')
+    parser.add_argument('--cycles', type=int, default=20, help='count of measured cycles')
+
+    return parser.parse_args()
+
+
+def main():
+    arguments = get_arguments()
+
+    with tempfile.TemporaryDirectory() as directory:
+        SyntheticSystemsGenerator(seed=1).generate(directory, arguments.systems, arguments.components)
+        systems = SystemsXmlFileManager().get_data(directory)
+
+    report = AllocationBenchmark(systems).run(arguments.cycles)
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.allocations import AllocationBenchmark
+from common.file_manger import SystemsXmlFileManager
+from converters.output_template import OutputTemplates
+from converters.xml_formatter import DictToXmlConverter
+from loadtest.systems_generator import SyntheticSystemsGenerator
+
+
+class OutputTemplatesBenchmark:
+
+    """
+    Compares serialization of output of all systems by xmltodict and by precompiled output templates,
+    without any network calls. Writing the same bytes to files is measured as the lower bound of saving output.
+    """
+
+    def __init__(self, systems: list, output_path: str):
+        self.systems = systems
+        self.output_path = output_path
+        seeded = AllocationBenchmark(systems)
+        self.outputs = [seeded.output_formatter.get_formatted_data(system, [seeded.creator.get_data_for_system(system)])
+                        for system in systems]
+        self.converter = DictToXmlConverter()
+        self.templates = OutputTemplates()
+
+    def run(self, cycles: int) -> dict:
+        xml_data = [self.converter.get_xml_string_from_dictionary(data) for data in self.outputs]
+        rendered = [self.templates.get_xml_string(system, data) for system, data in zip(self.systems, self.outputs)]
+
+        return dict(identical=rendered == xml_data,
+                    kib_per_cycle=round(sum(len(data) for data in xml_data) / 1024, 1),
+                    xmltodict=self._measure(self._xmltodict_cycle, cycles),
+                    templates=self._measure(self._templates_cycle, cycles),
+                    write=self._measure(lambda: self._write_cycle(xml_data), cycles))
+
+    def _xmltodict_cycle(self):
+        for data in self.outputs:
+            self.converter.get_xml_string_from_dictionary(data)
+
+    def _templates_cycle(self):
+        for system, data in zip(self.systems, self.outputs):
+            self.templates.get_xml_string(system, data)
+
+    def _write_cycle(self, xml_data: list):
+        for system, data in zip(self.systems, xml_data):
+            with open(os.path.join(self.output_path, system.filename), 'w') as file:
+                file.write(data)
+
+    @staticmethod
+    def _measure(cycle, cycles: int) -> dict:
+        cycle()
+
+        start = time.perf_counter()
+        for _ in range(cycles):
+            cycle()
+        elapsed = time.perf_counter() - start
+
+        return dict(ms_per_cycle=round(elapsed / cycles * 1000, 3))
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description='Serialization of output by xmltodict and by output templates.')
+    parser.add_argument('--systems', type=int, default=200, help='count of generated system files')
+    parser.add_argument('--components', type=int, default=10, help='count of components in each system')
+    parser.add_argument('--cycles', type=int, default=20, help='count of measured cycles')
+
+    return parser.parse_args()
+
+
+def main():
+    arguments = get_arguments()
+
+    with tempfile.TemporaryDirectory() as directory:
+        SyntheticSystemsGenerator(seed=1).generate(directory, arguments.systems, arguments.components)
+        systems = SystemsXmlFileManager().get_data(directory)
+
+    with tempfile.TemporaryDirectory() as directory:
+        report = OutputTemplatesBenchmark(systems, directory).run(arguments.cycles)
+
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == '__main__':
+    main()
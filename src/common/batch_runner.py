@@ -0,0 +1,124 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from common.forecast_store import ForecastStore
+from common.location_resolver import LocationResolver
+
+
+@dataclass
+class BatchSummary:
+    """Summary of single time batch run.
+
+    written, failed_systems - count of systems saved and without any forecast,
+    geopositions, locations - count of unique geo positions resolved and localizations fetched in the run,
+    geoposition_calls, forecast_calls - count of API requests made in the run,
+    resolve_time, fetch_time, write_time, wall_time - seconds of each phase and of the whole run.
+    """
+
+    systems: int = 0
+    written: int = 0
+    failed_systems: int = 0
+    geopositions: int = 0
+    geoposition_failures: int = 0
+    locations: int = 0
+    fetch_failures: int = 0
+    geoposition_calls: int = 0
+    forecast_calls: int = 0
+    resolve_time: float = 0
+    fetch_time: float = 0
+    write_time: float = 0
+    wall_time: float = 0
+
+
+class BatchRunner:
+
+    """
+    Single time run of all systems in three phases. Geo positions of components of all systems are resolved,
+    and then forecasts of all localizations are fetched, each unique one once, as separate tasks on one pool
+    of workers, so count of requests in flight is bounded for the whole run, not for each system.
+    Systems are then formatted and saved one by one in given order, so output is written in the same order
+    in each run.
+
+    workers - count of requests in flight.
+    """
+
+    def __init__(self, location_resolver: LocationResolver, forecast_store: ForecastStore, api_key: str,
+                 workers: int = 16, clock=time.monotonic):
+        self.location_resolver = location_resolver
+        self.forecast_store = forecast_store
+        self.api_key = api_key
+        self.workers = workers
+        self.clock = clock
+
+    def run(self, systems: list, get_managers, save) -> BatchSummary:
+        """get_managers - called with system, returns its forecast managers,
+        save - called with system and windows of all localizations, returns True if the system was saved."""
+
+        summary = BatchSummary(systems=len(systems))
+        start = self.clock()
+        geoposition_calls = self.location_resolver.request_count
+        forecast_calls = self.forecast_store.get_call_count()
+        managers = [get_managers(system) for system in systems]
+
+        with ThreadPoolExecutor(self.workers) as executor:
+            geo_positions = list(dict.fromkeys(geo_position for system_managers in managers
+                                               for manager in system_managers
+                                               for geo_position in manager.get_geo_positions()))
+            loc_keys = list(executor.map(self._resolve, geo_positions))
+            component_sets = list(executor.map(self._get_component_sets, managers))
+            summary.geopositions = len(geo_positions)
+            summary.geoposition_failures = loc_keys.count(None)
+            resolved_at = self.clock()
+
+            loc_keys = list(dict.fromkeys(comp_set['loc_key'] for system_sets in component_sets
+                                          for component_set in system_sets for comp_set in component_set))
+            now = datetime.now(timezone.utc)
+            windows = dict(zip(loc_keys, executor.map(lambda loc_key: self._fetch(loc_key, now), loc_keys)))
+            summary.locations = len(loc_keys)
+            summary.fetch_failures = list(windows.values()).count(None)
+            fetched_at = self.clock()
+
+        for system in systems:
+            if save(system, windows):
+                summary.written += 1
+            else:
+                summary.failed_systems += 1
+
+        end = self.clock()
+        summary.resolve_time = round(resolved_at - start, 3)
+        summary.fetch_time = round(fetched_at - resolved_at, 3)
+        summary.write_time = round(end - fetched_at, 3)
+        summary.wall_time = round(end - start, 3)
+        summary.geoposition_calls = self.location_resolver.request_count - geoposition_calls
+        summary.forecast_calls = self.forecast_store.get_call_count() - forecast_calls
+
+        return summary
+
+    def _resolve(self, geo_position: str) -> str:
+        try:
+            return self.location_resolver.get_localization_key(self.api_key, geo_position)
+        except Exception:
+            logging.exception(f"Resolving geo position failed: {geo_position}")
+
+    @staticmethod
+    def _get_component_sets(managers: list) -> list:
+        """Localization keys are already cached, only failed geo positions are requested again."""
+
+        component_sets = []
+
+        for manager in managers:
+            try:
+                component_sets.append(manager.resolve())
+            except Exception:
+                logging.exception(f"Resolving localizations failed for file: {manager.system.filename}")
+
+        return component_sets
+
+    def _fetch(self, loc_key: str, now: datetime) -> list:
+        try:
+            return self.forecast_store.get_data(self.api_key, loc_key, now)
+        except Exception:
+            logging.exception(f"Fetching forecast failed for localization: {loc_key}")
@@ -0,0 +1,185 @@
+import math
+
+from converters.dataclasses_converters import ForecastSequences, System
+from converters.output_data_formatter import FinalOutputDataFormatter, MultiSequenceOutputDataFormatter
+from converters.xml_formatter import DictToXmlConverter
+
+from weather_requests.api_key_pool import ApiKeyPool
+
+from common.forecast_store import ForecastStore
+from common.forecasts_managers import ForecastManager
+from common.location_resolver import LocationResolver
+
+
+class CapacityPlanner:
+
+    """
+    Projects API and resource cost of systems, without fetching any forecast. Components are deduplicated to unique
+    coordinates, and coordinates to localizations with cached localization keys (from system manifest). Coordinates
+    without cached key will need single geoposition call and are counted as separate localizations (upper bound).
+
+    Each localization is fetched again, when the first system using it runs after stored forecast got stale,
+    so its fetch interval is the forecast store refresh interval rounded up to the shortest update period of its systems.
+    Memory of forecast store is estimated with average size of single hourly forecast.
+
+    api_keys - list of dictionaries with 'key' and optional 'quota', calls are spread evenly across keys,
+    request_latency - expected latency of single API call in seconds,
+    fetches_forecasts - False if no sequence needs forecast requests, like local daylight only.
+    """
+
+    default_update_period = 60
+    hourly_forecast_bytes = 1500
+    hourly_forecast_details_bytes = 4000
+    sample_values = {'temperature': -10, 'day_light': False, 'humidity': 100, 'wind': 10.5,
+                     'precipitation_probability': 100}
+
+    def __init__(self, systems: list, location_resolver: LocationResolver, forecast_store: ForecastStore,
+                 api_keys: list, sequence_types: list, request_latency: float = 0.5, fetches_forecasts: bool = True):
+        self.systems = systems
+        self.location_resolver = location_resolver
+        self.forecast_store = forecast_store
+        self.api_keys = api_keys
+        self.sequence_types = sequence_types
+        self.request_latency = request_latency
+        self.fetches_forecasts = fetches_forecasts
+
+    def get_report(self) -> dict:
+        system_locations = {system.filename: self._get_system_locations(system) for system in self.systems}
+        components = sum(len(locations) for locations in system_locations.values())
+        coordinates = {geo_position for locations in system_locations.values() for geo_position, _ in locations}
+        locations = {loc_key for locations in system_locations.values() for _, loc_key in locations}
+        unresolved = {geo_position for locations in system_locations.values()
+                      for geo_position, loc_key in locations if loc_key.startswith('unresolved:')}
+
+        location_intervals = self._get_location_intervals(system_locations)
+        forecasts_per_hour = sum(3600 / interval for interval in location_intervals.values())
+        forecasts_per_day = forecasts_per_hour * 24
+        cycle_times = self._get_cycle_times(system_locations, location_intervals)
+        output_bytes = {system.filename: self._get_output_bytes(system) for system in self.systems}
+        output_bytes_per_hour = sum(output_bytes[system.filename] * 3600 / self._get_update_period(system)
+                                    for system in self.systems)
+
+        return dict(
+            systems=len(self.systems),
+            components=components,
+            unique_coordinates=len(coordinates),
+            cached_locations=len(locations) - len(unresolved),
+            unresolved_coordinates=len(unresolved),
+            unique_locations=len(locations),
+            dedup_ratio=round(components / len(locations), 2) if locations else None,
+            forecast_refresh_interval=self._get_refresh_interval(),
+            calls=dict(geoposition_once=len(unresolved),
+                       forecasts_per_hour=round(forecasts_per_hour, 1),
+                       forecasts_per_day=round(forecasts_per_day),
+                       first_day=round(forecasts_per_day) + len(unresolved)),
+            api_keys=self._get_api_keys_report(forecasts_per_day + len(unresolved)),
+            cycles_per_hour=round(sum(3600 / self._get_update_period(system) for system in self.systems), 1),
+            expected_cycle_concurrency=round(sum(cycle_times[system.filename] / self._get_update_period(system)
+                                                 for system in self.systems), 3),
+            max_cycle_time=round(max(cycle_times.values(), default=0), 2),
+            output=dict(mean_file_bytes=round(sum(output_bytes.values()) / len(output_bytes)) if output_bytes else 0,
+                        bytes_per_hour=round(output_bytes_per_hour),
+                        bytes_per_day=round(output_bytes_per_hour * 24)),
+            forecast_store_bytes=self._get_forecast_store_bytes(len(locations)))
+
+    def _get_system_locations(self, system: System) -> list:
+        """Returns list of (geo position, localization key) tuples for all components of the system."""
+
+        manager = ForecastManager()
+        manager.prepare(system)
+        locations = []
+
+        for component in manager.component_list:
+            geo_position = ForecastManager._get_converted_geoposition(component)
+            loc_key = self.location_resolver.get_cached_localization_key(geo_position)
+            locations.append((geo_position, loc_key if loc_key is not None else f"unresolved:{geo_position}"))
+
+        return locations
+
+    def _get_location_intervals(self, system_locations: dict) -> dict:
+        if not self.fetches_forecasts:
+            return {}
+
+        shortest_periods = {}
+
+        for system in self.systems:
+            for _, loc_key in system_locations[system.filename]:
+                shortest_periods[loc_key] = min(shortest_periods.get(loc_key, math.inf), self._get_update_period(system))
+
+        refresh_interval = self._get_refresh_interval()
+
+        return {loc_key: math.ceil(refresh_interval / period) * period for loc_key, period in shortest_periods.items()}
+
+    def _get_refresh_interval(self) -> int:
+        """Stored forecast gets stale after max_age (or expected publish period of refresh planner),
+        or when less than min_remaining_hours of future hours are left."""
+
+        store = self.forecast_store
+
+        if store.refresh_planner is not None:
+            age_interval = store.refresh_planner.default_publish_period
+        else:
+            age_interval = store.max_age
+
+        horizon_interval = (store.forecast_req_class.hours - store.min_remaining_hours + 1) * 3600
+
+        return max(1, min(age_interval, horizon_interval))
+
+    def _get_cycle_times(self, system_locations: dict, location_intervals: dict) -> dict:
+        cycle_times = {}
+
+        for system in self.systems:
+            update_period = self._get_update_period(system)
+            loc_keys = {loc_key for _, loc_key in system_locations[system.filename]}
+            calls = sum(min(1, update_period / location_intervals[loc_key])
+                        for loc_key in loc_keys if loc_key in location_intervals)
+            cycle_times[system.filename] = calls * self.request_latency
+
+        return cycle_times
+
+    def _get_api_keys_report(self, calls_per_day: float) -> list:
+        if self.api_keys == []:
+            return []
+
+        calls_per_key = calls_per_day / len(self.api_keys)
+        report = []
+
+        for api_key in self.api_keys:
+            quota = int(api_key['quota']) if api_key.get('quota') is not None else None
+            report.append(dict(key=ApiKeyPool.mask_key(api_key['key']),
+                               quota=quota,
+                               calls_per_day=round(calls_per_key),
+                               quota_utilization=round(calls_per_key / quota, 2) if quota else None))
+
+        return report
+
+    def _get_output_bytes(self, system: System) -> int:
+        """Size of the output file, serialized from sample values of all sequence types."""
+
+        manager = ForecastManager()
+        manager.prepare(system)
+        hours = self.forecast_store.window_hours
+        sequences = ForecastSequences(['00:00:00'] * hours,
+                                      {sequence_type: [self.sample_values.get(sequence_type, 0)] * hours
+                                       for sequence_type in self.sequence_types})
+        component_data = [dict(base_time='2022-09-05T22:37:08', component=component, forecast_data=sequences)
+                          for component in manager.component_list]
+
+        if component_data == []:
+            return 0
+
+        data = FinalOutputDataFormatter().get_formatted_data(
+            system, [MultiSequenceOutputDataFormatter().get_formatted_data(component_data)])
+
+        return len(DictToXmlConverter().get_xml_string_from_dictionary(data).encode())
+
+    def _get_forecast_store_bytes(self, locations: int) -> int:
+        if not self.fetches_forecasts:
+            return 0
+
+        hourly_bytes = self.hourly_forecast_details_bytes if self.forecast_store.details else self.hourly_forecast_bytes
+
+        return locations * self.forecast_store.forecast_req_class.hours * hourly_bytes
+
+    def _get_update_period(self, system: System) -> int:
+        return system.update_period or self.default_update_period
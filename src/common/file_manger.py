@@ -1,16 +1,40 @@
 import glob
+import hashlib
 import logging
 import os
 from dataclasses import dataclass
+from functools import partial
 
 from converters.dataclasses_converters import System, SystemDataclassConverter
+from converters.output_template import OutputTemplates
 from converters.xml_formatter import (DictToXmlConverter,
                                       SystemXmlToDictConverter)
 
+from common.forecast_notifier import ForecastNotifier
+from common.fragment_output import FragmentOutputWriter
+from common.system_manifest import SystemManifest
+from common.tracing import tracer
+from common.write_behind import WriteBehindQueue
+
 
 class SystemsXmlFileManager:
 
-    """File manager, which provides getting XML data from single folder or file, and saving to the single XML file."""
+    """File manager, which provides getting XML data from single folder or file, and saving to the single XML file.
+    If system manifest is provided, unchanged system files are loaded from it, without parsing XML.
+    If forecast notifier is provided, "forecast ready" event is published after each saved file.
+    If write queue is provided, output files are written in background by its writer threads.
+    If fragment writer is provided, time sequences are written as shared fragments, and system output file
+    is only index of them (<system>_forecast.index.xml).
+    If output templates are provided, output is rendered from precompiled template of the system."""
+
+    def __init__(self, manifest: SystemManifest = None, notifier: ForecastNotifier = None,
+                 write_queue: WriteBehindQueue = None, fragment_writer: FragmentOutputWriter = None,
+                 output_templates: OutputTemplates = None):
+        self.manifest = manifest
+        self.notifier = notifier
+        self.write_queue = write_queue
+        self.fragment_writer = fragment_writer
+        self.output_templates = output_templates
 
     def get_data(self, systems_path: str) -> list:
         """Main method, which provied getting system data from single folder or file.
@@ -21,18 +45,99 @@ class SystemsXmlFileManager:
         elif os.path.isfile(systems_path):
             return self._get_single_file_data(systems_path)
 
-    def save_data(self, system: System, data: dict, output_base_path: str):
+    def save_data(self, system: System, data: dict, output_base_path: str, xml_data: str = None):
         """Saving system data to the single file, which name is provided by system dataclass.
-        Another input is data itself and base outputh path."""
+        Another input is data itself and base outputh path, and optionally data already serialized to XML.
+        Returns saved XML string, or None in fragment layout, where saved index is not the whole forecast."""
 
         if data is not None:
-            xml_data = self._get_xml_data_from_dictionary(data)
-            filename = self._get_filename(system)
+            if self.fragment_writer is not None:
+                self._save_index(system, data, output_base_path)
+                return None
+
+            if xml_data is None:
+                with tracer.span('serialize'):
+                    xml_data = self.get_output_xml_data(system, data)
+            self._write_file(system, data, xml_data, self._get_output_path(system, output_base_path))
+
+            return xml_data
+
+    def _save_index(self, system: System, data: dict, output_base_path: str):
+        with tracer.span('write_fragments'):
+            index = self.fragment_writer.get_index(system.filename, data)
+
+        with tracer.span('serialize'):
+            xml_data = self._get_xml_data_from_dictionary(index)
+
+        self._write_file(system, data, xml_data, self._get_output_path(system, output_base_path))
+
+    def _get_output_path(self, system: System, output_base_path: str) -> str:
+        if self.fragment_writer is not None:
+            return f"{output_base_path}/{self._get_index_filename(system)}"
+
+        return f"{output_base_path}/{self._get_filename(system)}"
 
-            with open(f"{output_base_path}/{filename}", 'w') as file:
+    def _write_file(self, system: System, data: dict, xml_data: str, path: str):
+        if self.write_queue is not None:
+            with tracer.span('enqueue_write', path=path, bytes=len(xml_data)):
+                self.write_queue.submit(path, xml_data, partial(self._on_file_saved, system, data, xml_data, path))
+            return
+
+        with tracer.span('write', path=path, bytes=len(xml_data)):
+            with open(path, 'w') as file:
                 file.write(xml_data)
 
-            logging.info(f"Saved file {output_base_path}/{filename}")
+        self._on_file_saved(system, data, xml_data, path)
+
+    def _on_file_saved(self, system: System, data: dict, xml_data: str, path: str):
+        logging.info(f"Saved file {path}")
+
+        if self.notifier is not None:
+            self._publish_forecast_ready(system, data, xml_data, path)
+
+    def _publish_forecast_ready(self, system: System, data: dict, xml_data: str, path: str):
+        self.notifier.publish(dict(uuid=system.uuid,
+                                   path=os.path.abspath(path),
+                                   base_time=self._get_base_time(data),
+                                   hash=hashlib.sha1(xml_data.encode()).hexdigest()))
+
+    @staticmethod
+    def _get_base_time(data: dict) -> str:
+        components = data['system']['component']
+        component = components[0] if isinstance(components, list) else components
+        sequences = component['model_parameters']['dynamic']['time_sequence']
+        sequence = sequences[0] if isinstance(sequences, list) else sequences
+
+        return sequence.get('@base_time')
+
+    def save_delta(self, system: System, delta: dict, output_base_path: str):
+        """Appends delta record as single line to the system delta file. Delta file contains
+        all delta records since the last full snapshot. Delta is appended only after the snapshot is written
+        (clear_delta waits for it), so delta file never refers to newer snapshot than the one on disk."""
+
+        if delta is not None:
+            line = DictToXmlConverter().get_xml_line_from_dictionary(delta)
+            filename = self._get_delta_filename(system)
+
+            with open(f"{output_base_path}/{filename}", 'a') as file:
+                file.write(f"{line}\n")
+
+            logging.info(f"Saved delta to file {output_base_path}/{filename}")
+
+    def clear_delta(self, system: System, output_base_path: str):
+        """Removes all delta records, should be called after full snapshot is saved. With write queue
+        it waits until the snapshot is written, so old snapshot is never left without its delta records."""
+
+        if self.write_queue is not None:
+            with tracer.span('wait_snapshot_write'):
+                self.write_queue.flush(path=self._get_output_path(system, output_base_path))
+
+        filename = self._get_delta_filename(system)
+        open(f"{output_base_path}/{filename}", 'w').close()
+
+    @staticmethod
+    def _get_delta_filename(system: System) -> str:
+        return system.filename.replace('.xml', '') + '_forecast.delta'
 
     @staticmethod
     def _get_filename(system: System) -> str:
@@ -40,14 +145,33 @@ class SystemsXmlFileManager:
         output_filename = input_filename.replace('.xml', '') + '_forecast.xml'
         return output_filename
 
+    @staticmethod
+    def _get_index_filename(system: System) -> str:
+        return system.filename.replace('.xml', '') + '_forecast.index.xml'
+
+    def get_output_xml_data(self, system: System, data: dict) -> str:
+        if self.output_templates is not None:
+            return self.output_templates.get_xml_string(system, data)
+
+        return self._get_xml_data_from_dictionary(data)
+
     @staticmethod
     def _get_xml_data_from_dictionary(data: dict) -> str:
         return DictToXmlConverter().get_xml_string_from_dictionary(data)
 
     def _get_single_file_data(self, file_path: str):
-        system = SystemXmlToDictConverter().get_dict_from_file(file_path)
+        if self.manifest is not None:
+            system = self.manifest.get_system(file_path)
+            if system is not None:
+                return system
+
+        system = self._get_system_as_dataclass(
+            SystemXmlToDictConverter().get_dict_from_file(file_path))
+
+        if self.manifest is not None:
+            self.manifest.add_system(file_path, system)
 
-        return self._get_system_as_dataclass(system)
+        return system
 
     def _get_multiple_file_data(self, directory: str):
         files = self._get_list_of_file_paths(directory)
@@ -0,0 +1,230 @@
+import glob
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from threading import Lock
+
+import xmltodict
+
+from converters.dataclasses_converters import System
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class ForecastArchive:
+
+    """
+    Append-only archive of every saved forecast. Forecasts are appended to rolling segment files,
+    partitioned by archive time (hour or day). Forecasts are buffered and compressed in batches (gzip member
+    or zstd frame of batch_size forecasts), and small index file of each segment keeps codec, offset and length
+    of the batch and position of the forecast in it, so querying single system in a time range decompresses
+    only batches with matching forecasts. Codec is recorded for each forecast, so segment stays readable
+    after compression setting changes. Buffered batch is written when it is full, when it is older than
+    flush_interval seconds, before query, and on flush. Batch is compressed by the thread, which filled it,
+    outside the buffer lock.
+    Segments older than retention_days are removed.
+
+    archive_path - folder of segment files,
+    partition - 'hour' or 'day',
+    compression - 'gzip' or 'zstd', zstd needs optional zstandard package,
+    retention_days - count of days, after which segments are removed,
+    batch_size - count of forecasts compressed together,
+    flush_interval - seconds, after which not full batch is written.
+    """
+
+    partition_formats = {'hour': '%Y%m%d%H', 'day': '%Y%m%d'}
+    extensions = {'gzip': 'gz', 'zstd': 'zst'}
+
+    def __init__(self, archive_path: str, partition: str = 'day', compression: str = 'gzip',
+                 retention_days: int = 30, batch_size: int = 32, flush_interval: float = 60, clock=time.time):
+        self.archive_path = archive_path
+        self.partition = partition if partition in self.partition_formats else 'day'
+        self.compression = self._get_compression(compression)
+        self.retention_days = retention_days
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self._current_segment = None
+        self._batch = []
+        self._lock = Lock()
+        self._write_lock = Lock()
+
+        os.makedirs(archive_path, exist_ok=True)
+
+    def append(self, system: System, xml_data: str):
+        """Appends forecast XML of the system to the batch of the current segment. Full batch is taken
+        from the buffer under the lock, and compressed and written outside it, so other systems are not blocked."""
+
+        if xml_data is None:
+            return
+
+        archived_at = self.clock()
+        segment = self._get_segment_name(archived_at)
+        batches = []
+
+        with self._lock:
+            if segment != self._current_segment:
+                batches.append(self._take_batch())
+                self._current_segment = segment
+                self._remove_expired_segments(archived_at)
+
+            self._batch.append((system, archived_at, xml_data.encode()))
+
+            if len(self._batch) >= self.batch_size or archived_at - self._batch[0][1] >= self.flush_interval:
+                batches.append(self._take_batch())
+
+        for batch in batches:
+            self._write_batch(*batch)
+
+    def flush(self):
+        """Writes buffered batch to the current segment."""
+
+        with self._lock:
+            batch = self._take_batch()
+
+        self._write_batch(*batch)
+
+    def query(self, system_uuid: str, start: float, end: float, component_uid: str = None) -> list:
+        """Returns list of (archived_at, forecast) tuples for the system archived in [start, end) time range,
+        ordered by archived_at (batches of different threads can be written in other order than they were filled).
+        Forecast is XML string of the whole system, or dictionary of single component if component_uid is given."""
+
+        self.flush()
+        results = []
+
+        for segment in self._get_segments_in_range(start, end):
+            records = [record for record in self._read_index(segment)
+                       if record['uuid'] == system_uuid and start <= record['archived_at'] < end]
+            batches = {}
+
+            for record in records:
+                codec = record.get('codec', self.compression)
+                batch_key = (codec, record['offset'])
+
+                if batch_key not in batches:
+                    with open(self._get_data_path(segment, codec), 'rb') as file:
+                        file.seek(record['offset'])
+                        batches[batch_key] = self._decompress(file.read(record['length']), codec)
+
+                content = self._get_batch_item(batches[batch_key], record)
+                results.append((record['archived_at'], self._get_forecast(content.decode(), component_uid)))
+
+        return sorted(results, key=lambda result: result[0])
+
+    def _take_batch(self) -> tuple:
+        """Returns segment and forecasts of buffered batch, and starts new batch. Must be called under the lock."""
+
+        batch = self._batch
+        self._batch = []
+
+        return self._current_segment, batch
+
+    def _write_batch(self, segment: str, batch: list):
+        """Batch is compressed without any lock, offset in data file is taken and batch with its index records
+        is written under write lock, so batches of different threads are not interleaved."""
+
+        if batch == []:
+            return
+
+        content = self._compress(b''.join(xml_data for _, _, xml_data in batch), self.compression)
+        data_path = self._get_data_path(segment, self.compression)
+
+        with self._write_lock:
+            offset = os.path.getsize(data_path) if os.path.exists(data_path) else 0
+            index_records = []
+            position = 0
+
+            for system, archived_at, xml_data in batch:
+                index_records.append(json.dumps(dict(uuid=system.uuid, filename=system.filename,
+                                                     archived_at=archived_at, codec=self.compression, offset=offset,
+                                                     length=len(content), position=position,
+                                                     size=len(xml_data))) + '\n')
+                position += len(xml_data)
+
+            with open(data_path, 'ab') as file:
+                file.write(content)
+
+            with open(self._get_index_path(segment), 'a') as file:
+                file.write(''.join(index_records))
+
+    @staticmethod
+    def _get_batch_item(batch: bytes, record: dict) -> bytes:
+        """Records written before batching have no position, then the whole batch is the forecast."""
+
+        if 'size' not in record:
+            return batch
+
+        return batch[record['position']:record['position'] + record['size']]
+
+    def _get_forecast(self, xml_data: str, component_uid: str):
+        if component_uid is None:
+            return xml_data
+
+        components = xmltodict.parse(xml_data, attr_prefix='')['system']['component']
+        if isinstance(components, dict):
+            components = [components]
+
+        for component in components:
+            if component['UID'] == component_uid:
+                return component
+
+    def _get_segments_in_range(self, start: float, end: float) -> list:
+        first = self._get_segment_name(start)
+        last = self._get_segment_name(end)
+
+        return [segment for segment in self._get_segments() if first <= segment <= last]
+
+    def _get_segments(self) -> list:
+        index_paths = glob.glob(f"{self.archive_path}/*.idx")
+        return sorted(os.path.basename(index_path)[:-len('.idx')] for index_path in index_paths)
+
+    def _remove_expired_segments(self, now: float):
+        oldest_kept = self._get_segment_name(now - self.retention_days * 86400)
+
+        for segment in self._get_segments():
+            if segment < oldest_kept:
+                for path in glob.glob(f"{self.archive_path}/{segment}.*"):
+                    os.remove(path)
+                logging.info(f"Removed expired archive segment: {segment}")
+
+    def _read_index(self, segment: str) -> list:
+        with open(self._get_index_path(segment), 'r') as file:
+            return [json.loads(line) for line in file if line.strip()]
+
+    def _get_segment_name(self, timestamp: float) -> str:
+        date_time = datetime.fromtimestamp(timestamp, timezone.utc)
+        return date_time.strftime(self.partition_formats[self.partition])
+
+    def _get_data_path(self, segment: str, codec: str) -> str:
+        return f"{self.archive_path}/{segment}.xml.{self.extensions[codec]}"
+
+    def _get_index_path(self, segment: str) -> str:
+        return f"{self.archive_path}/{segment}.idx"
+
+    @staticmethod
+    def _compress(content: bytes, codec: str) -> bytes:
+        if codec == 'zstd':
+            return zstandard.ZstdCompressor().compress(content)
+
+        return gzip.compress(content)
+
+    @staticmethod
+    def _decompress(content: bytes, codec: str) -> bytes:
+        if codec == 'zstd':
+            return zstandard.ZstdDecompressor().decompress(content)
+
+        return gzip.decompress(content)
+
+    @staticmethod
+    def _get_compression(compression: str) -> str:
+        if compression == 'zstd' and zstandard is None:
+            logging.error("Compression zstd needs zstandard package, using gzip.")
+            return 'gzip'
+
+        return compression if compression in ('gzip', 'zstd') else 'gzip'
@@ -0,0 +1,161 @@
+import json
+import logging
+import os
+import socket
+from queue import Empty, Full, Queue
+from threading import Lock, Thread
+
+
+class _SubscriberConnection:
+
+    """
+    Single connected subscriber. Events are sent from own thread, so slow subscriber never blocks publisher.
+    When subscriber queue is full, the oldest event is dropped.
+    """
+
+    def __init__(self, connection: socket.socket, queue_size: int, on_close):
+        self.connection = connection
+        self.queue = Queue(queue_size)
+        self.dropped = 0
+        self.on_close = on_close
+        self.thread = Thread(target=self._send_loop, daemon=True)
+
+    def put(self, line: bytes):
+        while True:
+            try:
+                self.queue.put_nowait(line)
+                return
+            except Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except Empty:
+                    pass
+
+    def close(self):
+        self.put(None)
+
+    def _send_loop(self):
+        try:
+            while True:
+                line = self.queue.get()
+                if line is None:
+                    break
+                self.connection.sendall(line)
+        except OSError:
+            logging.info("Forecast subscriber disconnected")
+        finally:
+            self.connection.close()
+            self.on_close(self)
+
+
+class ForecastNotifier:
+
+    """
+    Publishes "forecast ready" events on local Unix domain socket, so consumers do not need to poll output folder.
+    Each event is single JSON line with system UUID, path, base_time, content hash and increasing sequence number,
+    gaps in sequence numbers show consumer, that events were dropped.
+    Every subscriber has own bounded queue of queue_size events, and the oldest events are dropped for slow subscribers.
+    """
+
+    def __init__(self, socket_path: str, queue_size: int = 100):
+        self.socket_path = socket_path
+        self.queue_size = queue_size
+        self.server = None
+        self.subscribers = []
+        self.published = 0
+        self._lock = Lock()
+
+    def start(self):
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.socket_path)
+        self.server.listen()
+        Thread(target=self._accept_loop, args=(self.server,), daemon=True).start()
+
+        logging.info(f"Publishing forecast events on socket: {self.socket_path}")
+
+        return self
+
+    def stop(self):
+        if self.server is None:
+            return
+
+        self.server.close()
+        self.server = None
+
+        with self._lock:
+            subscribers = list(self.subscribers)
+
+        for subscriber in subscribers:
+            subscriber.close()
+
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    def publish(self, event: dict):
+        with self._lock:
+            self.published += 1
+            line = (json.dumps(dict(event, sequence=self.published)) + '\n').encode()
+            subscribers = list(self.subscribers)
+
+        for subscriber in subscribers:
+            subscriber.put(line)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(subscribers=len(self.subscribers), published=self.published,
+                        dropped=sum(subscriber.dropped for subscriber in self.subscribers))
+
+    def _accept_loop(self, server: socket.socket):
+        while True:
+            try:
+                connection, _ = server.accept()
+            except OSError:
+                break
+
+            subscriber = _SubscriberConnection(connection, self.queue_size, self._remove_subscriber)
+
+            with self._lock:
+                self.subscribers.append(subscriber)
+
+            subscriber.thread.start()
+
+    def _remove_subscriber(self, subscriber: _SubscriberConnection):
+        with self._lock:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+
+
+class ForecastSubscriber:
+
+    """
+    Helper for consumers, connects to forecast notifier socket and yields events as dictionaries.
+
+    for event in ForecastSubscriber(socket_path):
+        print(event['uuid'], event['path'])
+    """
+
+    def __init__(self, socket_path: str, timeout: float = None):
+        self.connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.connection.settimeout(timeout)
+        self.connection.connect(socket_path)
+        self.file = self.connection.makefile('r')
+
+    def __iter__(self):
+        for line in self.file:
+            yield json.loads(line)
+
+    def receive(self) -> dict:
+        """Returns next event, or None if notifier is closed."""
+
+        line = self.file.readline()
+
+        if line:
+            return json.loads(line)
+
+    def close(self):
+        self.file.close()
+        self.connection.close()
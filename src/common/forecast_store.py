@@ -0,0 +1,189 @@
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from threading import Lock
+
+import weather_requests.request as req
+from common.refresh_planner import RefreshPlanner
+from common.tracing import tracer
+
+
+@dataclass
+class ForecastEntry:
+    """Single fetched hourly forecast for one localization key."""
+
+    loc_key: str
+    fetched_at: datetime
+    data: list
+    times: list = field(default_factory=list)
+
+
+class ForecastStore:
+
+    """
+    Per-localization store of hourly forecasts. Long forecast horizon is fetched once
+    and on each call current window (for example 12 hours) is sliced relative to 'now'.
+    Forecast is fetched again only when remaining horizon is shorter than min_remaining_hours
+    or data is older than max_age seconds.
+
+    forecast_req_class - hourly request class which should inherit from AccuWeatherHourlyForecastsRequest,
+    window_hours - count of hourly forecasts returned for single localization,
+    min_remaining_hours - minimal count of future hours left in stored forecast, before refetch,
+    max_age - maximal age of stored forecast in seconds, before refetch,
+    refresh_planner - optional planner, which replaces max_age with staleness estimated from
+    upstream publish period of each localization,
+    details - True if forecasts should be fetched with full details,
+    provider - optional provider (like HedgedForecastProvider), which fetches forecasts instead of forecast_req_class,
+    forecast_req_class still sets forecast horizon.
+    """
+
+    date_time_key = 'DateTime'
+
+    def __init__(self, forecast_req_class=req.AccuWeather12HoursForecastsRequest,
+                 window_hours: int = 12, min_remaining_hours: int = None, max_age: int = 3600,
+                 refresh_planner: RefreshPlanner = None, details: bool = False, provider=None):
+        self.forecast_req_class = forecast_req_class
+        self.window_hours = window_hours
+        self.min_remaining_hours = min_remaining_hours if min_remaining_hours is not None else window_hours
+        self.max_age = max_age
+        self.refresh_planner = refresh_planner
+        self.details = details
+        self.provider = provider
+        self.fetch_count = 0
+        self._entries = {}
+        self._locks = {}
+        self._locks_lock = Lock()
+        self._lock = Lock()
+
+    def get_data(self, apikey: str, loc_key: str, now: datetime = None) -> list:
+        """Returns current window of hourly forecasts for localization key,
+        fetches forecast only if stored one is missing or stale."""
+
+        now = self._get_now(now)
+
+        with self._get_location_lock(loc_key):
+            entry = self._entries.get(loc_key)
+
+            if entry is None or self._needs_refresh(entry, now):
+                entry = self._fetch(apikey, loc_key, now) or entry
+
+            if entry is not None:
+                window = self._get_window(entry, now)
+                if window != []:
+                    return window
+
+    def get_data_for_locations(self, apikey: str, loc_keys: list, now: datetime = None) -> dict:
+        """Returns current windows for all localization keys. Only stale localizations are fetched,
+        fresh data is reused for the rest."""
+
+        now = self._get_now(now)
+        stale_keys = self.get_stale_locations(loc_keys, now)
+
+        if stale_keys != []:
+            logging.info(
+                f"Refreshing {len(stale_keys)} of {len(loc_keys)} localizations")
+
+        return {loc_key: self.get_data(apikey, loc_key, now) for loc_key in loc_keys}
+
+    def get_stale_locations(self, loc_keys: list, now: datetime = None) -> list:
+        now = self._get_now(now)
+        stale_keys = []
+
+        for loc_key in loc_keys:
+            entry = self._entries.get(loc_key)
+            if entry is None or self._needs_refresh(entry, now):
+                stale_keys.append(loc_key)
+
+        return stale_keys
+
+    def get_call_count(self) -> int:
+        """Count of forecast API calls. With provider each fetch can call many providers, so they are counted
+        by provider."""
+
+        if self.provider is not None:
+            return self.provider.get_call_count()
+
+        with self._lock:
+            return self.fetch_count
+
+    def get_entry(self, loc_key: str) -> ForecastEntry:
+        return self._entries.get(loc_key)
+
+    def get_entries(self) -> list:
+        return list(self._entries.values())
+
+    def add_entry(self, loc_key: str, fetched_at: datetime, data: list) -> ForecastEntry:
+        """Adds forecast fetched outside of the store, for example restored from state snapshot."""
+
+        with self._get_location_lock(loc_key):
+            return self._store_entry(loc_key, fetched_at, data)
+
+    def _fetch(self, apikey: str, loc_key: str, now: datetime) -> ForecastEntry:
+        with tracer.span('fetch_forecast', loc_key=loc_key):
+            if self.provider is not None:
+                data = self.provider.get_data(apikey, loc_key, self.forecast_req_class.hours, self.details)
+            else:
+                data = self.forecast_req_class(self.details).get_data(apikey, loc_key)
+        with self._lock:
+            self.fetch_count += 1
+
+        if data is not None:
+            logging.info(
+                f"Fetched {len(data)} hours of forecast for localization: {loc_key}")
+            return self._store_entry(loc_key, now, data)
+
+    def _store_entry(self, loc_key: str, fetched_at: datetime, data: list) -> ForecastEntry:
+        entry = self._create_entry(loc_key, fetched_at, data)
+        self._entries[loc_key] = entry
+
+        if self.refresh_planner is not None:
+            self.refresh_planner.record(loc_key, data, fetched_at)
+
+        return entry
+
+    def _create_entry(self, loc_key: str, fetched_at: datetime, data: list) -> ForecastEntry:
+        times = [self._get_forecast_time(forecast) for forecast in data]
+        return ForecastEntry(loc_key, fetched_at, data, times)
+
+    def _needs_refresh(self, entry: ForecastEntry, now: datetime) -> bool:
+        remaining_hours = len(self._get_future_indexes(entry, now))
+
+        if remaining_hours < self.min_remaining_hours:
+            return True
+
+        if self.refresh_planner is not None:
+            return self.refresh_planner.is_stale(entry.loc_key, now)
+
+        age = (now - entry.fetched_at).total_seconds()
+        return age >= self.max_age
+
+    def _get_window(self, entry: ForecastEntry, now: datetime) -> list:
+        indexes = self._get_future_indexes(entry, now)[:self.window_hours]
+        return [entry.data[index] for index in indexes]
+
+    @staticmethod
+    def _get_future_indexes(entry: ForecastEntry, now: datetime) -> list:
+        return [index for index, time in enumerate(entry.times) if time is not None and time > now]
+
+    def _get_forecast_time(self, forecast: dict) -> datetime:
+        try:
+            time = datetime.fromisoformat(forecast[self.date_time_key])
+            if time.tzinfo is None:
+                time = time.replace(tzinfo=timezone.utc)
+            return time
+        except (KeyError, TypeError, ValueError) as error:
+            logging.error(f"Invalid forecast date time, cannot slice window: {error}")
+
+    def _get_location_lock(self, loc_key: str) -> Lock:
+        with self._locks_lock:
+            if loc_key not in self._locks:
+                self._locks[loc_key] = Lock()
+
+            return self._locks[loc_key]
+
+    @staticmethod
+    def _get_now(now: datetime = None) -> datetime:
+        if now is None:
+            return datetime.now(timezone.utc)
+
+        return now
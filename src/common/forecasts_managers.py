@@ -1,9 +1,15 @@
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
 from datetime import datetime
 
 import converters.dataclasses_converters as dc
+import converters.field_extractors as fe
 import converters.output_data_formatter as odf
+import converters.solar_daylight as sd
 import weather_requests.request as req
+from common.forecast_store import ForecastStore
+from common.location_resolver import LocationResolver
+from common.tracing import tracer
 
 
 class ForecastManager:
@@ -17,7 +23,10 @@ class ForecastManager:
     forecasts_converter - specific dataclass converter which should inherit from DataclassConverter,
     output_formatter - specific output formatter which should inherit from SingleTypeOutputDataFormatter,
     req_api_key - api key parsed from config values, which should be provided from ./api_keys/ path,
-    sequence_type_name - string name of specific forecast, for example - 'temperature' or 'rain'
+    sequence_type_name - string name of specific forecast, for example - 'temperature' or 'rain',
+    forecast_store - optional store shared between managers, which serves forecast windows
+    without refetching data which has not changed,
+    location_resolver - optional resolver shared between managers, which caches localization keys
     """
 
     forecast_req: req.RequestCreator = None
@@ -25,39 +34,110 @@ class ForecastManager:
     output_formatter: odf.SingleTypeOutputDataFormatter = None
     req_api_key: str = None
     sequence_type_name: str = None
+    forecast_store: ForecastStore = None
+    location_resolver: LocationResolver = None
 
     def __init__(self):
         self.system = None
+        self.component_list = None
+        self.component_set = None
         self.component_converter = dc.ComponentDataclassConverter()
         self.geoposition_req = req.AccuWeatherGeopositionRequest()
         self.geoposition_resp_id_key = 'Key'
 
     def get_data(self, system: dc.System):
         """Get data interface for getting formatted forecast data, ready to be converted by output converter."""
-        self.system = system
+        if system is not self.system:
+            self.prepare(system)
 
         return self._get_output_formatted_data()
 
+    def prepare(self, system: dc.System):
+        """Precomputes component list of the system, so the manager can be reused in each cycle
+        without converting components again."""
+
+        self.system = system
+        self.component_list = [component for component in self.component_converter.convert(system) or []
+                               if component is not None]
+        self.component_set = None
+
+    def resolve(self) -> list:
+        """Resolves localization keys and returns components grouped by localization (first pipeline stage)."""
+
+        with tracer.span('resolve_locations', components=len(self.component_list)):
+            return self._get_single_localization_component_set() or []
+
+    def is_resolved(self) -> bool:
+        """Returns True when localization keys of all components are resolved and kept for next cycles."""
+
+        return self.component_set is not None or self.component_list == []
+
+    def get_geo_positions(self) -> list:
+        """Returns geo positions of components, which are not resolved to localization keys yet."""
+
+        if self.component_set is not None:
+            return []
+
+        return [self._get_converted_geoposition(component) for component in self.component_list]
+
+    def fetch(self, component_set: list) -> dict:
+        """Returns hourly forecasts of each localization key of component set (second pipeline stage)."""
+
+        if component_set == []:
+            return {}
+
+        with tracer.span('fetch_forecasts', locations=len(component_set)):
+            if self.forecast_store is not None:
+                return self.forecast_store.get_data_for_locations(
+                    self.req_api_key, [comp_set['loc_key'] for comp_set in component_set])
+
+            return {comp_set['loc_key']: self._fetch_component_set(comp_set) for comp_set in component_set}
+
+    def get_format_task(self, component_set: list, fetched_data: dict) -> 'FormatTask':
+        """Returns conversion and formatting of fetched forecasts, which can be run in another process."""
+
+        return FormatTask(type(self), self.forecasts_converter, self.output_formatter, self.sequence_type_name,
+                          self.component_list, component_set, fetched_data)
+
+    def format_fetched_data(self, component_set: list, fetched_data: dict):
+        component_data = [self._get_forecast_data(fetched_data.get(comp_set['loc_key']), comp_set)
+                          for comp_set in component_set]
+
+        return self._format_component_data(component_data)
+
     def _get_output_formatted_data(self):
-        component_data = self._get_forecast_data_for_all_components()
+        return self._format_component_data(self._get_forecast_data_for_all_components())
+
+    def _format_component_data(self, component_data: list):
         if component_data is not None:
             flat_comp_list = [
-                component for sublist in component_data for component in sublist]
-            return self.output_formatter.get_formatted_data(flat_comp_list)
+                component for sublist in component_data if sublist is not None for component in sublist]
+            if flat_comp_list != []:
+                with tracer.span('format', sequence_type=self.sequence_type_name):
+                    return self.output_formatter.get_formatted_data(flat_comp_list)
 
     def _get_component_list(self) -> list:
-        return self.component_converter.convert(self.system)
+        return self.component_list
 
     def _get_localization_key(self, component: dc.Component) -> str:
         geo_position = self._get_converted_geoposition(component)
+
+        if self.location_resolver is not None:
+            return self.location_resolver.get_localization_key(self.req_api_key, geo_position)
+
         data = self.geoposition_req.get_data(self.req_api_key, geo_position)
 
         if data is not None:
             return data[self.geoposition_resp_id_key]
 
     def _get_single_localization_component_set(self) -> list:
-        ret_key_comp_list = []
-        key_list = []
+        """Groups components by localization key. When all components are resolved,
+        groups are kept and reused in next cycles."""
+
+        if self.component_set is not None:
+            return self.component_set
+
+        key_comp_sets = {}
 
         components = self._get_component_list()
 
@@ -65,35 +145,52 @@ class ForecastManager:
             key = self._get_localization_key(component)
 
             if key:
-                if key not in key_list:
-                    key_list.append(key)
-                    ret_key_comp_list.append(
-                        dict(loc_key=key, components=[component]))
+                if key not in key_comp_sets:
+                    key_comp_sets[key] = dict(loc_key=key, components=[component])
                 else:
-                    for item in ret_key_comp_list:
-                        if item['loc_key'] == key:
-                            item['components'].append(component)
+                    key_comp_sets[key]['components'].append(component)
+
+        ret_key_comp_list = list(key_comp_sets.values())
+        resolved_count = sum(len(item['components']) for item in ret_key_comp_list)
 
         if ret_key_comp_list != []:
+            if resolved_count == len(components):
+                self.component_set = ret_key_comp_list
+
             return ret_key_comp_list
 
     def _get_forecast_data_for_all_components(self) -> list:
         forecast_data = []
 
-        component_set = self._get_single_localization_component_set()
+        with tracer.span('resolve_locations', components=len(self.component_list)):
+            component_set = self._get_single_localization_component_set()
 
         if component_set:
-            for comp_set in component_set:
-                forecast_data.append(
-                    self._get_forecast_data_for_single_component_set(comp_set))
+            with tracer.span('fetch_forecasts', locations=len(component_set)):
+                if self.forecast_store is not None:
+                    return self._get_stored_forecast_data_for_all_component_sets(component_set)
+
+                for comp_set in component_set:
+                    forecast_data.append(
+                        self._get_forecast_data_for_single_component_set(comp_set))
 
             return forecast_data
 
+    def _get_stored_forecast_data_for_all_component_sets(self, component_set: list) -> list:
+        loc_keys = [comp_set['loc_key'] for comp_set in component_set]
+        stored_data = self.forecast_store.get_data_for_locations(
+            self.req_api_key, loc_keys)
+
+        return [self._get_forecast_data(stored_data[comp_set['loc_key']], comp_set)
+                for comp_set in component_set]
+
     def _get_forecast_data_for_single_component_set(self, comp_set: dict) -> list:
-        data = self.forecast_req.get_data(
-            self.req_api_key, comp_set['loc_key'])
+        return self._get_forecast_data(self._fetch_component_set(comp_set), comp_set)
 
-        return self._get_forecast_data(data, comp_set)
+    def _fetch_component_set(self, comp_set: dict) -> list:
+        with tracer.span('fetch_forecast', loc_key=comp_set['loc_key']):
+            return self.forecast_req.get_data(
+                self.req_api_key, comp_set['loc_key'])
 
     def _get_forecast_data(self, data: list, comp_set: dict) -> list:
         ret_forecast_data_list = []
@@ -120,14 +217,41 @@ class ForecastManager:
         return base_time.strftime("%Y-%m-%dT%H%:%M:%S")
 
 
+@dataclass
+class FormatTask:
+    """Conversion and formatting of forecasts fetched by forecast manager. It does not contain forecast store
+    or location resolver, so it can be sent to another process."""
+
+    manager_class: type
+    forecasts_converter: dc.DataclassConverter
+    output_formatter: odf.SingleTypeOutputDataFormatter
+    sequence_type_name: str
+    component_list: list
+    component_set: list
+    fetched_data: dict
+
+    def run(self):
+        manager = self.manager_class()
+        manager.forecasts_converter = self.forecasts_converter
+        manager.output_formatter = self.output_formatter
+        manager.sequence_type_name = self.sequence_type_name
+        manager.component_list = self.component_list
+
+        return manager.format_fetched_data(self.component_set, self.fetched_data)
+
+
 class ForecastManagerCreator(ABC):
 
     """
     Base forecast manager creator which sets specific parameters for base ForecastManager class.
     All specific ForecastManagersCreators should provide all abstractmethod."""
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, forecast_store: ForecastStore = None,
+                 location_resolver: LocationResolver = None):
         self.api_key = api_key
+        self.forecast_store = forecast_store
+        self.location_resolver = location_resolver
+        self._forecast_managers = {}
 
     @abstractmethod
     def factory_method(self) -> ForecastManager:
@@ -156,9 +280,28 @@ class ForecastManagerCreator(ABC):
         return odf.SingleTypeOutputDataFormatter()
 
     def get_data_for_system(self, system: dc.System):
-        forecast_manager = self._get_configured_forecast_manager()
+        forecast_manager = self._get_forecast_manager_for_system(system)
         return forecast_manager.get_data(system)
 
+    def get_forecast_manager(self, system: dc.System) -> ForecastManager:
+        return self._get_forecast_manager_for_system(system)
+
+    def prepare_system(self, system: dc.System):
+        """Builds forecast manager for the system upfront, with precomputed component list."""
+        self._get_forecast_manager_for_system(system)
+
+    def _get_forecast_manager_for_system(self, system: dc.System) -> ForecastManager:
+        """Forecast manager is configured once for each system and reused in next cycles."""
+
+        forecast_manager = self._forecast_managers.get(system.filename)
+
+        if forecast_manager is None or forecast_manager.system is not system:
+            forecast_manager = self._get_configured_forecast_manager()
+            forecast_manager.prepare(system)
+            self._forecast_managers[system.filename] = forecast_manager
+
+        return forecast_manager
+
     def _get_configured_forecast_manager(self) -> ForecastManager:
         """Setting all credentials for specific forecast manager."""
 
@@ -168,10 +311,25 @@ class ForecastManagerCreator(ABC):
         forecast_manager.output_formatter = self._get_single_type_output_data_formatter()
         forecast_manager.req_api_key = self.api_key
         forecast_manager.sequence_type_name = self._get_sequence_type_name()
+        forecast_manager.forecast_store = self.forecast_store
+        forecast_manager.location_resolver = self.location_resolver
 
         return forecast_manager
 
 
+class MultiSequenceManager(ForecastManager):
+    """Forecast manager, which extracts all configured sequence types from single forecast response
+    of each localization, in single pass over the response."""
+
+    def _get_forecast_data(self, data: list, comp_set: dict) -> list:
+        if data is not None:
+            forecast_data = self.forecasts_converter.convert(data)
+            base_time = self._get_base_time()
+
+            return [dict(base_time=base_time, component=component, forecast_data=forecast_data)
+                    for component in comp_set['components']]
+
+
 class TemperatureManager(ForecastManager):
     """Specific temperature manager class"""
     pass
@@ -179,6 +337,36 @@ class TemperatureManager(ForecastManager):
 class DaylightManager(ForecastManager):
     pass
 
+class LocalDaylightManager(ForecastManager):
+    """Daylight manager, which computes daylight of all components locally, without localization keys
+    and forecast requests."""
+
+    def resolve(self) -> list:
+        return []
+
+    def is_resolved(self) -> bool:
+        return True
+
+    def get_geo_positions(self) -> list:
+        return []
+
+    def fetch(self, component_set: list) -> dict:
+        return {}
+
+    def format_fetched_data(self, component_set: list, fetched_data: dict):
+        return self._get_output_formatted_data()
+
+    def _get_forecast_data_for_all_components(self) -> list:
+        components = self._get_component_list()
+        daylight_data = self.forecasts_converter.convert(components)
+        base_time = self._get_base_time()
+
+        return [[dict(sequence_type=self.sequence_type_name,
+                      base_time=base_time,
+                      component=component,
+                      forecast_data=forecast_data)
+                 for component, forecast_data in zip(components, daylight_data)]]
+
 class TemperatureManagerCreator(ForecastManagerCreator):
 
     def factory_method(self) -> ForecastManager:
@@ -211,4 +399,58 @@ class DaylightManagerCreator(ForecastManagerCreator):
         return 'day_light'
 
     def _get_single_type_output_data_formatter(self) -> odf.SingleTypeOutputDataFormatter:
-        return odf.OutputDaylightFormatter()
\ No newline at end of file
+        return odf.OutputDaylightFormatter()
+
+
+class LocalDaylightManagerCreator(ForecastManagerCreator):
+    """Alternative to DaylightManagerCreator, which computes 'day_light' sequence from solar elevation,
+    without any API call. Needs optional numpy package."""
+
+    def __init__(self, api_key: str, forecast_store: ForecastStore = None,
+                 location_resolver: LocationResolver = None, hours: int = 12, timezone_name: str = 'UTC'):
+        super().__init__(api_key, forecast_store, location_resolver)
+        self.hours = hours
+        self.timezone_name = timezone_name
+
+    def factory_method(self) -> ForecastManager:
+        return LocalDaylightManager()
+
+    def _get_specific_forecast_dataclass_converter(self) -> sd.LocalDaylightDataclassConverter:
+        return sd.LocalDaylightDataclassConverter(self.hours, self.timezone_name)
+
+    def _get_forecast_request_class(self) -> req.RequestCreator:
+        return None
+
+    def _get_sequence_type_name(self) -> str:
+        return 'day_light'
+
+    def _get_single_type_output_data_formatter(self) -> odf.SingleTypeOutputDataFormatter:
+        return odf.OutputDaylightFormatter()
+
+
+class MultiSequenceManagerCreator(ForecastManagerCreator):
+    """Creates single forecast manager for all configured sequence types, like temperature, day_light,
+    humidity, wind or precipitation_probability. Adding sequence type does not add any API call."""
+
+    def __init__(self, api_key: str, forecast_store: ForecastStore = None,
+                 location_resolver: LocationResolver = None, sequence_types: list = None):
+        super().__init__(api_key, forecast_store, location_resolver)
+        self.field_extractors = fe.get_field_extractors(sequence_types or ['temperature', 'day_light'])
+
+    def factory_method(self) -> ForecastManager:
+        return MultiSequenceManager()
+
+    def _get_specific_forecast_dataclass_converter(self) -> dc.DataclassConverter:
+        return dc.AccuWeatherMultiSequenceDataclassConverter(self.field_extractors)
+
+    def _get_forecast_request_class(self) -> req.RequestCreator:
+        return req.AccuWeather12HoursForecastsRequest(self.requires_details())
+
+    def _get_sequence_type_name(self) -> str:
+        return ' '.join(extractor.sequence_type_name for extractor in self.field_extractors)
+
+    def _get_single_type_output_data_formatter(self) -> odf.MultiSequenceOutputDataFormatter:
+        return odf.MultiSequenceOutputDataFormatter()
+
+    def requires_details(self) -> bool:
+        return any(extractor.requires_details for extractor in self.field_extractors)
\ No newline at end of file
@@ -0,0 +1,253 @@
+import argparse
+import glob
+import hashlib
+import logging
+import os
+import time
+import uuid
+from threading import Lock
+from xml.parsers.expat import ExpatError
+
+import xmltodict
+
+from converters.xml_formatter import DictToXmlConverter
+
+
+class FragmentOutputWriter:
+
+    """
+    Content-addressed output layout. Time sequences of each component are written once as fragment file,
+    named by SHA-1 hash of its content, so components at the same localization share one fragment across
+    all systems. Fragments do not contain base_time, which is different in each cycle, so it is kept
+    in system index with fragment path of each component UID.
+
+    Fragments, which are not referenced by the latest index of any system, are removed after retention seconds
+    from their last use (reused fragment is touched), so consumers still can read fragments of index,
+    which they loaded before. References are loaded from index files on disk at start, so fragments of
+    previous run are kept while they are referenced. Garbage is collected at the first index and then
+    every retention seconds, under the same lock as registration of references and reuse of fragments.
+
+    output_path - base output path, fragments are written to 'fragments' folder in it,
+    retention - age in seconds, after which unreferenced fragments are removed.
+    """
+
+    fragments_folder = 'fragments'
+    index_suffix = '_forecast.index.xml'
+    base_time_key = '@base_time'
+    time_sequence_key = 'time_sequence'
+
+    def __init__(self, output_path: str, retention: int = 3600, clock=time.time):
+        self.output_path = output_path
+        self.retention = retention
+        self.clock = clock
+        self.written = 0
+        self.reused = 0
+        self.removed = 0
+        self._fragments = set()
+        self._references = self._load_references()
+        self._last_collection = None
+        self._lock = Lock()
+
+    def get_index(self, system_filename: str, data: dict) -> dict:
+        """Writes missing fragments of all components and returns index dictionary of the system."""
+
+        system = data['system']
+        index_components = []
+
+        for component in self._as_list(system['component']):
+            fragment_path, base_times = self._write_fragment(component)
+            index_components.append({'@UID': component['@UID'],
+                                     '@fragment': fragment_path,
+                                     '@base_time': ' '.join(base_times)})
+
+        with self._lock:
+            self._references[system_filename] = {component['@fragment'] for component in index_components}
+
+        self._collect_garbage_if_needed()
+
+        index = {key: value for key, value in system.items() if key != 'component'}
+        index['component'] = index_components
+
+        return {'system': index}
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(written=self.written, reused=self.reused, removed=self.removed,
+                        referenced=len(set().union(*self._references.values())))
+
+    def collect_garbage(self):
+        """Removes fragments older than retention, which are not referenced by the latest index of any system."""
+
+        with self._lock:
+            referenced = set().union(*self._references.values())
+            self._last_collection = self.clock()
+
+            for path in glob.glob(os.path.join(self.output_path, self.fragments_folder, '*', '*.xml')):
+                relative_path = os.path.relpath(path, self.output_path).replace(os.sep, '/')
+
+                try:
+                    if relative_path not in referenced and self.clock() - os.path.getmtime(path) > self.retention:
+                        os.remove(path)
+                        self._fragments.discard(relative_path)
+                        self.removed += 1
+                except OSError as error:
+                    logging.error(f"Cannot remove fragment {path}: {error}")
+
+    def _collect_garbage_if_needed(self):
+        if self._last_collection is None or self.clock() - self._last_collection > self.retention:
+            self.collect_garbage()
+
+    def _load_references(self) -> dict:
+        """References of the latest index of each system saved on disk, by system filename."""
+
+        references = {}
+
+        for index_path in glob.glob(os.path.join(self.output_path, f"*{self.index_suffix}")):
+            system_filename = os.path.basename(index_path)[:-len(self.index_suffix)] + '.xml'
+
+            try:
+                with open(index_path) as file:
+                    components = xmltodict.parse(file.read())['system'].get('component') or []
+                references[system_filename] = {component['@fragment'] for component in self._as_list(components)}
+            except (OSError, KeyError, TypeError, ExpatError) as error:
+                logging.error(f"Cannot load fragment references of index {index_path}: {error}")
+
+        return references
+
+    def _write_fragment(self, component: dict) -> tuple:
+        """Returns relative path of the fragment and base times of its time sequences.
+        Existing fragment is touched under the lock, so garbage collection cannot remove it at the same time."""
+
+        sequences = self._as_list(component['model_parameters']['dynamic'][self.time_sequence_key])
+        base_times = [sequence.get(self.base_time_key, '') for sequence in sequences]
+        fragment = {key: value for key, value in component.items() if key != '@UID'}
+        fragment['model_parameters'] = {'dynamic': {self.time_sequence_key: [
+            {key: value for key, value in sequence.items() if key != self.base_time_key} for sequence in sequences]}}
+
+        content = DictToXmlConverter().get_xml_line_from_dictionary({'component': fragment})
+        digest = hashlib.sha1(content.encode()).hexdigest()
+        relative_path = f"{self.fragments_folder}/{digest[:2]}/{digest[2:]}.xml"
+        path = os.path.join(self.output_path, relative_path)
+
+        with self._lock:
+            exists = self._touch(path)
+
+            if relative_path in self._fragments and exists:
+                self.reused += 1
+                return relative_path, base_times
+
+        if not exists:
+            self._write_file(path, content)
+
+        with self._lock:
+            self._fragments.add(relative_path)
+            if not exists:
+                self.written += 1
+
+        return relative_path, base_times
+
+    @staticmethod
+    def _touch(path: str) -> bool:
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    def _write_file(path: str, content: str):
+        """Fragment is renamed to its final path after it is written, so readers never see partial fragment."""
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary_path = f"{path}.{uuid.uuid4().hex}.tmp"
+
+        with open(temporary_path, 'w') as file:
+            file.write(content)
+
+        os.replace(temporary_path, path)
+
+    @staticmethod
+    def _as_list(value) -> list:
+        return value if isinstance(value, list) else [value]
+
+
+class FragmentOutputReader:
+
+    """
+    Flattening helper for consumers of fragment output layout. Returns forecast of the system index
+    in the same form as <system>_forecast.xml of files layout.
+
+    reader = FragmentOutputReader(output_path)
+    xml_data = reader.flatten(f"{output_path}/system1_forecast.index.xml")
+    """
+
+    base_time_key = '@base_time'
+    sequence_type_key = '@sequence_type'
+
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+
+    def get_data(self, index_path: str) -> dict:
+        with open(index_path) as file:
+            index = xmltodict.parse(file.read())
+
+        system = {key: value for key, value in index['system'].items() if key != 'component'}
+        system['component'] = [self._get_component(component)
+                               for component in FragmentOutputWriter._as_list(index['system']['component'])]
+
+        return {'system': system}
+
+    def flatten(self, index_path: str) -> str:
+        return DictToXmlConverter().get_xml_string_from_dictionary(self.get_data(index_path))
+
+    def flatten_all(self, destination_path: str) -> list:
+        """Writes flattened <system>_forecast.xml file of each index to destination path, returns written paths."""
+
+        paths = []
+
+        for index_path in sorted(glob.glob(os.path.join(self.output_path, f"*{FragmentOutputWriter.index_suffix}"))):
+            path = os.path.join(destination_path, os.path.basename(index_path).replace('.index.xml', '.xml'))
+
+            with open(path, 'w') as file:
+                file.write(self.flatten(index_path))
+
+            paths.append(path)
+
+        return paths
+
+    def _get_component(self, index_component: dict) -> dict:
+        with open(os.path.join(self.output_path, index_component['@fragment'])) as file:
+            fragment = xmltodict.parse(file.read())['component']
+
+        dynamic = fragment['model_parameters']['dynamic']
+        base_times = index_component['@base_time'].split(' ')
+        dynamic['time_sequence'] = [self._get_sequence(sequence, base_time) for sequence, base_time
+                                    in zip(FragmentOutputWriter._as_list(dynamic['time_sequence']), base_times)]
+
+        return dict({'@UID': index_component['@UID']}, **fragment)
+
+    def _get_sequence(self, sequence: dict, base_time: str) -> dict:
+        """Base time is written back after sequence type, like in output formatter."""
+
+        restored = {}
+
+        for key, value in sequence.items():
+            restored[key] = value
+            if key == self.sequence_type_key:
+                restored[self.base_time_key] = base_time
+
+        return restored
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flattens fragment output layout to <system>_forecast.xml files.")
+    parser.add_argument('output_path', help="output path with system index files and fragments folder")
+    parser.add_argument('destination_path', help="path, where flattened files are written")
+    args = parser.parse_args()
+
+    for path in FragmentOutputReader(args.output_path).flatten_all(args.destination_path):
+        print(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,20 @@
+import json
 import logging
+import random
 import time
-from threading import Thread
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from threading import Event, Lock, Thread
 
 from converters.dataclasses_converters import System
 from converters.output_data_formatter import FinalOutputDataFormatter
 
 from common.file_manger import SystemsXmlFileManager
-from common.forecasts_managers import TemperatureManagerCreator, DaylightManagerCreator
+from common.location_resolver import LocationResolver
+from common.module_components import ModuleComponentsCreator
+from common.overload_controller import DEFER, RUN
+from common.pipeline import Pipeline, SystemCycle
+from common.tracing import tracer
 
 
 class Module:
@@ -19,53 +27,325 @@ class Module:
         
         """
         In forecast_managers can define specific forecast manager creator which will handle seprate weather parameter type,
-        like temperature, clouds, rain etc.
+        like temperature, clouds, rain etc. Optional sinks and services configured in settings are created
+        by ModuleComponentsCreator, and they are stopped together with the module.
         """
 
         self.output_path = config['output_path']
         self.mode = config['mode']
-        self.systems = SystemsXmlFileManager().get_data(config['entry_path'])
-        self.forecasts_managers = [
-            TemperatureManagerCreator(config['api_key']),
-            DaylightManagerCreator(config['api_key'])
-        ]
+        self.api_keys = config.get('api_keys') or [dict(key=config['api_key'])]
+        self.settings = config.get('settings') or {}
+        self.components = ModuleComponentsCreator(self.settings, self.output_path, self.mode)
+        self.components.configure_tracing()
+        self.key_pool = self.components.get_api_key_pool(self.api_keys)
+        self.concurrency_limiter = self.components.get_concurrency_limiter()
+        self.cassette = self.components.get_cassette()
+        self.components.configure_requests(self.key_pool, self.concurrency_limiter, self.cassette)
+        self.warm_restart = 'warm_restart' in self.settings
+        self.manifest = self.components.get_system_manifest()
+        self.notifier = self.components.get_forecast_notifier()
+        self.write_queue = self.components.get_write_queue()
+        self.fragment_writer = self.components.get_fragment_writer()
+        self.output_templates = self.components.get_output_templates()
+        self.file_manager = SystemsXmlFileManager(self.manifest, self.notifier, self.write_queue,
+                                                  self.fragment_writer, self.output_templates)
+        self.output_formatter = FinalOutputDataFormatter()
+        self.delta_formatter = self.components.get_delta_formatter()
+        self.archive = self.components.get_forecast_archive()
+        self.read_api = self.components.get_read_api()
+        self.shared_table = self.components.get_shared_forecast_table()
+        self.systems = self.file_manager.get_data(config['entry_path'])
+        self.location_resolver = LocationResolver(self.manifest.locations if self.manifest else None)
+        self.sequence_types = self.components.get_sequence_types()
+        self.forecast_provider = self.components.get_forecast_provider(self.cassette, self.location_resolver)
+        self.forecast_store = self.components.get_forecast_store(self.sequence_types, self.forecast_provider)
+        self.state_snapshot = self.components.get_state_snapshot(self.forecast_store)
+        self.schedule_phases = dict(self.state_snapshot.schedule_phases) if self.state_snapshot else {}
+        self.schedule_phases_lock = Lock()
+        self.stop_event = Event()
+        self.threads = []
+        self.overload_controller = self.components.get_overload_controller()
+        self.forecasts_managers = self.components.get_forecasts_managers(
+            config['api_key'], self.forecast_store, self.location_resolver, self.sequence_types)
+        self.location_scheduler = self.components.get_location_scheduler(
+            self.forecast_store, config['api_key'], self.forecasts_managers)
+        self.batch_runner = self.components.get_batch_runner(self.location_resolver, self.forecast_store,
+                                                             config['api_key'])
+        self.pipeline = self._get_pipeline()
+        self.batch_summary = None
+
+        self._prepare_forecast_managers()
+
+        if self.manifest is not None and self.mode != 'dry_run':
+            self.manifest.save()
+
+    def _prepare_forecast_managers(self):
+        """Forecast managers for each system are built once at load and reused in each cycle."""
+
+        for system in self._get_systems_list():
+            for manager in self.forecasts_managers:
+                manager.prepare_system(system)
+
+    def _get_systems_list(self) -> list:
+        if isinstance(self.systems, list):
+            return [system for system in self.systems if system is not None]
+        elif self.systems is not None:
+            return [self.systems]
+
+        return []
+
+    def _get_pipeline(self) -> Pipeline:
+        """Pipeline is started only when it is used, batch run and location scheduling take precedence over it."""
+
+        if 'pipeline' in self.settings and (self.batch_runner is not None or self.location_scheduler is not None):
+            logging.warning("Pipeline is not used together with batch run or location scheduling.")
+            return None
+
+        return self.components.get_pipeline(self._resolve_cycle, self._fetch_cycle, self._write_cycle)
 
     def run(self):
         if self.mode == 'single_time':
             self._single_run()
         elif self.mode == 'continous':
             self._continous_run()
+        elif self.mode == 'dry_run':
+            self._dry_run()
+
+    def _dry_run(self):
+        """Prints projected API calls and resources of loaded systems, without fetching forecasts.
+        Only localization keys cached in system manifest are used."""
+
+        capacity_planner = self.components.get_capacity_planner(
+            self._get_systems_list(), self.location_resolver, self.forecast_store, self.api_keys,
+            self.sequence_types, self.forecasts_managers)
+
+        print(json.dumps(capacity_planner.get_report(), indent=4))
+        self.stop()
 
     def _single_run(self):
         
-        if isinstance(self.systems, list):
+        if self.batch_runner is not None:
+            self._batch_run()
+        elif self.pipeline is not None:
+            self._pipelined_run()
+        elif isinstance(self.systems, list):
             for system in self.systems:
                 self._get_data_and_save_to_file(system)
         else:
             self._get_data_and_save_to_file(self.systems)
 
+        if self.pipeline is not None:
+            logging.info(f"Pipeline: {self.pipeline.get_stats()}")
+
+        if self.write_queue is not None:
+            self.write_queue.flush()
+            logging.info(f"Write behind queue: {self.write_queue.get_stats()}")
+
+        if self.fragment_writer is not None:
+            logging.info(f"Fragment output: {self.fragment_writer.get_stats()}")
+
+        if self.output_templates is not None:
+            logging.info(f"Output templates: {self.output_templates.get_stats()}")
+
+        logging.info(
+            f"API keys remaining capacity: {self.key_pool.get_remaining_capacity()}, usage: {self.key_pool.get_stats()}")
+
+        if self.concurrency_limiter is not None:
+            logging.info(f"Concurrency limiter: {self.concurrency_limiter.get_stats()}")
+
+        if self.forecast_provider is not None:
+            logging.info(f"Forecast providers: {self.forecast_provider.get_stats()}")
+
+        if self.cassette is not None:
+            logging.info(f"Cassette: {self.cassette.get_stats()}")
+
+        self.stop()
+
+    def stop(self):
+        """Stops all continous mode loops and waits for them to finish current cycle, saves state snapshot,
+        then stops pipeline, writers and services. Single time run stops the module at its end."""
+
+        self.stop_event.set()
+
+        for thread in self.threads:
+            thread.join()
+
+        if self.mode != 'dry_run':
+            self._save_state()
+
+        if self.overload_controller is not None:
+            logging.info(f"Overload control: {self.overload_controller.get_stats()}")
+
+        if self.location_scheduler is not None:
+            logging.info(f"Location scheduling: {self.location_scheduler.get_stats()}")
+            self.location_scheduler.stop()
+
+        if self.pipeline is not None:
+            self.pipeline.stop()
+
+        if self.write_queue is not None:
+            self.write_queue.stop()
+
+        if self.archive is not None:
+            self.archive.flush()
+
+        if self.notifier is not None:
+            self.notifier.stop()
+
+        if self.read_api is not None:
+            self.read_api.stop()
+
+        if self.shared_table is not None:
+            self.shared_table.close()
+
+        if self.forecast_provider is not None:
+            self.forecast_provider.stop()
+
+        if self.cassette is not None:
+            self.cassette.close()
+
+        self.components.reset_shared_state()
+
     def _continous_run(self):
-        threads = []
-        for system in self.systems:
+        if self.location_scheduler is not None:
+            thread = Thread(target=self._create_location_loop)
+            self.threads.append(thread)
+            thread.start()
+        else:
+            for system in self._get_systems_list():
+
+                thread = Thread(target=self._create_loop, args=(system,))
+                self.threads.append(thread)
+                thread.start()
 
-            thread = Thread(target=self._create_loop, args=(system,))
-            threads.append(thread)
+        if self.state_snapshot is not None:
+            thread = Thread(target=self._create_state_snapshot_loop)
+            self.threads.append(thread)
             thread.start()
 
-    def _get_data(self, system: System) -> dict:
+    def _get_data(self, system: System, windows: dict = None) -> dict:
+        """Windows of localizations can be given by location scheduler, then they are formatted
+        without reading forecast store."""
+
         forecast_data = []
 
         for manager in self.forecasts_managers:
-            data = manager.get_data_for_system(system)
+            if windows is None:
+                data = manager.get_data_for_system(system)
+            else:
+                data = self._format_windows(manager.get_forecast_manager(system), windows)
+
             if data is not None:
                 forecast_data.append(data)
 
         if forecast_data != []:
-            return FinalOutputDataFormatter().get_formatted_data(system, forecast_data)
+            with tracer.span('format_output'):
+                return self.output_formatter.get_formatted_data(system, forecast_data)
+
+    @staticmethod
+    def _format_windows(manager, windows: dict):
+        component_set = manager.resolve()
+        return manager.format_fetched_data(component_set, {comp_set['loc_key']: windows.get(comp_set['loc_key'])
+                                                           for comp_set in component_set})
+
+    def _get_data_and_save_to_file(self, system: System, windows: dict = None) -> dict:
+        """Returns saved output dictionary, or None if there was no forecast for the system."""
+
+        with tracer.span('cycle', system_uuid=system.uuid, filename=system.filename):
+            if self.pipeline is not None and windows is None:
+                serialize = (self.delta_formatter is None and self.fragment_writer is None
+                             and self.output_templates is None)
+                data = self.pipeline.submit(SystemCycle(system, serialize)).result().data
+            else:
+                data = self._get_data(system, windows)
+
+                with tracer.span('save_output'):
+                    self._save_output(system, data)
+
+        with self.schedule_phases_lock:
+            self.schedule_phases[system.filename] = time.time()
+
+        return data
+
+    def _pipelined_run(self):
+        """All systems are submitted at once, up to capacity of the pipeline, so stages work on different
+        systems at the same time."""
+
+        with ThreadPoolExecutor(self.pipeline.capacity) as executor:
+            list(executor.map(self._get_data_and_save_to_file, self._get_systems_list()))
+
+    def _batch_run(self):
+        self.batch_summary = self.batch_runner.run(
+            self._get_systems_list(),
+            lambda system: [creator.get_forecast_manager(system) for creator in self.forecasts_managers],
+            self._save_batch_system)
+
+        logging.info(f"Batch run: {asdict(self.batch_summary)}")
+
+    def _save_batch_system(self, system: System, windows: dict) -> bool:
+        try:
+            return self._get_data_and_save_to_file(system, windows) is not None
+        except Exception:
+            logging.exception(f"Forecast update failed for file: {system.filename}")
+            return False
+
+    def _resolve_cycle(self, cycle: SystemCycle) -> SystemCycle:
+        cycle.component_sets = [creator.get_forecast_manager(cycle.system).resolve()
+                                for creator in self.forecasts_managers]
+        return cycle
 
-    def _get_data_and_save_to_file(self, system: System):
-        data = self._get_data(system)
-        SystemsXmlFileManager().save_data(system, data, self.output_path)
+    def _fetch_cycle(self, cycle: SystemCycle) -> SystemCycle:
+        managers = [creator.get_forecast_manager(cycle.system) for creator in self.forecasts_managers]
+        cycle.format_tasks = [manager.get_format_task(component_set, manager.fetch(component_set))
+                              for manager, component_set in zip(managers, cycle.component_sets)]
+        cycle.component_sets = None
+        return cycle
+
+    def _write_cycle(self, cycle: SystemCycle) -> SystemCycle:
+        self._save_output(cycle.system, cycle.data, cycle.xml_data)
+        return cycle
+
+    def _save_output(self, system: System, data: dict, xml_data: str = None):
+        if self.delta_formatter is None:
+            xml_data = self.file_manager.save_data(system, data, self.output_path, xml_data)
+            self._publish_output(system, data, xml_data)
+            return
+
+        is_snapshot, output = self.delta_formatter.get_formatted_data(system, data)
+
+        if is_snapshot:
+            xml_data = self.file_manager.save_data(system, output, self.output_path)
+            self.file_manager.clear_delta(system, self.output_path)
+        else:
+            xml_data = None
+            self.file_manager.save_delta(system, output, self.output_path)
+
+        self._publish_output(system, data, xml_data)
+
+    def _publish_output(self, system: System, data: dict, xml_data: str):
+        """Archive, read API and shared table get full forecasts, also in delta output mode. XML already written
+        to the output file is reused, so it is not serialized twice."""
+
+        if data is None:
+            return
+
+        if self.shared_table is not None:
+            self.shared_table.update(system, data)
+
+        if self.archive is None and self.read_api is None:
+            return
+
+        if xml_data is None:
+            xml_data = self.file_manager.get_output_xml_data(system, data)
+
+        if self.read_api is not None:
+            self.read_api.update(system, data, xml_data)
+
+        if self.archive is not None:
+            try:
+                self.archive.append(system, xml_data)
+            except OSError:
+                logging.exception(f"Archiving forecast failed for file: {system.filename}")
 
     def _create_loop(self, system: System):
 
@@ -74,10 +354,169 @@ class Module:
         if update_period is None:
             update_period = 60
 
+        initial_delay = self._get_initial_delay(system, update_period)
+
         logging.info(
-            f"Starting loop for file: {system.filename}, update_period: {update_period} sec.")
+            f"Starting loop for file: {system.filename}, update_period: {update_period} sec., initial delay: {initial_delay:.1f} sec.")
+
+        self.stop_event.wait(initial_delay)
+
+        if self.overload_controller is not None:
+            self._create_scheduled_loop(system, update_period)
+            return
+
+        while not self.stop_event.is_set():
+            self._run_cycle(system)
+            self.stop_event.wait(update_period)
+
+    def _run_cycle(self, system: System, windows: dict = None):
+        try:
+            self._get_data_and_save_to_file(system, windows)
+        except Exception:
+            logging.exception(f"Forecast update failed for file: {system.filename}")
+
+    def _create_location_loop(self):
+        """Refreshes due localizations and regenerates systems subscribed to updated ones. Each system is subscribed
+        after its initial delay, localizations of subscribed systems are resolved by workers of the scheduler.
+        Systems with components, which are not resolved yet, are subscribed again in each tick.
+        Systems without any localization (for example only with local daylight) are regenerated by own timer
+        every update period."""
+
+        scheduler = self.location_scheduler
+        starts = {system.filename: time.monotonic() + self._get_initial_delay(system, self._get_update_period(system))
+                  for system in self._get_systems_list()}
+        waiting = self._get_systems_list()
+        unresolved = []
+        timers = {}
+
+        logging.info(f"Starting location scheduling for {len(waiting)} systems")
+
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            subscribed = unresolved + [system for system in waiting if starts[system.filename] <= now]
+            waiting = [system for system in waiting if starts[system.filename] > now]
+            unresolved = []
+
+            for system, loc_keys in zip(subscribed, scheduler.map(self._subscribe_system, subscribed)):
+                if loc_keys is None:
+                    unresolved.append(system)
+                elif loc_keys == [] and system.filename not in timers:
+                    timers[system.filename] = [system, now]
+
+            updates = scheduler.run_due()
+
+            for timer in timers.values():
+                if timer[1] <= now:
+                    updates.append((timer[0], None))
+                    timer[1] = max(timer[1] + self._get_update_period(timer[0]), now)
+
+            scheduler.map(lambda update: self._run_location_update(*update), updates)
+
+            next_runs = [scheduler.get_next_run(), *(starts[system.filename] for system in waiting),
+                         *(next_run for _, next_run in timers.values())]
+            if unresolved != []:
+                next_runs.append(time.monotonic() + scheduler.default_period)
+
+            next_run = min((next_run for next_run in next_runs if next_run is not None),
+                           default=time.monotonic() + scheduler.default_period)
+            self.stop_event.wait(max(0.0, next_run - time.monotonic()))
+
+    def _get_update_period(self, system: System) -> int:
+        return system.update_period or self.location_scheduler.default_period
+
+    def _run_location_update(self, system: System, windows: dict):
+        """With overload control, regeneration of the system is admitted like cycle of scheduled loop,
+        with deadline after its update period. Shed system is regenerated in the next tick."""
+
+        if self.overload_controller is None:
+            self._run_cycle(system, windows)
+            return
+
+        deadline_at = time.monotonic() + (system.deadline or self._get_update_period(system))
+
+        if self._wait_for_admission(system, deadline_at):
+            start = time.monotonic()
+            self._run_cycle(system, windows)
+            self.overload_controller.complete(system, time.monotonic() - start, deadline_at)
+        elif windows is not None:
+            self.location_scheduler.retry(system)
+
+    def _subscribe_system(self, system: System) -> list:
+        """Subscribes the system to localizations of its components. Returns localization keys when all of them
+        are resolved, otherwise None."""
+
+        managers = [creator.get_forecast_manager(system) for creator in self.forecasts_managers]
+        loc_keys = list(dict.fromkeys(comp_set['loc_key'] for manager in managers for comp_set in manager.resolve()))
+        self.location_scheduler.subscribe(system, loc_keys)
+
+        if all(manager.is_resolved() for manager in managers):
+            return loc_keys
+
+    def _create_scheduled_loop(self, system: System, update_period: int):
+        """Cycles are scheduled every update_period seconds from the first one. Cycles, which were due
+        while the previous one was still running, are skipped, so the system never falls behind its schedule."""
+
+        scheduled_at = time.monotonic()
+
+        while not self.stop_event.is_set():
+            deadline_at = scheduled_at + (system.deadline or update_period)
+
+            if self._wait_for_admission(system, deadline_at):
+                start = time.monotonic()
+                self._run_cycle(system)
+                self.overload_controller.complete(system, time.monotonic() - start, deadline_at)
+
+            scheduled_at += update_period
+            late = time.monotonic() - scheduled_at
+
+            if late > 0:
+                skipped = int(late // update_period) + 1
+                self.overload_controller.skip(system, skipped)
+                scheduled_at += skipped * update_period
+
+            self.stop_event.wait(scheduled_at - time.monotonic())
+
+    def _wait_for_admission(self, system: System, deadline_at: float) -> bool:
+        """Returns True when the cycle is admitted, and False when it is shed or module is stopped."""
+
+        deferred = False
+
+        while not self.stop_event.is_set():
+            decision = self.overload_controller.admit(system, deadline_at, deferred)
+
+            if decision == RUN:
+                return True
+            elif decision != DEFER:
+                return False
+
+            deferred = True
+            self.stop_event.wait(min(self.overload_controller.defer_delay, max(0.0, deadline_at - time.monotonic())))
+
+        return False
+
+    def _get_initial_delay(self, system: System, update_period: int) -> float:
+        """After warm restart each system with phase restored from snapshot resumes at its previous phase,
+        with random jitter, so all systems do not request API at the same time. Other systems start at once."""
+
+        last_run = self.schedule_phases.get(system.filename)
+
+        if not self.warm_restart or last_run is None:
+            return 0
+
+        jitter = min(float(self.components.get_warm_restart_setting('jitter', 10)), update_period)
+
+        return max(0, last_run + update_period - time.time()) + random.uniform(0, jitter)
+
+    def _create_state_snapshot_loop(self):
+        snapshot_interval = int(self.components.get_warm_restart_setting('snapshot_interval', 60))
+
+        while not self.stop_event.wait(snapshot_interval):
+            self._save_state()
 
-        while True:
-            self._get_data_and_save_to_file(system)
+    def _save_state(self):
+        if self.state_snapshot is not None:
+            with self.schedule_phases_lock:
+                schedule_phases = dict(self.schedule_phases)
 
-            time.sleep(update_period)
+            self.state_snapshot.save(self.forecast_store, schedule_phases)
+            self.manifest.save(self.location_resolver.get_locations())
@@ -0,0 +1,69 @@
+from threading import Lock
+
+import weather_requests.request as req
+from common.tracing import tracer
+
+
+class LocationResolver:
+
+    """
+    Resolves geo positions (comma-separated lat/lon pair) to AccuWeather localization keys.
+    Localization key for geo position does not change, so each one is requested only once,
+    and then served from cache, which can be also seeded from system manifest. Concurrent calls for the same
+    geo position wait for single request.
+    """
+
+    geoposition_resp_id_key = 'Key'
+
+    def __init__(self, locations: dict = None):
+        self.request_count = 0
+        self._locations = dict(locations or {})
+        self._lock = Lock()
+        self._geo_position_locks = {}
+
+    def get_localization_key(self, apikey: str, geo_position: str) -> str:
+        loc_key = self._locations.get(geo_position)
+
+        if loc_key is not None:
+            return loc_key
+
+        with self._get_geo_position_lock(geo_position):
+            loc_key = self._locations.get(geo_position)
+
+            if loc_key is None:
+                loc_key = self._request_localization_key(apikey, geo_position)
+
+        return loc_key
+
+    def get_cached_localization_key(self, geo_position: str) -> str:
+        return self._locations.get(geo_position)
+
+    def get_geo_position(self, loc_key: str) -> str:
+        """Returns the first geo position resolved to the localization key, or None."""
+
+        with self._lock:
+            return next((geo_position for geo_position, key in self._locations.items() if key == loc_key), None)
+
+    def get_locations(self) -> dict:
+        with self._lock:
+            return dict(self._locations)
+
+    def _get_geo_position_lock(self, geo_position: str) -> Lock:
+        with self._lock:
+            if geo_position not in self._geo_position_locks:
+                self._geo_position_locks[geo_position] = Lock()
+
+            return self._geo_position_locks[geo_position]
+
+    def _request_localization_key(self, apikey: str, geo_position: str) -> str:
+        with tracer.span('geoposition', geo_position=geo_position):
+            data = req.AccuWeatherGeopositionRequest().get_data(apikey, geo_position)
+
+        with self._lock:
+            self.request_count += 1
+
+            if data is not None:
+                loc_key = data[self.geoposition_resp_id_key]
+                self._locations[geo_position] = loc_key
+
+                return loc_key
@@ -0,0 +1,179 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from threading import Lock
+
+from converters.dataclasses_converters import System
+
+from common.forecast_store import ForecastStore
+from common.tracing import tracer
+
+
+@dataclass
+class LocationJob:
+    """Refresh job of single localization key.
+
+    period - seconds between refreshes, the shortest update period of subscribed systems,
+    subscribers - file names of subscribed systems,
+    window - current forecast window, the last one sent to subscribers,
+    next_run - clock time of the next refresh.
+    """
+
+    loc_key: str
+    period: int
+    subscribers: set = field(default_factory=set)
+    window: list = None
+    next_run: float = 0
+    refreshes: int = 0
+    updates: int = 0
+    failures: int = 0
+
+
+class LocationScheduler:
+
+    """
+    Location-centric scheduling of continous mode. Each unique localization key has one refresh job, run at
+    the shortest update period of systems subscribed to it, so location shared by many systems is refreshed once,
+    and work grows with count of unique locations instead of systems. Window of the location is sent
+    to subscribers only when it changes (new forecast was fetched, or window moved to the next hour).
+    System, which has many locations updated in the same tick, is regenerated once, and all subscribers
+    get the same window, so systems sharing location always agree on its data.
+
+    forecast_store - store, which fetches forecast only when stored one is stale,
+    api_key - API key of forecast requests, key pool spreads them across all keys,
+    default_period - update period of systems without it,
+    workers - count of locations refreshed at the same time.
+    """
+
+    def __init__(self, forecast_store: ForecastStore, api_key: str, default_period: int = 60, workers: int = 8,
+                 clock=time.monotonic):
+        self.forecast_store = forecast_store
+        self.api_key = api_key
+        self.default_period = default_period
+        self.workers = workers
+        self.clock = clock
+        self.regenerations = 0
+        self._jobs = {}
+        self._systems = {}
+        self._updated = set()
+        self._lock = Lock()
+        self._executor = ThreadPoolExecutor(workers)
+
+    def subscribe(self, system: System, loc_keys: list):
+        """Replaces localization keys, which the system is subscribed to. New locations are refreshed
+        in the next tick, and system is regenerated at once, if new location already has window."""
+
+        with self._lock:
+            previous_keys = self._systems[system.filename][1] if system.filename in self._systems else []
+            self._systems[system.filename] = (system, list(loc_keys))
+
+            for loc_key in set(previous_keys) - set(loc_keys):
+                job = self._jobs[loc_key]
+                job.subscribers.discard(system.filename)
+
+                if not job.subscribers:
+                    del self._jobs[loc_key]
+
+            for loc_key in loc_keys:
+                job = self._jobs.get(loc_key)
+
+                if job is None:
+                    job = self._jobs[loc_key] = LocationJob(loc_key, self._get_update_period(system),
+                                                            next_run=self.clock())
+                elif loc_key not in previous_keys and job.window is not None:
+                    self._updated.add(system.filename)
+
+                job.subscribers.add(system.filename)
+
+            for loc_key in set(previous_keys) | set(loc_keys):
+                if loc_key in self._jobs:
+                    self._update_period(self._jobs[loc_key])
+
+    def run_due(self, now: datetime = None) -> list:
+        """Refreshes all due locations at the same time now, and returns (system, windows) pairs of systems,
+        which should be regenerated. Windows contain all subscribed locations of the system."""
+
+        clock_now = self.clock()
+        now = now or datetime.now(timezone.utc)
+
+        with self._lock:
+            due = [job for job in self._jobs.values() if job.next_run <= clock_now]
+
+        windows = list(self._executor.map(lambda job: self._refresh(job, now), due))
+
+        with self._lock:
+            for job, window in zip(due, windows):
+                job.refreshes += 1
+                job.next_run += job.period
+
+                if job.next_run <= clock_now:
+                    job.next_run = clock_now + job.period
+
+                if window is None:
+                    job.failures += 1
+                elif window != job.window:
+                    job.window = window
+                    job.updates += 1
+                    self._updated |= job.subscribers
+
+            updates = [(system, {loc_key: self._jobs[loc_key].window for loc_key in loc_keys})
+                       for system, loc_keys in (self._systems[filename] for filename in sorted(self._updated))]
+            self._updated = set()
+            self.regenerations += len(updates)
+
+        return updates
+
+    def map(self, function, items: list) -> list:
+        """Runs function for all items on workers of the scheduler, for example resolving localizations
+        of new systems or regenerating updated ones."""
+
+        return list(self._executor.map(function, items))
+
+    def retry(self, system: System):
+        """System, which was not regenerated (for example its cycle was shed), is regenerated in the next tick."""
+
+        with self._lock:
+            if system.filename in self._systems:
+                self._updated.add(system.filename)
+
+    def get_next_run(self) -> float:
+        """Returns clock time of the earliest due location, or None without any location."""
+
+        with self._lock:
+            return min((job.next_run for job in self._jobs.values()), default=None)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            jobs = list(self._jobs.values())
+
+            return dict(locations=len(jobs),
+                        systems=len(self._systems),
+                        subscriptions=sum(len(job.subscribers) for job in jobs),
+                        refreshes=sum(job.refreshes for job in jobs),
+                        updates=sum(job.updates for job in jobs),
+                        failures=sum(job.failures for job in jobs),
+                        regenerations=self.regenerations,
+                        forecast_calls=self.forecast_store.get_call_count())
+
+    def stop(self):
+        self._executor.shutdown()
+
+    def _refresh(self, job: LocationJob, now: datetime) -> list:
+        with tracer.span('refresh_location', loc_key=job.loc_key, subscribers=len(job.subscribers)):
+            try:
+                return self.forecast_store.get_data(self.api_key, job.loc_key, now)
+            except Exception:
+                logging.exception(f"Refresh failed for localization: {job.loc_key}")
+
+    def _update_period(self, job: LocationJob):
+        period = min(self._get_update_period(self._systems[filename][0]) for filename in job.subscribers)
+
+        if period < job.period:
+            job.next_run = min(job.next_run, self.clock() + period)
+
+        job.period = period
+
+    def _get_update_period(self, system: System) -> int:
+        return system.update_period or self.default_period
@@ -0,0 +1,389 @@
+import logging
+
+from converters.delta_formatter import DeltaOutputDataFormatter
+from converters.field_extractors import get_field_extractors
+from converters.output_template import OutputTemplates
+from converters.solar_daylight import LocalDaylightDataclassConverter
+
+from weather_requests.api_key_pool import ApiKeyPool
+from weather_requests.cassette import Cassette
+from weather_requests.concurrency_limiter import AdaptiveConcurrencyLimiter
+from weather_requests.providers import FORECAST_PROVIDERS, HedgedForecastProvider
+from weather_requests.request import DEFAULT_ACCUWEATHER_HOST, HOURLY_FORECASTS_REQUESTS, Request, RequestCreator
+
+from common.batch_runner import BatchRunner
+from common.capacity_planner import CapacityPlanner
+from common.forecast_archive import ForecastArchive
+from common.forecast_notifier import ForecastNotifier
+from common.forecast_store import ForecastStore
+from common.forecasts_managers import LocalDaylightManagerCreator, MultiSequenceManagerCreator
+from common.fragment_output import FragmentOutputWriter
+from common.location_resolver import LocationResolver
+from common.location_scheduler import LocationScheduler
+from common.overload_controller import OverloadController
+from common.pipeline import Pipeline, PipelineStage, format_cycle, serialize_cycle
+from common.read_api import ForecastReadApi
+from common.refresh_planner import RefreshPlanner
+from common.shared_forecast_table import SharedForecastTable
+from common.state_snapshot import StateSnapshot
+from common.system_manifest import SystemManifest
+from common.tracing import tracer
+from common.write_behind import WriteBehindQueue
+
+
+class ModuleComponentsCreator:
+
+    """
+    Creates components of the module from settings. Each optional component is created only when its element
+    is present in settings, otherwise its getter returns None. Output sinks are not created in dry run,
+    and services (socket or port for other processes) only in continous mode.
+
+    settings - dictionary of settings elements,
+    output_path - default folder of files written by components,
+    mode - 'single_time', 'continous' or 'dry_run'.
+    """
+
+    def __init__(self, settings: dict, output_path: str, mode: str):
+        self.settings = settings
+        self.output_path = output_path
+        self.mode = mode
+
+    def configure_tracing(self):
+        """If tracing is configured, each cycle is written as trace with nested spans to JSON lines file."""
+
+        if 'tracing' in self.settings:
+            tracing_settings = self.settings['tracing'] or {}
+            tracer.configure(tracing_settings.get('path', f"{self.output_path}/traces.jsonl"),
+                             int(tracing_settings.get('max_size', 100 * 1024 * 1024)),
+                             int(tracing_settings.get('backup_count', 3)))
+
+    def configure_requests(self, key_pool: ApiKeyPool, concurrency_limiter: AdaptiveConcurrencyLimiter,
+                           cassette: Cassette):
+        """Key pool, concurrency limiter and cassette are shared by all requests in the process.
+        AccuWeather host can be changed in settings, for example to local stub server."""
+
+        accuweather_settings = self.settings.get('accuweather') or {}
+
+        Request.key_pool = key_pool
+        Request.concurrency_limiter = concurrency_limiter
+        Request.cassette = cassette
+        RequestCreator.host = accuweather_settings.get('host', DEFAULT_ACCUWEATHER_HOST)
+
+    @staticmethod
+    def reset_shared_state():
+        """Shared request state and tracer are reset when module stops, so next module in the same process
+        starts clean."""
+
+        Request.key_pool = None
+        Request.concurrency_limiter = None
+        Request.cassette = None
+        RequestCreator.host = DEFAULT_ACCUWEATHER_HOST
+        tracer.configure(None)
+
+    def get_api_key_pool(self, api_keys: list) -> ApiKeyPool:
+        pool_settings = self.settings.get('api_key_pool') or {}
+        quota_period = int(pool_settings.get('quota_period', 86400))
+
+        logging.info(f"Using {len(api_keys)} API keys")
+
+        return ApiKeyPool(api_keys, quota_period)
+
+    def get_concurrency_limiter(self) -> AdaptiveConcurrencyLimiter:
+        if 'concurrency_limiter' not in self.settings:
+            return None
+
+        limiter_settings = self.settings['concurrency_limiter'] or {}
+
+        return AdaptiveConcurrencyLimiter(int(limiter_settings.get('initial_limit', 4)),
+                                          int(limiter_settings.get('min_limit', 1)),
+                                          int(limiter_settings.get('max_limit', 64)),
+                                          float(limiter_settings.get('latency_tolerance', 2.0)))
+
+    def get_cassette(self) -> Cassette:
+        if 'cassette' not in self.settings:
+            return None
+
+        cassette_settings = self.settings['cassette'] or {}
+        mode = cassette_settings.get('mode', 'replay')
+
+        if mode not in ('record', 'replay'):
+            logging.error(f"Invalid cassette mode: {mode}, valid modes: ['record', 'replay']. Cassette is not used.")
+            return None
+
+        return Cassette(cassette_settings.get('path', f"{self.output_path}/.requests.cassette"), mode,
+                        float(cassette_settings.get('speed', 1.0)))
+
+    def get_sequence_types(self) -> list:
+        sequences_settings = self.settings.get('sequences') or {}
+        return sequences_settings.get('types', 'temperature day_light').split()
+
+    def get_forecasts_managers(self, api_key: str, forecast_store: ForecastStore, location_resolver: LocationResolver,
+                               sequence_types: list) -> list:
+        """By default single multi sequence manager extracts all sequence types from one forecast response.
+        If local daylight is configured, 'day_light' sequence is computed by separate manager, without API calls."""
+
+        sequence_types = list(sequence_types)
+        forecasts_managers = []
+        local_daylight_manager = self._get_local_daylight_manager(api_key, sequence_types)
+
+        if local_daylight_manager is not None:
+            sequence_types.remove('day_light')
+
+        if sequence_types != []:
+            forecasts_managers.append(MultiSequenceManagerCreator(api_key, forecast_store,
+                                                                  location_resolver, sequence_types))
+
+        if local_daylight_manager is not None:
+            forecasts_managers.append(local_daylight_manager)
+
+        return forecasts_managers
+
+    def _get_local_daylight_manager(self, api_key: str, sequence_types: list) -> LocalDaylightManagerCreator:
+        sequences_settings = self.settings.get('sequences') or {}
+
+        if 'day_light' not in sequence_types or sequences_settings.get('daylight', 'api') != 'local':
+            return None
+
+        if not LocalDaylightDataclassConverter.is_available():
+            logging.error("Local daylight needs numpy package, daylight is taken from API.")
+            return None
+
+        store_settings = self.settings.get('forecast_store') or {}
+
+        return LocalDaylightManagerCreator(api_key, hours=int(store_settings.get('window_hours', 12)),
+                                           timezone_name=sequences_settings.get('timezone', 'UTC'))
+
+    def get_forecast_store(self, sequence_types: list, forecast_provider: HedgedForecastProvider) -> ForecastStore:
+        store_settings = self.settings.get('forecast_store') or {}
+
+        horizon = int(store_settings.get('horizon', 12))
+        window_hours = int(store_settings.get('window_hours', 12))
+        min_remaining_hours = int(store_settings.get('min_remaining_hours', window_hours))
+        max_age = int(store_settings.get('max_age', 3600))
+
+        if horizon not in HOURLY_FORECASTS_REQUESTS:
+            logging.error(
+                f"Invalid forecast horizon: {horizon}, valid horizons: {list(HOURLY_FORECASTS_REQUESTS)}. Using 12 hours.")
+            horizon = 12
+
+        details = any(extractor.requires_details for extractor in get_field_extractors(sequence_types))
+
+        return ForecastStore(HOURLY_FORECASTS_REQUESTS[horizon], window_hours, min_remaining_hours, max_age,
+                             self._get_refresh_planner(), details, forecast_provider)
+
+    def get_forecast_provider(self, cassette: Cassette, location_resolver: LocationResolver) -> HedgedForecastProvider:
+        """Forecasts are requested from the first provider, and the next ones are raced against it,
+        when it does not answer in time."""
+
+        if 'providers' not in self.settings:
+            return None
+
+        provider_settings = self.settings['providers'] or {}
+        providers = []
+
+        for name in provider_settings.get('names', 'accuweather open_meteo').split():
+            if name in FORECAST_PROVIDERS:
+                providers.append(FORECAST_PROVIDERS[name](cassette))
+            else:
+                logging.error(f"Unknown forecast provider: {name}, valid providers: {list(FORECAST_PROVIDERS)}")
+
+        if providers == []:
+            return None
+
+        return HedgedForecastProvider(providers, location_resolver,
+                                      float(provider_settings.get('hedge_delay', 1.0)),
+                                      float(provider_settings.get('timeout', 30)),
+                                      int(provider_settings.get('workers', 16)))
+
+    def _get_refresh_planner(self) -> RefreshPlanner:
+        """Refresh planner is used only when it is configured in settings,
+        otherwise forecasts are refreshed after max_age of forecast store."""
+
+        if 'refresh_planner' not in self.settings:
+            return None
+
+        planner_settings = self.settings['refresh_planner'] or {}
+
+        return RefreshPlanner(int(planner_settings.get('publish_period', 3600)),
+                              int(planner_settings.get('min_publish_period', 900)),
+                              int(planner_settings.get('max_publish_period', 21600)),
+                              int(planner_settings.get('lead_time', 60)))
+
+    def get_delta_formatter(self) -> DeltaOutputDataFormatter:
+        """In delta output mode only changed sequences are saved, with full snapshot every snapshot_every cycles."""
+
+        output_settings = self.settings.get('output') or {}
+
+        if output_settings.get('mode', 'full') == 'delta':
+            return DeltaOutputDataFormatter(int(output_settings.get('snapshot_every', 10)))
+
+    def get_pipeline(self, resolve_cycle, fetch_cycle, write_cycle) -> Pipeline:
+        """Each cycle is split to stages with own worker pools connected by bounded queues, so I/O and CPU work
+        of different systems overlap. Resolve, fetch and write stages are functions of the module."""
+
+        if 'pipeline' not in self.settings or self.mode == 'dry_run':
+            return None
+
+        pipeline_settings = self.settings['pipeline'] or {}
+        queue_size = int(pipeline_settings.get('queue_size', 16))
+        processes = pipeline_settings.get('processes', 'true') == 'true'
+
+        return Pipeline([
+            PipelineStage('resolve', resolve_cycle, int(pipeline_settings.get('resolve_workers', 4)),
+                          queue_size=queue_size),
+            PipelineStage('fetch', fetch_cycle, int(pipeline_settings.get('fetch_workers', 8)),
+                          queue_size=queue_size),
+            PipelineStage('format', format_cycle, int(pipeline_settings.get('format_workers', 2)), processes,
+                          queue_size),
+            PipelineStage('serialize', serialize_cycle, int(pipeline_settings.get('serialize_workers', 2)),
+                          processes, queue_size),
+            PipelineStage('write', write_cycle, int(pipeline_settings.get('write_workers', 2)),
+                          queue_size=queue_size)]).start()
+
+    def get_location_scheduler(self, forecast_store: ForecastStore, api_key: str,
+                               forecasts_managers: list) -> LocationScheduler:
+        """Location scheduling is used only in continous mode, when forecasts are requested for localizations."""
+
+        if 'location_scheduling' not in self.settings or self.mode != 'continous':
+            return None
+
+        if not any(isinstance(manager, MultiSequenceManagerCreator) for manager in forecasts_managers):
+            logging.error("Location scheduling needs forecast sequences requested from API, systems are scheduled.")
+            return None
+
+        scheduling_settings = self.settings['location_scheduling'] or {}
+
+        return LocationScheduler(forecast_store, api_key,
+                                 int(scheduling_settings.get('default_period', 60)),
+                                 int(scheduling_settings.get('workers', 8)))
+
+    def get_batch_runner(self, location_resolver: LocationResolver, forecast_store: ForecastStore,
+                         api_key: str) -> BatchRunner:
+        if 'batch' not in self.settings or self.mode != 'single_time':
+            return None
+
+        batch_settings = self.settings['batch'] or {}
+
+        return BatchRunner(location_resolver, forecast_store, api_key, int(batch_settings.get('workers', 16)))
+
+    def get_overload_controller(self) -> OverloadController:
+        """Overload control admits cycles of continous mode, with system or location scheduling."""
+
+        if 'overload_control' not in self.settings or self.mode != 'continous':
+            return None
+
+        overload_settings = self.settings['overload_control'] or {}
+
+        return OverloadController(int(overload_settings.get('max_cycles', 16)),
+                                  int(overload_settings.get('critical_priority', 2)),
+                                  float(overload_settings.get('defer_delay', 1.0)))
+
+    def get_capacity_planner(self, systems: list, location_resolver: LocationResolver, forecast_store: ForecastStore,
+                             api_keys: list, sequence_types: list, forecasts_managers: list) -> CapacityPlanner:
+        planner_settings = self.settings.get('capacity_planner') or {}
+
+        return CapacityPlanner(
+            systems, location_resolver, forecast_store, api_keys, sequence_types,
+            float(planner_settings.get('request_latency', 0.5)),
+            any(isinstance(manager, MultiSequenceManagerCreator) for manager in forecasts_managers))
+
+    def get_fragment_writer(self) -> FragmentOutputWriter:
+        output_settings = self.settings.get('output') or {}
+
+        if output_settings.get('layout', 'files') == 'fragments' and self._is_output_sink_enabled('output'):
+            return FragmentOutputWriter(self.output_path, int(output_settings.get('fragments_retention', 3600)))
+
+    def get_output_templates(self) -> OutputTemplates:
+        output_settings = self.settings.get('output') or {}
+
+        if output_settings.get('templates', 'false') == 'true' and self._is_output_sink_enabled('output'):
+            return OutputTemplates()
+
+    def _is_output_sink_enabled(self, name: str) -> bool:
+        return name in self.settings and self.mode != 'dry_run'
+
+    def _is_service_enabled(self, name: str) -> bool:
+        """Services run only in continous mode, single time run would bind them only to exit after the run."""
+
+        return name in self.settings and self.mode == 'continous'
+
+    def get_write_queue(self) -> WriteBehindQueue:
+        if not self._is_output_sink_enabled('write_behind'):
+            return None
+
+        write_settings = self.settings['write_behind'] or {}
+
+        return WriteBehindQueue(int(write_settings.get('writers', 2)),
+                                int(write_settings.get('max_pending', 1000)),
+                                int(write_settings.get('batch_size', 16)),
+                                write_settings.get('fsync', 'false') == 'true')
+
+    def get_forecast_notifier(self) -> ForecastNotifier:
+        if not self._is_service_enabled('notifier'):
+            return None
+
+        notifier_settings = self.settings['notifier'] or {}
+
+        return ForecastNotifier(notifier_settings.get('socket_path', f"{self.output_path}/.forecasts.sock"),
+                                int(notifier_settings.get('queue_size', 100))).start()
+
+    def get_forecast_archive(self) -> ForecastArchive:
+        if not self._is_output_sink_enabled('archive'):
+            return None
+
+        archive_settings = self.settings['archive'] or {}
+
+        return ForecastArchive(archive_settings.get('path', f"{self.output_path}/archive"),
+                               archive_settings.get('partition', 'day'),
+                               archive_settings.get('compression', 'gzip'),
+                               int(archive_settings.get('retention_days', 30)),
+                               int(archive_settings.get('batch_size', 32)),
+                               float(archive_settings.get('flush_interval', 60)))
+
+    def get_read_api(self) -> ForecastReadApi:
+        if not self._is_service_enabled('read_api'):
+            return None
+
+        read_api_settings = self.settings['read_api'] or {}
+
+        return ForecastReadApi(read_api_settings.get('host', '127.0.0.1'),
+                               int(read_api_settings.get('port', 8080))).start()
+
+    def get_shared_forecast_table(self) -> SharedForecastTable:
+        if not self._is_output_sink_enabled('shared_table'):
+            return None
+
+        table_settings = self.settings['shared_table'] or {}
+        store_settings = self.settings.get('forecast_store') or {}
+
+        return SharedForecastTable(table_settings.get('path', f"{self.output_path}/.forecast_table"),
+                                   int(table_settings.get('capacity', 1024)),
+                                   int(store_settings.get('window_hours', 12)))
+
+    def get_system_manifest(self) -> SystemManifest:
+        """With warm restart, systems and localization keys are loaded from compiled manifest."""
+
+        if 'warm_restart' not in self.settings:
+            return None
+
+        manifest_path = self.get_warm_restart_setting(
+            'manifest_path', f"{self.output_path}/.systems_manifest.json")
+
+        return SystemManifest(manifest_path).load()
+
+    def get_state_snapshot(self, forecast_store: ForecastStore) -> StateSnapshot:
+        """With warm restart, last forecasts are restored to forecast store from state snapshot."""
+
+        if 'warm_restart' not in self.settings:
+            return None
+
+        snapshot_path = self.get_warm_restart_setting(
+            'snapshot_path', f"{self.output_path}/.state_snapshot.json")
+        state_snapshot = StateSnapshot(snapshot_path).load()
+        state_snapshot.restore_forecast_store(forecast_store)
+
+        return state_snapshot
+
+    def get_warm_restart_setting(self, key: str, default):
+        warm_restart_settings = self.settings.get('warm_restart') or {}
+        return warm_restart_settings.get(key, default)
@@ -0,0 +1,121 @@
+import time
+from dataclasses import asdict, dataclass
+from threading import Lock
+
+from converters.dataclasses_converters import System
+
+RUN = 'run'
+DEFER = 'defer'
+SHED = 'shed'
+
+
+@dataclass
+class PriorityStats:
+    """Counts of cycles of systems with the same priority.
+
+    deferred - cycles which waited for admission,
+    shed - cycles dropped, because they could not be saved before deadline,
+    skipped - cycles not started, because previous cycle of the system was still running,
+    missed_deadlines - cycles saved after deadline.
+    """
+
+    cycles: int = 0
+    deferred: int = 0
+    shed: int = 0
+    skipped: int = 0
+    missed_deadlines: int = 0
+
+
+class OverloadController:
+
+    """
+    Admission control of continous mode cycles. Each priority below critical_priority can use only its share
+    of max_cycles running at the same time: (priority + 1) / critical_priority of it, so the lowest priorities
+    are deferred first. The share is reduced also by recent part of cycles, which missed deadline, but at least
+    one cycle can always run, so miss rate recovers. Deferred cycle is shed, when it cannot be saved before
+    its deadline anymore, estimated with mean cycle time. Cycles of critical priority are never deferred or shed.
+
+    max_cycles - count of cycles running at the same time, which is full capacity,
+    critical_priority - the lowest priority, which is never deferred or shed,
+    defer_delay - seconds between admission attempts of deferred cycle,
+    smoothing - weight of the last cycle in moving averages of cycle time and deadline misses.
+    """
+
+    default_priority = 1
+
+    def __init__(self, max_cycles: int = 16, critical_priority: int = 2, defer_delay: float = 1.0,
+                 smoothing: float = 0.1, clock=time.monotonic):
+        self.max_cycles = max_cycles
+        self.critical_priority = critical_priority
+        self.defer_delay = defer_delay
+        self.smoothing = smoothing
+        self.clock = clock
+        self.in_flight = 0
+        self.miss_rate = 0.0
+        self.cycle_time = 0.0
+        self.stats = {}
+        self._lock = Lock()
+
+    def admit(self, system: System, deadline_at: float, deferred: bool = False) -> str:
+        """Returns RUN, DEFER or SHED decision for cycle of the system, which should be saved before
+        deadline_at (clock time). Deferred should be True for next attempts of already deferred cycle.
+        After RUN decision complete must be called."""
+
+        priority = self.get_priority(system)
+
+        with self._lock:
+            stats = self._get_stats(priority)
+
+            if priority >= self.critical_priority or not self._is_overloaded(priority):
+                self.in_flight += 1
+                return RUN
+
+            if self.clock() + self.cycle_time > deadline_at:
+                stats.shed += 1
+                return SHED
+
+            if not deferred:
+                stats.deferred += 1
+
+            return DEFER
+
+    def complete(self, system: System, cycle_time: float, deadline_at: float):
+        missed = self.clock() > deadline_at
+
+        with self._lock:
+            stats = self._get_stats(self.get_priority(system))
+            stats.cycles += 1
+            stats.missed_deadlines += missed
+            self.in_flight -= 1
+            self.miss_rate += self.smoothing * (missed - self.miss_rate)
+            self.cycle_time += self.smoothing * (cycle_time - self.cycle_time)
+
+    def skip(self, system: System, count: int = 1):
+        with self._lock:
+            self._get_stats(self.get_priority(system)).skipped += count
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            totals = PriorityStats()
+            for stats in self.stats.values():
+                for key, value in asdict(stats).items():
+                    setattr(totals, key, getattr(totals, key) + value)
+
+            return dict(asdict(totals),
+                        in_flight=self.in_flight,
+                        miss_rate=round(self.miss_rate, 3),
+                        cycle_time=round(self.cycle_time, 3),
+                        priorities={priority: asdict(stats) for priority, stats in sorted(self.stats.items())})
+
+    def get_priority(self, system: System) -> int:
+        return system.priority if system.priority is not None else self.default_priority
+
+    def _is_overloaded(self, priority: int) -> bool:
+        share = max(priority + 1, 1) / self.critical_priority
+        return self.in_flight >= max(1.0, self.max_cycles * share * (1 - self.miss_rate))
+
+    def _get_stats(self, priority: int) -> PriorityStats:
+        if priority not in self.stats:
+            self.stats[priority] = PriorityStats()
+
+        return self.stats[priority]
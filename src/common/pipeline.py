@@ -0,0 +1,191 @@
+import multiprocessing
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from queue import Queue
+from threading import Lock, Thread
+
+from converters.dataclasses_converters import System
+from converters.output_data_formatter import FinalOutputDataFormatter
+from converters.xml_formatter import DictToXmlConverter
+
+from common.tracing import tracer
+
+
+@dataclass
+class PipelineStage:
+    """Single stage of the pipeline.
+
+    function - called with item, should return item for the next stage, or None to finish the item early,
+    workers - count of worker threads, or processes if processes is True,
+    processes - True for CPU stages, function is then called in process pool, so it and items should be picklable,
+    queue_size - count of items waiting for the stage, above which previous stage blocks.
+    """
+
+    name: str
+    function: object
+    workers: int = 1
+    processes: bool = False
+    queue_size: int = 16
+
+
+@dataclass
+class StageStats:
+    processed: int = 0
+    errors: int = 0
+    busy_time: float = 0
+
+
+class Pipeline:
+
+    """
+    Stages connected by bounded queues. Each stage has its own pool of workers, so I/O and CPU stages of different
+    items run at the same time, and throughput is limited by the slowest stage, not by the sum of all stages.
+    When queue of a stage is full, previous stage waits (backpressure), up to submit of the first stage.
+    Spans opened in stages are nested in the span, which was current when item was submitted.
+
+    Process pools are started with 'spawn', so they do not copy locks held by threads of the module.
+    """
+
+    def __init__(self, stages: list, clock=time.monotonic):
+        self.stages = stages
+        self.clock = clock
+        self.started_at = None
+        self.stats = {stage.name: StageStats() for stage in stages}
+        self._queues = [Queue(stage.queue_size) for stage in stages]
+        self._threads = []
+        self._executors = {}
+        self._lock = Lock()
+
+    @property
+    def capacity(self) -> int:
+        """Count of items, which can be in the pipeline at the same time."""
+
+        return sum(stage.workers + stage.queue_size for stage in self.stages)
+
+    def start(self) -> 'Pipeline':
+        self.started_at = self.clock()
+
+        for index, stage in enumerate(self.stages):
+            if stage.processes:
+                self._executors[stage.name] = ProcessPoolExecutor(stage.workers,
+                                                                  mp_context=multiprocessing.get_context('spawn'))
+
+            for _ in range(stage.workers):
+                thread = Thread(target=self._work, args=(index,), daemon=True)
+                thread.start()
+                self._threads.append((index, thread))
+
+        return self
+
+    def submit(self, item) -> Future:
+        """Returns future with item returned by the last stage. Blocks while the first stage queue is full."""
+
+        future = Future()
+        self._queues[0].put((future, item, tracer.get_context()))
+
+        return future
+
+    def stop(self):
+        """Finishes all submitted items, and stops workers stage by stage."""
+
+        for index, stage in enumerate(self.stages):
+            for _ in range(stage.workers):
+                self._queues[index].put(None)
+
+            for thread_index, thread in self._threads:
+                if thread_index == index:
+                    thread.join()
+
+            if stage.name in self._executors:
+                self._executors[stage.name].shutdown()
+
+    def get_stats(self) -> dict:
+        """Utilization of stage is part of time, in which its workers were busy."""
+
+        elapsed = max(self.clock() - self.started_at, 1e-9) if self.started_at is not None else None
+
+        with self._lock:
+            return {stage.name: dict(workers=stage.workers,
+                                     processes=stage.processes,
+                                     processed=stats.processed,
+                                     errors=stats.errors,
+                                     queue_depth=queue.qsize(),
+                                     mean_time=round(stats.busy_time / stats.processed, 4) if stats.processed else None,
+                                     utilization=round(stats.busy_time / (elapsed * stage.workers), 3)
+                                     if elapsed else None)
+                    for stage, stats, queue in zip(self.stages, self.stats.values(), self._queues)}
+
+    def _work(self, index: int):
+        stage = self.stages[index]
+        stats = self.stats[stage.name]
+
+        while True:
+            entry = self._queues[index].get()
+            if entry is None:
+                return
+
+            future, item, context = entry
+            start = self.clock()
+
+            try:
+                with tracer.use_context(context), tracer.span(stage.name):
+                    result = self._run(stage, item)
+            except Exception as error:
+                with self._lock:
+                    stats.errors += 1
+                future.set_exception(error)
+                continue
+            finally:
+                with self._lock:
+                    stats.processed += 1
+                    stats.busy_time += self.clock() - start
+
+            if result is None or index == len(self.stages) - 1:
+                future.set_result(result)
+            else:
+                self._queues[index + 1].put((future, result, context))
+
+    def _run(self, stage: PipelineStage, item):
+        if stage.processes:
+            return self._executors[stage.name].submit(stage.function, item).result()
+
+        return stage.function(item)
+
+
+@dataclass
+class SystemCycle:
+    """Single cycle of the system passing through refresh pipeline.
+
+    component_sets - components grouped by localization, one list for each forecast manager,
+    format_tasks - fetched forecasts with their conversion, one task for each forecast manager,
+    serialize - False if output is not saved as whole XML file (delta or fragment output), so it is not serialized,
+    data, xml_data - output dictionary and its XML.
+    """
+
+    system: System
+    serialize: bool = True
+    component_sets: list = None
+    format_tasks: list = field(default=None, repr=False)
+    data: dict = None
+    xml_data: str = None
+
+
+def format_cycle(cycle: SystemCycle) -> SystemCycle:
+    """Converts and formats fetched forecasts of all managers to output dictionary. Fetched forecasts
+    are dropped, so they are not sent back from process pool."""
+
+    forecast_data = [data for data in (task.run() for task in cycle.format_tasks) if data is not None]
+    cycle.format_tasks = None
+
+    if forecast_data != []:
+        cycle.data = FinalOutputDataFormatter().get_formatted_data(cycle.system, forecast_data)
+
+    return cycle
+
+
+def serialize_cycle(cycle: SystemCycle) -> SystemCycle:
+    if cycle.serialize and cycle.data is not None:
+        cycle.xml_data = DictToXmlConverter().get_xml_string_from_dictionary(cycle.data)
+
+    return cycle
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from converters.dataclasses_converters import System
+from converters.xml_formatter import DictToXmlConverter
+
+
+@dataclass
+class SerializedResponse:
+    """Response body serialized once, when forecast is updated, and served to all readers."""
+
+    content: bytes
+    content_type: str
+    etag: str
+
+    @classmethod
+    def create(cls, content: str, content_type: str) -> 'SerializedResponse':
+        content = content.encode()
+        return cls(content, content_type, f'"{hashlib.sha1(content).hexdigest()}"')
+
+
+class ForecastReadApi(ThreadingHTTPServer):
+
+    """
+    Local HTTP server, which serves the latest forecast of each system and component from memory,
+    so readers do not need to open and parse output files.
+    XML and JSON responses are serialized once when forecast is updated, readers get them with ETag header,
+    and If-None-Match request header with the same ETag is answered with 304 Not Modified.
+
+    GET /systems - list of system UUIDs,
+    GET /systems/<UUID> - latest forecast of the system,
+    GET /components/<UID> - latest forecast of single component.
+    Format is XML by default, JSON with '.json' suffix, '?format=json' or 'Accept: application/json' header.
+    """
+
+    daemon_threads = True
+    formats = ('xml', 'json')
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8080):
+        super().__init__((host, port), ForecastReadApiHandler)
+        self.systems = {}
+        self.components = {}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def start(self) -> 'ForecastReadApi':
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        logging.info(f"Serving latest forecasts on: {self.url}")
+
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def update(self, system: System, data: dict, xml_data: str = None):
+        """Replaces the latest forecast of the system and its components. XML already saved to output file
+        can be provided, so it is not serialized again."""
+
+        if data is None:
+            return
+
+        system_responses = self._get_responses(data, xml_data)
+        component_responses = {}
+
+        for component in self._as_list(data['system']['component']):
+            component_responses[component['@UID']] = self._get_responses({'component': component})
+
+        with self._lock:
+            self.systems[system.uuid] = system_responses
+            self.components.update(component_responses)
+
+    def get_response(self, kind: str, key: str, response_format: str) -> SerializedResponse:
+        with self._lock:
+            responses = (self.systems if kind == 'systems' else self.components).get(key)
+
+        if responses is not None:
+            return responses[response_format]
+
+    def get_system_list(self) -> list:
+        with self._lock:
+            return list(self.systems)
+
+    def _get_responses(self, data: dict, xml_data: str = None) -> dict:
+        if xml_data is None:
+            xml_data = DictToXmlConverter().get_xml_string_from_dictionary(data)
+
+        return dict(xml=SerializedResponse.create(xml_data, 'application/xml'),
+                    json=SerializedResponse.create(json.dumps(self._strip_attribute_prefix(data)), 'application/json'))
+
+    @classmethod
+    def _strip_attribute_prefix(cls, data):
+        if isinstance(data, dict):
+            return {key.lstrip('@'): cls._strip_attribute_prefix(value) for key, value in data.items()}
+        elif isinstance(data, list):
+            return [cls._strip_attribute_prefix(item) for item in data]
+
+        return data
+
+    @staticmethod
+    def _as_list(value) -> list:
+        if value is None:
+            return []
+        elif isinstance(value, list):
+            return value
+
+        return [value]
+
+
+class ForecastReadApiHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = url.path.strip('/').split('/')
+        response_format = self._get_format(url, parts)
+
+        if parts == ['systems']:
+            content = json.dumps(self.server.get_system_list()).encode()
+            return self._send(200, content, 'application/json')
+
+        if len(parts) != 2 or parts[0] not in ('systems', 'components'):
+            return self._send(404, b'Not found', 'text/plain')
+
+        response = self.server.get_response(parts[0], parts[1], response_format)
+
+        if response is None:
+            return self._send(404, b'Not found', 'text/plain')
+
+        if self.headers.get('If-None-Match') == response.etag:
+            return self._send(304, b'', response.content_type, response.etag)
+
+        self._send(200, response.content, response.content_type, response.etag)
+
+    def _get_format(self, url, parts: list) -> str:
+        if parts[-1].endswith('.json') or parts[-1].endswith('.xml'):
+            parts[-1], response_format = parts[-1].rsplit('.', 1)
+            return response_format
+
+        response_format = parse_qs(url.query).get('format', [None])[0]
+        if response_format in ForecastReadApi.formats:
+            return response_format
+
+        return 'json' if 'application/json' in self.headers.get('Accept', '') else 'xml'
+
+    def _send(self, status_code: int, content: bytes, content_type: str, etag: str = None):
+        self.send_response(status_code)
+        self.send_header('Content-Type', content_type)
+        if etag is not None:
+            self.send_header('ETag', etag)
+        if status_code != 304:
+            self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from threading import Lock
+
+
+@dataclass
+class LocationRefreshState:
+    """Refresh state of single localization forecast.
+
+    fetched_at - time of the last fetch,
+    changed_at - time of the last fetch, which returned changed upstream data,
+    publish_period - estimated count of seconds between two upstream forecast publications,
+    hour_hashes - hashes of hourly forecasts from the last fetch, by forecast date time.
+    """
+
+    loc_key: str
+    fetched_at: datetime
+    changed_at: datetime
+    publish_period: float
+    hour_hashes: dict = field(default_factory=dict)
+
+
+class RefreshPlanner:
+
+    """
+    Refresh planner which records when each localization forecast was fetched, and how often
+    upstream provider publishes new forecast for it. Publish period is estimated from the intervals
+    between fetches, which returned changed data for overlapping hours.
+    Localization is stale when next publication is expected within lead_time seconds.
+
+    default_publish_period - publish period used before the first change is observed,
+    min_publish_period, max_publish_period - limits for estimated publish period,
+    lead_time - count of seconds before expected publication, when localization is already stale,
+    smoothing - weight of the last observed interval in estimated publish period.
+    """
+
+    date_time_key = 'DateTime'
+
+    def __init__(self, default_publish_period: int = 3600, min_publish_period: int = 900,
+                 max_publish_period: int = 21600, lead_time: int = 60, smoothing: float = 0.5):
+        self.default_publish_period = default_publish_period
+        self.min_publish_period = min_publish_period
+        self.max_publish_period = max_publish_period
+        self.lead_time = lead_time
+        self.smoothing = smoothing
+        self._states = {}
+        self._lock = Lock()
+
+    def record(self, loc_key: str, data: list, fetched_at: datetime) -> LocationRefreshState:
+        """Records fetched forecast for localization and updates its publish period."""
+
+        hour_hashes = self._get_hour_hashes(data)
+
+        with self._lock:
+            state = self._states.get(loc_key)
+
+            if state is None:
+                state = LocationRefreshState(
+                    loc_key, fetched_at, fetched_at, self.default_publish_period, hour_hashes)
+            else:
+                if self._data_changed(state.hour_hashes, hour_hashes):
+                    interval = (fetched_at - state.changed_at).total_seconds()
+                    state.publish_period = self._get_estimated_publish_period(
+                        state.publish_period, interval)
+                    state.changed_at = fetched_at
+                    logging.debug(
+                        f"Forecast changed for localization: {loc_key}, publish period: {state.publish_period} sec.")
+
+                state.fetched_at = fetched_at
+                state.hour_hashes = hour_hashes
+
+            self._states[loc_key] = state
+
+            return state
+
+    def is_stale(self, loc_key: str, now: datetime) -> bool:
+        next_refresh_time = self.get_next_refresh_time(loc_key)
+
+        if next_refresh_time is None:
+            return True
+
+        return now >= next_refresh_time - timedelta(seconds=self.lead_time)
+
+    def select_stale(self, loc_keys: list, now: datetime) -> list:
+        """Returns only these localization keys, which data is stale or is about to be."""
+        return [loc_key for loc_key in loc_keys if self.is_stale(loc_key, now)]
+
+    def get_next_refresh_time(self, loc_key: str) -> datetime:
+        """Next publication is expected one publish period after the last observed change.
+        If it did not come yet, localization is checked again after minimal publish period."""
+
+        state = self._states.get(loc_key)
+
+        if state is not None:
+            expected_publication = state.changed_at + timedelta(seconds=state.publish_period)
+            next_check = state.fetched_at + timedelta(seconds=self.min_publish_period)
+
+            return max(expected_publication, next_check)
+
+    def get_state(self, loc_key: str) -> LocationRefreshState:
+        return self._states.get(loc_key)
+
+    def _get_estimated_publish_period(self, publish_period: float, interval: float) -> float:
+        estimated = (1 - self.smoothing) * publish_period + self.smoothing * interval
+
+        return min(max(estimated, self.min_publish_period), self.max_publish_period)
+
+    @staticmethod
+    def _data_changed(old_hashes: dict, new_hashes: dict) -> bool:
+        common_hours = old_hashes.keys() & new_hashes.keys()
+
+        if common_hours == set():
+            return True
+
+        return any(old_hashes[hour] != new_hashes[hour] for hour in common_hours)
+
+    def _get_hour_hashes(self, data: list) -> dict:
+        hour_hashes = {}
+
+        for forecast in data:
+            if isinstance(forecast, dict) and self.date_time_key in forecast:
+                content = json.dumps(forecast, sort_keys=True).encode()
+                hour_hashes[forecast[self.date_time_key]] = hashlib.sha1(content).hexdigest()
+
+        return hour_hashes
@@ -0,0 +1,292 @@
+import logging
+import math
+import mmap
+import os
+import struct
+import time
+from dataclasses import dataclass
+from threading import Lock
+
+from converters.dataclasses_converters import System
+
+
+@dataclass
+class SharedForecastRow:
+    """Consistent snapshot of single component row.
+
+    rel_times - forecast times as seconds of day,
+    temperature - temperature in Celsius degrees, NaN if missing,
+    daylight - True, False or None if missing,
+    version - even version counter of the row, increased by each update.
+    """
+
+    uid: str
+    base_time: str
+    rel_times: tuple
+    temperature: tuple
+    daylight: tuple
+    version: int
+
+
+class SharedForecastTableLayout:
+
+    """
+    Fixed layout of shared forecast table file. Header is followed by capacity rows of the same size.
+    Each row starts with version counter (seqlock): it is odd while the row is written, and even when
+    the row is consistent, so readers retry while it is odd or changed during read.
+    """
+
+    magic = b'FCST'
+    layout_version = 1
+    header = struct.Struct('<4sIIII')
+    version = struct.Struct('<Q')
+    uid_size = 64
+
+    def __init__(self, capacity: int, hours: int):
+        self.capacity = capacity
+        self.hours = hours
+        self.row = struct.Struct(f'<Q{self.uid_size}s32sI{hours}i{hours}f{hours}b')
+
+    @property
+    def size(self) -> int:
+        return self.header.size + self.capacity * self.row.size
+
+    def get_row_offset(self, index: int) -> int:
+        return self.header.size + index * self.row.size
+
+
+class SharedForecastTable:
+
+    """
+    Optional sink, which keeps the latest temperature and daylight sequences of each component in memory-mapped file
+    with fixed layout, so processes on the same host can read them without parsing XML files.
+    Rows are assigned to component UIDs in order of first update and updated in place in each cycle.
+    Use /dev/shm path to keep the table in memory only.
+    Existing table of the same layout is reused in place, so readers, which have it mapped, stay valid after
+    writer restart. Table of other layout is replaced by new file, and readers have to open it again.
+    Component UIDs longer than 64 bytes are not saved.
+
+    path - path of the table file,
+    capacity - maximal count of components,
+    hours - maximal count of hours of single sequence.
+    """
+
+    def __init__(self, path: str, capacity: int = 1024, hours: int = 12):
+        self.path = path
+        self.layout = SharedForecastTableLayout(capacity, hours)
+        self.rows = {}
+        self._lock = Lock()
+
+        if not self._has_layout(path):
+            self._create_file(path)
+
+        self.file = open(path, 'r+b')
+        self.table = mmap.mmap(self.file.fileno(), self.layout.size)
+        self._clear_rows()
+        self._write_header()
+
+    def _has_layout(self, path: str) -> bool:
+        try:
+            with open(path, 'rb') as file:
+                header = file.read(self.layout.header.size)
+                size = os.fstat(file.fileno()).st_size
+        except OSError:
+            return False
+
+        return size == self.layout.size and len(header) == self.layout.header.size and \
+            self.layout.header.unpack(header)[:4] == (self.layout.magic, self.layout.layout_version,
+                                                      self.layout.capacity, self.layout.hours)
+
+    def _create_file(self, path: str):
+        """New table is prepared in temporary file and moved to the path, so file mapped by readers
+        is never truncated."""
+
+        temporary_path = f"{path}.tmp"
+
+        with open(temporary_path, 'wb') as file:
+            file.truncate(self.layout.size)
+
+        os.replace(temporary_path, path)
+
+    def update(self, system: System, data: dict):
+        """Updates rows of all components of the system output data."""
+
+        if data is None:
+            return
+
+        components = data['system']['component']
+
+        with self._lock:
+            for component in components if isinstance(components, list) else [components]:
+                self._update_component(component)
+
+    def close(self):
+        self.table.close()
+        self.file.close()
+
+    def _update_component(self, component: dict):
+        index = self._get_row_index(component['@UID'])
+        if index is None:
+            return
+
+        sequences = component['model_parameters']['dynamic']['time_sequence']
+        sequences = {sequence['@sequence_type']: sequence
+                     for sequence in (sequences if isinstance(sequences, list) else [sequences])}
+        first_sequence = next(iter(sequences.values()))
+        rel_times = [self._get_seconds_of_day(value) for value in first_sequence['@rel_time'].split()][:self.layout.hours]
+        temperature = self._get_values(sequences.get('temperature'), len(rel_times), float, math.nan)
+        daylight = self._get_values(sequences.get('day_light'), len(rel_times), lambda value: int(value == 'True'), -1)
+        padding = self.layout.hours - len(rel_times)
+
+        offset = self.layout.get_row_offset(index)
+        version = self._get_even_version(offset)
+
+        self.layout.version.pack_into(self.table, offset, version + 1)
+        self.layout.row.pack_into(self.table, offset, version + 1,
+                                  component['@UID'].encode(), first_sequence['@base_time'].encode(), len(rel_times),
+                                  *(rel_times + [0] * padding),
+                                  *(temperature + [math.nan] * padding),
+                                  *(daylight + [-1] * padding))
+        self.layout.version.pack_into(self.table, offset, version + 2)
+
+        if index == self._get_rows_used():
+            self._write_header(index + 1)
+
+    def _clear_rows(self):
+        """Rows of reused table are cleared with increased version, so readers do not find stale forecasts
+        of components in rows, which were assigned by previous writer."""
+
+        empty_row = bytes(self.layout.row.size - self.layout.version.size)
+
+        for index in range(self._get_rows_used()):
+            offset = self.layout.get_row_offset(index)
+            version = self._get_even_version(offset)
+
+            self.layout.version.pack_into(self.table, offset, version + 1)
+            self.table[offset + self.layout.version.size:offset + self.layout.row.size] = empty_row
+            self.layout.version.pack_into(self.table, offset, version + 2)
+
+    def _get_even_version(self, offset: int) -> int:
+        """Version of the row is odd only if previous writer stopped during update, then it is rounded up."""
+
+        version = self.layout.version.unpack_from(self.table, offset)[0]
+        return version + version % 2
+
+    def _get_row_index(self, uid: str) -> int:
+        if uid not in self.rows:
+            if len(uid.encode()) > self.layout.uid_size:
+                logging.error(f"Component UID {uid} is longer than {self.layout.uid_size} bytes, "
+                              f"it is not saved to shared forecast table.")
+                return None
+
+            if len(self.rows) >= self.layout.capacity:
+                logging.error(f"Shared forecast table is full, component {uid} is not saved.")
+                return None
+
+            self.rows[uid] = len(self.rows)
+
+        return self.rows[uid]
+
+    def _get_rows_used(self) -> int:
+        return self.layout.header.unpack_from(self.table, 0)[4]
+
+    def _write_header(self, rows_used: int = 0):
+        """Count of used rows is increased after new row is written, so readers never see empty row."""
+
+        self.layout.header.pack_into(self.table, 0, self.layout.magic, self.layout.layout_version,
+                                     self.layout.capacity, self.layout.hours, rows_used)
+
+    @staticmethod
+    def _get_values(sequence: dict, count: int, convert, missing) -> list:
+        if sequence is None:
+            return [missing] * count
+
+        return [convert(value) for value in sequence['@data'].split()][:count]
+
+    @staticmethod
+    def _get_seconds_of_day(rel_time: str) -> int:
+        hours, minutes, seconds = rel_time.split(':')
+        return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+class SharedForecastTableReader:
+
+    """
+    Reader library of shared forecast table for other processes. Table is mapped read-only, and rows are read
+    with seqlock, so each returned row is consistent snapshot, even if it is updated at the same time.
+    Cached row index of each component is checked with UID of the read row, and whole index is read again
+    when it does not match, for example after writer restarted and assigned rows in different order.
+
+    reader = SharedForecastTableReader('/dev/shm/forecasts.table')
+    row = reader.read(component_uid)
+    """
+
+    def __init__(self, path: str, retry_delay: float = 0.0001):
+        self.retry_delay = retry_delay
+        self.file = open(path, 'rb')
+        self.table = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, layout_version, capacity, hours, _ = SharedForecastTableLayout.header.unpack_from(self.table, 0)
+
+        if magic != SharedForecastTableLayout.magic or layout_version != SharedForecastTableLayout.layout_version:
+            raise ValueError(f"Invalid shared forecast table: {path}")
+
+        self.layout = SharedForecastTableLayout(capacity, hours)
+        self.rows = {}
+
+    def read(self, uid: str) -> SharedForecastRow:
+        """Returns the latest snapshot of the component, or None if the component is not in the table."""
+
+        if uid in self.rows:
+            row = self._read_row(self.rows[uid])
+            if row.uid == uid:
+                return row
+
+        self._read_index(rebuild=uid in self.rows)
+
+        if uid in self.rows:
+            return self._read_row(self.rows[uid])
+
+    def read_all(self) -> list:
+        self._read_index()
+        rows = [self._read_row(index) for index in self.rows.values()]
+
+        if any(self.rows.get(row.uid) != index for row, index in zip(rows, self.rows.values())):
+            self._read_index(rebuild=True)
+            rows = [self._read_row(index) for index in self.rows.values()]
+
+        return rows
+
+    def close(self):
+        self.table.close()
+        self.file.close()
+
+    def _read_index(self, rebuild: bool = False):
+        rows_used = SharedForecastTableLayout.header.unpack_from(self.table, 0)[4]
+
+        if rebuild or rows_used < len(self.rows):
+            self.rows = {}
+
+        for index in range(len(self.rows), rows_used):
+            self.rows[self._read_row(index).uid] = index
+
+    def _read_row(self, index: int) -> SharedForecastRow:
+        offset = self.layout.get_row_offset(index)
+        hours = self.layout.hours
+
+        while True:
+            version = self.layout.version.unpack_from(self.table, offset)[0]
+
+            if version % 2 == 0:
+                values = self.layout.row.unpack_from(self.table, offset)
+                if self.layout.version.unpack_from(self.table, offset)[0] == version:
+                    break
+
+            time.sleep(self.retry_delay)
+
+        count = values[3]
+        rel_times = values[4:4 + count]
+        temperature = values[4 + hours:4 + hours + count]
+        daylight = tuple(None if value < 0 else bool(value) for value in values[4 + 2 * hours:4 + 2 * hours + count])
+
+        return SharedForecastRow(values[1].rstrip(b'\0').decode(), values[2].rstrip(b'\0').decode(),
+                                 rel_times, temperature, daylight, version)
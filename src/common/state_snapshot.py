@@ -0,0 +1,70 @@
+import json
+import logging
+import os
+from datetime import datetime
+from threading import Lock
+
+from common.forecast_store import ForecastStore
+
+
+class StateSnapshot:
+
+    """
+    Snapshot of module state, which allows warm restart: last forecasts from forecast store,
+    and schedule phases - time of the last saved forecast for each system file.
+    Snapshot is saved as single JSON file and replaced atomically.
+
+    snapshot_path - path of the snapshot JSON file.
+    """
+
+    version = 1
+
+    def __init__(self, snapshot_path: str):
+        self.snapshot_path = snapshot_path
+        self.forecasts = {}
+        self.schedule_phases = {}
+        self._lock = Lock()
+
+    def load(self) -> 'StateSnapshot':
+        if os.path.isfile(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, 'r') as file:
+                    snapshot = json.load(file)
+
+                if snapshot.get('version') == self.version:
+                    self.forecasts = snapshot.get('forecasts', {})
+                    self.schedule_phases = snapshot.get('schedule_phases', {})
+            except (OSError, ValueError) as error:
+                logging.error(f"Cannot load state snapshot {self.snapshot_path}: {error}")
+
+        return self
+
+    def save(self, forecast_store: ForecastStore, schedule_phases: dict):
+        with self._lock:
+            self.forecasts = self._get_forecasts_from_store(forecast_store)
+            self.schedule_phases = dict(schedule_phases)
+
+            snapshot = dict(version=self.version,
+                            forecasts=self.forecasts,
+                            schedule_phases=self.schedule_phases)
+            temporary_path = f"{self.snapshot_path}.tmp"
+
+            with open(temporary_path, 'w') as file:
+                json.dump(snapshot, file)
+
+            os.replace(temporary_path, self.snapshot_path)
+
+    def restore_forecast_store(self, forecast_store: ForecastStore):
+        """Seeds forecast store with forecasts from the snapshot, stale ones are refetched by the store itself."""
+
+        for loc_key, forecast in self.forecasts.items():
+            fetched_at = datetime.fromisoformat(forecast['fetched_at'])
+            forecast_store.add_entry(loc_key, fetched_at, forecast['data'])
+
+        if self.forecasts != {}:
+            logging.info(f"Restored {len(self.forecasts)} forecasts from state snapshot")
+
+    @staticmethod
+    def _get_forecasts_from_store(forecast_store: ForecastStore) -> dict:
+        return {entry.loc_key: dict(fetched_at=entry.fetched_at.isoformat(), data=entry.data)
+                for entry in forecast_store.get_entries()}
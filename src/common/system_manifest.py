@@ -0,0 +1,95 @@
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict
+from threading import Lock
+
+from converters.dataclasses_converters import System
+
+
+class SystemManifest:
+
+    """
+    Compiled manifest of parsed systems and resolved localization keys, saved as single JSON file.
+    System file entry is valid when file modification time and size did not change, or when
+    they changed, but file content hash is still the same. Valid entries are loaded without parsing XML.
+
+    manifest_path - path of the manifest JSON file.
+    """
+
+    version = 1
+
+    def __init__(self, manifest_path: str):
+        self.manifest_path = manifest_path
+        self.files = {}
+        self.locations = {}
+        self._lock = Lock()
+
+    def load(self) -> 'SystemManifest':
+        if os.path.isfile(self.manifest_path):
+            try:
+                with open(self.manifest_path, 'r') as file:
+                    manifest = json.load(file)
+
+                if manifest.get('version') == self.version:
+                    self.files = manifest.get('files', {})
+                    self.locations = manifest.get('locations', {})
+            except (OSError, ValueError) as error:
+                logging.error(f"Cannot load system manifest {self.manifest_path}: {error}")
+
+        return self
+
+    def save(self, locations: dict = None):
+        """Entries of system files, which were removed, are dropped before saving."""
+
+        with self._lock:
+            if locations is not None:
+                self.locations.update(locations)
+
+            self.files = {file_path: entry for file_path, entry in self.files.items() if os.path.isfile(file_path)}
+
+            manifest = dict(version=self.version, files=self.files, locations=self.locations)
+            temporary_path = f"{self.manifest_path}.tmp"
+
+            with open(temporary_path, 'w') as file:
+                json.dump(manifest, file)
+
+            os.replace(temporary_path, self.manifest_path)
+
+    def get_system(self, file_path: str) -> System:
+        """Returns system from manifest, if entry for file path is still valid."""
+
+        entry = self.files.get(file_path)
+
+        if entry is not None and self._entry_is_valid(entry, file_path):
+            return System(**entry['system'])
+
+    def add_system(self, file_path: str, system: System):
+        if system is not None:
+            stat = os.stat(file_path)
+            self.files[file_path] = dict(mtime=stat.st_mtime,
+                                         size=stat.st_size,
+                                         sha1=self._get_file_hash(file_path),
+                                         system=asdict(system))
+
+    def _entry_is_valid(self, entry: dict, file_path: str) -> bool:
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return False
+
+        if entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+            return True
+
+        if entry['sha1'] == self._get_file_hash(file_path):
+            entry['mtime'] = stat.st_mtime
+            entry['size'] = stat.st_size
+            return True
+
+        return False
+
+    @staticmethod
+    def _get_file_hash(file_path: str) -> str:
+        with open(file_path, 'rb') as file:
+            return hashlib.sha1(file.read()).hexdigest()
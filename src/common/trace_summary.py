@@ -0,0 +1,77 @@
+import argparse
+import json
+
+
+class TraceSummary:
+
+    """
+    Summary of cycle traces written by tracer: the slowest cycles with their critical paths,
+    and statistics of each stage (span name) - count, duration percentiles and time on critical path.
+    """
+
+    def __init__(self, traces: list):
+        self.traces = traces
+
+    @classmethod
+    def from_file(cls, path: str) -> 'TraceSummary':
+        with open(path, 'r') as file:
+            return cls([json.loads(line) for line in file if line.strip()])
+
+    def get_slowest_cycles(self, count: int = 10) -> list:
+        slowest = sorted(self.traces, key=lambda trace: trace['duration'], reverse=True)[:count]
+
+        return [dict(duration=trace['duration'],
+                     attributes=trace['attributes'],
+                     critical_path=[f"{span['name']} {span['self_time']:.3f}s" for span in trace['critical_path']])
+                for trace in slowest]
+
+    def get_stages(self) -> dict:
+        durations = {}
+        critical_times = {}
+
+        for trace in self.traces:
+            for span in trace['spans']:
+                durations.setdefault(span['name'], []).append(span['end'] - span['start'])
+            for span in trace['critical_path']:
+                critical_times[span['name']] = critical_times.get(span['name'], 0) + span['self_time']
+
+        total_critical_time = sum(critical_times.values()) or 1
+        stages = {}
+
+        for name, values in sorted(durations.items(), key=lambda item: -critical_times.get(item[0], 0)):
+            values.sort()
+            stages[name] = dict(count=len(values),
+                                total=round(sum(values), 3),
+                                p50=round(self._get_percentile(values, 50), 3),
+                                p90=round(self._get_percentile(values, 90), 3),
+                                max=round(values[-1], 3),
+                                critical_path_share=round(critical_times.get(name, 0) / total_critical_time, 3))
+
+        return stages
+
+    def get_report(self, count: int = 10) -> dict:
+        return dict(cycles=len(self.traces),
+                    slowest_cycles=self.get_slowest_cycles(count),
+                    stages=self.get_stages())
+
+    @staticmethod
+    def _get_percentile(values: list, percentile: int) -> float:
+        return values[min(len(values) - 1, int(len(values) * percentile / 100))]
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description='Summary of the slowest cycles and stages from trace file.')
+    parser.add_argument('path', help='path of traces .jsonl file')
+    parser.add_argument('--top', type=int, default=10, help='count of the slowest cycles')
+
+    return parser.parse_args()
+
+
+def main():
+    arguments = get_arguments()
+    report = TraceSummary.from_file(arguments.path).get_report(arguments.top)
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == '__main__':
+    main()
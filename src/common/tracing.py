@@ -0,0 +1,204 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+
+@dataclass
+class Span:
+    """Single timed stage of the cycle.
+
+    start, end - timestamps in seconds,
+    parent_id - span_id of enclosing span, None for the root span of the cycle,
+    attributes - values like system UUID, localization key, status code or bytes.
+    """
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str = None
+    start: float = 0
+    end: float = 0
+    attributes: dict = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+
+class Tracer:
+
+    """
+    Span based tracer of forecast cycles. Spans opened in the same thread are nested, and when the root span
+    of the cycle is closed, the whole trace with its critical path is written as single JSON line to the trace file.
+    Critical path is the chain of nested spans, which determined the end time of the cycle.
+    Spans of other threads are nested in the span passed to use_context. Spans closed after their trace
+    was written are dropped.
+
+    Trace file is rotated when it grows over max_size bytes, it is renamed to <path>.1 (older ones to <path>.2 ...),
+    and only backup_count rotated files are kept.
+
+    Tracer is disabled until configure is called (and after configure(None)), then span is only a no-op context manager.
+    """
+
+    def __init__(self):
+        self.path = None
+        self.max_size = 0
+        self.backup_count = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._traces = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def configure(self, path: str, max_size: int = 100 * 1024 * 1024, backup_count: int = 3):
+        self.path = path
+        self.max_size = max_size
+        self.backup_count = backup_count
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        if not self.enabled:
+            yield _NO_OP_SPAN
+            return
+
+        stack = self._get_stack()
+        parent = stack[-1] if stack else None
+        span = Span(name, parent.trace_id if parent else uuid.uuid4().hex, uuid.uuid4().hex[:16],
+                    parent.span_id if parent else None, time.time(), attributes=attributes)
+
+        if parent is None:
+            with self._lock:
+                self._traces[span.trace_id] = []
+
+        stack.append(span)
+        try:
+            yield span
+        finally:
+            span.end = time.time()
+            stack.pop()
+
+            with self._lock:
+                spans = self._traces.get(span.trace_id)
+                if spans is not None:
+                    spans.append(span)
+                if parent is None:
+                    self._traces.pop(span.trace_id)
+
+            if parent is None:
+                self._write_trace(span, spans)
+
+    def get_context(self) -> Span:
+        """Returns current span of this thread, which can be passed to use_context in another thread."""
+
+        stack = self._get_stack()
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def use_context(self, span: Span):
+        previous_stack = self._get_stack()
+        self._local.stack = [span] if span is not None else []
+        try:
+            yield
+        finally:
+            self._local.stack = previous_stack
+
+    def _get_stack(self) -> list:
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+
+        return self._local.stack
+
+    @staticmethod
+    def _get_critical_path_records(root: Span, spans: list) -> list:
+        """Self time of span on critical path is its duration without its children on critical path."""
+
+        path = get_critical_path(root, spans)
+
+        return [dict(name=span.name,
+                     duration=round(span.duration, 6),
+                     self_time=round(span.duration - sum(child.duration for child in path
+                                                         if child.parent_id == span.span_id), 6),
+                     attributes=span.attributes)
+                for span in path]
+
+    def _write_trace(self, root: Span, spans: list):
+        trace = dict(trace_id=root.trace_id,
+                     name=root.name,
+                     start=root.start,
+                     duration=round(root.duration, 6),
+                     attributes=root.attributes,
+                     critical_path=self._get_critical_path_records(root, spans),
+                     spans=[asdict(span) for span in sorted(spans, key=lambda span: span.start)])
+
+        line = json.dumps(trace, default=str) + '\n'
+
+        try:
+            with self._lock:
+                self._rotate(len(line))
+
+                with open(self.path, 'a') as file:
+                    file.write(line)
+        except OSError as error:
+            logging.error(f"Cannot write trace: {error}")
+
+    def _rotate(self, size: int):
+        """Rotates trace file, when the next trace would make it larger than max_size. Without backups
+        the trace file is only truncated."""
+
+        if not self.max_size or not os.path.exists(self.path) \
+                or os.path.getsize(self.path) + size <= self.max_size:
+            return
+
+        if self.backup_count < 1:
+            os.remove(self.path)
+            return
+
+        for index in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{index}"):
+                os.replace(f"{self.path}.{index}", f"{self.path}.{index + 1}")
+
+        os.replace(self.path, f"{self.path}.1")
+
+
+class _NoOpSpan:
+
+    def set_attribute(self, key: str, value):
+        pass
+
+
+_NO_OP_SPAN = _NoOpSpan()
+
+
+def get_critical_path(root: Span, spans: list) -> list:
+    """Returns spans of critical path ordered by start time. Going back from the end of each span,
+    child which ended last is on critical path, and earlier children are checked from its start."""
+
+    children = {}
+    for span in spans:
+        children.setdefault(span.parent_id, []).append(span)
+
+    def walk(span: Span) -> list:
+        path = [span]
+        end = span.end
+
+        for child in sorted(children.get(span.span_id, []), key=lambda child: child.end, reverse=True):
+            if child.end <= end:
+                path.extend(walk(child))
+                end = child.start
+
+        return path
+
+    return sorted(walk(root), key=lambda span: span.start)
+
+
+tracer = Tracer()
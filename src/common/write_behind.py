@@ -0,0 +1,175 @@
+import logging
+import os
+import time
+from collections import OrderedDict
+from contextlib import suppress
+from dataclasses import dataclass, field
+from threading import Condition, Thread
+
+
+@dataclass
+class PendingWrite:
+    """Newest not written version of single file.
+
+    submitted_at - time of the first not written version, so flush latency includes time of coalesced versions,
+    callbacks - functions called after the newest version is written, for example forecast ready notification.
+    """
+
+    content: str
+    submitted_at: float
+    callbacks: list = field(default_factory=list)
+
+
+class WriteBehindQueue:
+
+    """
+    Bounded queue of output files, written by dedicated writer threads, so slow disk does not stall forecast fetching.
+    If newer version of the file is submitted before the older one is written, only the newest version is written.
+    Single file is never written by two writers at the same time, so older version never overwrites newer one.
+    Each writer takes up to batch_size files at once, and fsyncs them after all of them are written.
+    When max_pending files are waiting, submit blocks until writers catch up.
+    Failed write, fsync or callback is logged and counted, and never stops the writer.
+    """
+
+    def __init__(self, writers: int = 2, max_pending: int = 1000, batch_size: int = 16, fsync: bool = False):
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.submitted = 0
+        self.written = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.flush_latencies = []
+        self._pending = OrderedDict()
+        self._in_flight = set()
+        self._stopped = False
+        self._condition = Condition()
+        self._writers = [Thread(target=self._write_loop, daemon=True) for _ in range(writers)]
+
+        for writer in self._writers:
+            writer.start()
+
+    def submit(self, path: str, content: str, on_written=None):
+        with self._condition:
+            self._condition.wait_for(lambda: len(self._pending) < self.max_pending or path in self._pending)
+            self.submitted += 1
+
+            pending = self._pending.get(path)
+            if pending is None:
+                self._pending[path] = PendingWrite(content, time.monotonic())
+            else:
+                pending.content = content
+                pending.callbacks = []
+                self.coalesced += 1
+
+            if on_written is not None:
+                self._pending[path].callbacks.append(on_written)
+
+            self._condition.notify_all()
+
+    def flush(self, timeout: float = None, path: str = None) -> bool:
+        """Waits until all submitted files (or only file of given path) are written.
+        Returns False if timeout passed first."""
+
+        with self._condition:
+            if path is not None:
+                return self._condition.wait_for(
+                    lambda: path not in self._pending and path not in self._in_flight, timeout)
+
+            return self._condition.wait_for(lambda: not self._pending and not self._in_flight, timeout)
+
+    def stop(self):
+        self.flush()
+
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+        for writer in self._writers:
+            writer.join()
+
+    def get_stats(self) -> dict:
+        with self._condition:
+            latencies = sorted(self.flush_latencies)
+            return dict(queue_depth=len(self._pending), in_flight=len(self._in_flight), submitted=self.submitted,
+                        written=self.written, coalesced=self.coalesced, errors=self.errors,
+                        flush_latency_p50=round(latencies[len(latencies) // 2], 4) if latencies else None,
+                        flush_latency_max=round(latencies[-1], 4) if latencies else None)
+
+    def _write_loop(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._stopped or self._get_writable_paths())
+                if self._stopped and not self._pending:
+                    return
+
+                batch = [(path, self._pending.pop(path)) for path in self._get_writable_paths()[:self.batch_size]]
+                self._in_flight.update(path for path, _ in batch)
+                self._condition.notify_all()
+
+            written_at = None
+
+            try:
+                self._write_batch(batch)
+                written_at = time.monotonic()
+                self._call_callbacks(batch)
+            except Exception:
+                logging.exception("Write behind batch failed.")
+            finally:
+                with self._condition:
+                    self._in_flight.difference_update(path for path, _ in batch)
+                    if written_at is not None:
+                        latencies = [written_at - pending.submitted_at for _, pending in batch]
+                        self.flush_latencies = (self.flush_latencies + latencies)[-1000:]
+                    self._condition.notify_all()
+
+    def _call_callbacks(self, batch: list):
+        for path, pending in batch:
+            for callback in pending.callbacks:
+                try:
+                    callback()
+                except Exception:
+                    logging.exception(f"Callback of written file {path} failed.")
+                    with self._condition:
+                        self.errors += 1
+
+    def _get_writable_paths(self) -> list:
+        return [path for path in self._pending if path not in self._in_flight]
+
+    def _write_batch(self, batch: list):
+        files = []
+
+        for path, pending in batch:
+            file = None
+            try:
+                file = open(path, 'w')
+                file.write(pending.content)
+                files.append((path, pending, file))
+            except OSError as error:
+                if file is not None:
+                    file.close()
+                self._set_write_error(path, pending, error)
+
+        written = 0
+
+        for path, pending, file in files:
+            try:
+                if self.fsync:
+                    file.flush()
+                    os.fsync(file.fileno())
+                file.close()
+                written += 1
+            except OSError as error:
+                self._set_write_error(path, pending, error)
+                with suppress(OSError):
+                    file.close()
+
+        with self._condition:
+            self.written += written
+
+    def _set_write_error(self, path: str, pending: PendingWrite, error: OSError):
+        logging.error(f"Cannot write file {path}: {error}")
+        pending.callbacks = []
+
+        with self._condition:
+            self.errors += 1
@@ -1,3 +1,4 @@
+import glob
 from os import path
 from pathlib import Path
 
@@ -11,9 +12,10 @@ class Config:
 
     def __init__(self):
         self.init_args = None
-        self.valid_modes = ['-c', '-s']
+        self.valid_modes = ['-c', '-s', '-d']
         self.absolute_path = str(Path().resolve()).replace('/src', '')
-        self.api_key_path = f"{self.absolute_path}/api_keys/api_key.xml"
+        self.api_keys_path = f"{self.absolute_path}/api_keys"
+        self.settings_path = f"{self.absolute_path}/settings/settings.xml"
 
     def get_config(self, args: list) -> dict:
         if self._is_valid(args):
@@ -23,9 +25,12 @@ class Config:
         entry_path = self._get_full_path(args[1])
         output_path = self._get_full_path(args[2])
         mode = self._get_mode_name(args[3])
-        api_key = self._get_api_key()['api_key']['key']
+        api_keys = self._get_api_keys()
+        api_key = api_keys[0]['key']
+        settings = self._get_settings()
 
-        return dict(entry_path=entry_path, output_path=output_path, mode=mode, api_key=api_key)
+        return dict(entry_path=entry_path, output_path=output_path, mode=mode, api_key=api_key,
+                    api_keys=api_keys, settings=settings)
 
     def _get_full_path(self, folder: str) -> str:
         return f"{self.absolute_path}/{folder}"
@@ -47,8 +52,42 @@ class Config:
         else:
             raise exc.InitArgsPathNotExists(entry_file_path)
 
-    def _get_api_key(self):
-        return XmlToDictConverter().get_dict_from_file(self.api_key_path)
+    def _get_api_keys(self) -> list:
+        """All API keys from .xml files in api_keys folder. Single file can contain one api_key element,
+        or api_keys element with multiple api_key elements. Each key can provide optional 'quota' attribute."""
+
+        api_keys = []
+
+        for file_path in sorted(glob.glob(f"{self.api_keys_path}/*.xml")):
+            api_keys.extend(self._get_api_keys_from_file(file_path))
+
+        if api_keys == []:
+            raise exc.ApiKeyNotFound(self.api_keys_path)
+
+        return api_keys
+
+    @staticmethod
+    def _get_api_keys_from_file(file_path: str) -> list:
+        data = XmlToDictConverter().get_dict_from_file(file_path)
+
+        if 'api_key' in data:
+            keys = data['api_key']
+        else:
+            keys = (data.get('api_keys') or {}).get('api_key', [])
+
+        if isinstance(keys, dict):
+            keys = [keys]
+
+        return [key for key in keys if key is not None and 'key' in key]
+
+    def _get_settings(self) -> dict:
+        """Optional module settings, empty dictionary is returned if settings file does not exist."""
+        if path.exists(self.settings_path):
+            settings = XmlToDictConverter().get_dict_from_file(self.settings_path)['settings']
+            if settings is not None:
+                return settings
+
+        return {}
 
     @staticmethod
     def _mode_is_valid(mode: str, valid_modes: list) -> bool:
@@ -70,3 +109,5 @@ class Config:
             return 'continous'
         elif mode == '-s':
             return 'single_time'
+        elif mode == '-d':
+            return 'dry_run'
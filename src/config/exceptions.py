@@ -48,3 +48,21 @@ class InitArgsInvalidModeType(Exception):
 
     def __str__(self) -> str:
         return f"{self.message}: {self.mode}. Valid mode types: {self.valid_modes}"
+
+
+
+class ApiKeyNotFound(Exception):
+    """Exception raised, when no API key was found in api keys path.
+
+    Attrs:
+        path - api keys path, which caused the error,
+        message - explenation of the error
+    """
+
+    def __init__(self, path: str, message="No API key found"):
+        self.path = path
+        self.message = message
+        super().__init__(self.message)
+
+    def __str__(self) -> str:
+        return f"{self.message}: {self.path}"
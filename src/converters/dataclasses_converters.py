@@ -5,13 +5,18 @@ from dataclasses import dataclass, is_dataclass
 
 @dataclass
 class System:
+    """priority - higher value is more important, used by overload control,
+    deadline - seconds after scheduled refresh, in which output should be saved (update_period by default)."""
+
     filename: str
     uuid: str
     components: list
     update_period: int = None
+    priority: int = None
+    deadline: int = None
 
     def __repr__(self):
-        return f"SYSTEM: (filename: {self.filename}, uuid: {self.uuid}, comp_count: {len(self.components)}, update_period: {self.update_period})"
+        return f"SYSTEM: (filename: {self.filename}, uuid: {self.uuid}, comp_count: {len(self.components)}, update_period: {self.update_period}, priority: {self.priority}, deadline: {self.deadline})"
 
 
 @dataclass
@@ -44,6 +49,18 @@ class ComponentDaylight:
     time: str
     daylight: str
 
+
+@dataclass
+class ForecastSequences:
+    """Values of multiple sequence types for the same forecast times.
+
+    times - list of forecast times,
+    values - dictionary with list of values for each sequence type name.
+    """
+
+    times: list
+    values: dict
+
 class DataclassConverter(ABC):
 
     @abstractmethod
@@ -71,6 +88,8 @@ class SystemDataclassConverter(DataclassConverter):
         self.uuid_key = 'UUID'
         self.components_key = 'component'
         self.update_period_key = 'update_period'
+        self.priority_key = 'priority'
+        self.deadline_key = 'deadline'
         self.filename_key = 'filename'
 
     def convert(self, systems) -> list:
@@ -88,8 +107,10 @@ class SystemDataclassConverter(DataclassConverter):
             uuid = concrete_system[self.uuid_key]
             components = concrete_system[self.components_key]
             update_period = self._get_update_period(concrete_system)
+            priority = self._get_integer_attribute(concrete_system, self.priority_key, 'Priority')
+            deadline = self._get_integer_attribute(concrete_system, self.deadline_key, 'Deadline')
 
-            return self.dataclass(filename, uuid, components, update_period)
+            return self.dataclass(filename, uuid, components, update_period, priority, deadline)
         except KeyError as key:
             logging.error(
                 f'Invalid key ({key}) in dictionary, cannot convert to dataclass')
@@ -102,13 +123,17 @@ class SystemDataclassConverter(DataclassConverter):
         return ret_list
 
     def _get_update_period(self, system: dict) -> int:
-        if self.update_period_key in system.keys():
+        return self._get_integer_attribute(system, self.update_period_key, 'Update period')
+
+    @staticmethod
+    def _get_integer_attribute(system: dict, key: str, name: str) -> int:
+        if key in system.keys():
             try:
-                update_period = int(system[self.update_period_key])
-                return update_period
+                value = int(system[key])
+                return value
             except ValueError:
                 logging.error(
-                    f"Update period should be integer or integer string, actual value: {system[self.update_period_key]}")
+                    f"{name} should be integer or integer string, actual value: {system[key]}")
 
 
 class ComponentDataclassConverter(DataclassConverter):
@@ -232,6 +257,47 @@ class AccuWeatherComponentDaylightDataclassConverter(DataclassConverter):
 
         return ret_list
 
+    @staticmethod
+    def _get_proper_time(time):
+        return time[11:19]
+
+
+class AccuWeatherMultiSequenceDataclassConverter(DataclassConverter):
+    """Converts AccuWeather hourly forecasts to values of all sequence types, provided by field extractors,
+    in single pass over the forecasts."""
+
+    def __init__(self, field_extractors: list):
+        self.field_extractors = field_extractors
+        self.datetime_key = 'DateTime'
+
+    def convert(self, forecasts) -> ForecastSequences:
+        if isinstance(forecasts, dict):
+            forecasts = [forecasts]
+
+        return self._convert_from_list(forecasts)
+
+    def _convert_from_dict(self, forecast: dict, sequences: ForecastSequences):
+        try:
+            values = [extractor.extract(forecast) for extractor in self.field_extractors]
+            time = self._get_proper_time(forecast[self.datetime_key])
+        except (KeyError, TypeError, ValueError) as key:
+            logging.error(
+                f'Invalid key ({key}) in dictionary, cannot convert to dataclass')
+            return
+
+        sequences.times.append(time)
+        for extractor, value in zip(self.field_extractors, values):
+            sequences.values[extractor.sequence_type_name].append(value)
+
+    def _convert_from_list(self, forecasts: list) -> ForecastSequences:
+        sequences = ForecastSequences(
+            [], {extractor.sequence_type_name: [] for extractor in self.field_extractors})
+
+        for forecast in forecasts:
+            self._convert_from_dict(forecast, sequences)
+
+        return sequences
+
     @staticmethod
     def _get_proper_time(time):
         return time[11:19]
\ No newline at end of file
@@ -0,0 +1,118 @@
+import copy
+
+import converters.dataclasses_converters as dc
+
+
+class DeltaOutputDataFormatter:
+
+    """
+    Compares time sequences of each component with the last emitted version for the same system file,
+    and creates compact delta records with changed components and sequences only.
+    Every snapshot_every cycles full snapshot is emitted instead of delta.
+    Each snapshot and delta has increasing sequence number, so consumers can apply deltas in order.
+
+    Delta record format, acceptable by xmltodict module:
+    {"system_delta": {"@UUID": uuid, "@sequence": number, "component": [changed components]}}
+    """
+
+    system_key = 'system'
+    delta_key = 'system_delta'
+    component_key = 'component'
+    time_sequence_key = 'time_sequence'
+
+    def __init__(self, snapshot_every: int = 10):
+        self.snapshot_every = snapshot_every
+        self._last_emitted = {}
+        self._cycles = {}
+        self._sequences = {}
+
+    def get_formatted_data(self, system: dc.System, data: dict) -> tuple:
+        """Returns tuple (is_snapshot, data). Data is full output dictionary for snapshot,
+        delta record if something changed, or None if nothing changed."""
+
+        if data is None:
+            return False, None
+
+        cycle = self._cycles.get(system.filename, 0)
+        self._cycles[system.filename] = cycle + 1
+        changed_components = self._get_changed_components(system, data)
+
+        if cycle % self.snapshot_every == 0:
+            snapshot = copy.copy(data)
+            snapshot[self.system_key] = dict(data[self.system_key], **{'@sequence': str(self._next_sequence(system))})
+            return True, snapshot
+
+        if changed_components != []:
+            return False, {self.delta_key: {'@UUID': system.uuid,
+                                            '@sequence': str(self._next_sequence(system)),
+                                            self.component_key: changed_components}}
+
+        return False, None
+
+    @classmethod
+    def apply_delta(cls, snapshot: dict, delta: dict) -> dict:
+        """Helper for consumers, applies delta record to the output dictionary, both with
+        or without '@' attributes prefix."""
+
+        prefix = '@' if '@UUID' in snapshot[cls.system_key] else ''
+        components = cls._as_list(snapshot[cls.system_key][cls.component_key])
+        by_uid = {component[f'{prefix}UID']: component for component in components}
+
+        for changed in cls._as_list(delta[cls.delta_key].get(cls.component_key)):
+            component = by_uid.get(changed[f'{prefix}UID'])
+            changed_sequences = cls._as_list(changed['model_parameters']['dynamic'][cls.time_sequence_key])
+
+            if component is None:
+                components.append(changed)
+                by_uid[changed[f'{prefix}UID']] = changed
+                continue
+
+            dynamic = component['model_parameters']['dynamic']
+            sequences = cls._as_list(dynamic[cls.time_sequence_key])
+            for sequence in changed_sequences:
+                sequence_type = sequence[f'{prefix}sequence_type']
+                sequences = [item for item in sequences if item[f'{prefix}sequence_type'] != sequence_type]
+                sequences.append(sequence)
+            dynamic[cls.time_sequence_key] = sequences
+
+        snapshot[cls.system_key][cls.component_key] = components
+        snapshot[cls.system_key][f'{prefix}sequence'] = delta[cls.delta_key][f'{prefix}sequence']
+
+        return snapshot
+
+    def _get_changed_components(self, system: dc.System, data: dict) -> list:
+        last_emitted = self._last_emitted.setdefault(system.filename, {})
+        changed_components = []
+
+        for component in self._as_list(data[self.system_key][self.component_key]):
+            uid = component['@UID']
+            changed_sequences = []
+
+            for sequence in self._as_list(component['model_parameters']['dynamic'][self.time_sequence_key]):
+                key = (uid, sequence['@sequence_type'])
+                values = (sequence['@rel_time'], sequence['@data'])
+
+                if last_emitted.get(key) != values:
+                    last_emitted[key] = values
+                    changed_sequences.append(sequence)
+
+            if changed_sequences != []:
+                changed_components.append({'@UID': uid,
+                                           'model_parameters': {'dynamic': {self.time_sequence_key: changed_sequences}}})
+
+        return changed_components
+
+    def _next_sequence(self, system: dc.System) -> int:
+        sequence = self._sequences.get(system.filename, 0) + 1
+        self._sequences[system.filename] = sequence
+
+        return sequence
+
+    @staticmethod
+    def _as_list(value) -> list:
+        if value is None:
+            return []
+        elif isinstance(value, list):
+            return value
+
+        return [value]
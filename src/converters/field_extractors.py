@@ -0,0 +1,101 @@
+import logging
+from abc import ABC, abstractmethod
+
+import converters.dataclasses_converters as dc
+
+
+class FieldExtractor(ABC):
+
+    """
+    Extracts value of single sequence type from one AccuWeather hourly forecast.
+    Specific extractors should set:
+
+    sequence_type_name - string name of the sequence in output file, for example 'temperature',
+    requires_details - True if field is returned only with 'details' request param.
+    """
+
+    sequence_type_name: str = None
+    requires_details: bool = False
+
+    @abstractmethod
+    def extract(self, forecast: dict):
+        """Should return value of the sequence for single hourly forecast."""
+        pass
+
+
+class TemperatureFieldExtractor(FieldExtractor):
+
+    sequence_type_name = 'temperature'
+
+    def extract(self, forecast: dict) -> int:
+        temperature = forecast['Temperature']
+        return dc.ComponentTemperature(None, int(temperature['Value']), temperature['Unit']).temperature
+
+
+class DaylightFieldExtractor(FieldExtractor):
+
+    sequence_type_name = 'day_light'
+
+    def extract(self, forecast: dict):
+        return forecast['IsDaylight']
+
+
+class HumidityFieldExtractor(FieldExtractor):
+
+    sequence_type_name = 'humidity'
+    requires_details = True
+
+    def extract(self, forecast: dict) -> int:
+        return forecast['RelativeHumidity']
+
+
+class WindFieldExtractor(FieldExtractor):
+
+    """Wind speed in km/h."""
+
+    sequence_type_name = 'wind'
+    requires_details = True
+
+    def extract(self, forecast: dict) -> float:
+        speed = forecast['Wind']['Speed']
+
+        if speed['Unit'] == 'mi/h':
+            return round(speed['Value'] * 1.609344, 1)
+
+        return speed['Value']
+
+
+class PrecipitationProbabilityFieldExtractor(FieldExtractor):
+
+    sequence_type_name = 'precipitation_probability'
+
+    def extract(self, forecast: dict) -> int:
+        return forecast['PrecipitationProbability']
+
+
+FIELD_EXTRACTORS = {}
+
+
+def register_field_extractor(extractor: FieldExtractor):
+    """Registers field extractor under its sequence type name. New sequence types only need
+    own extractor registered here."""
+
+    FIELD_EXTRACTORS[extractor.sequence_type_name] = extractor
+
+
+def get_field_extractors(sequence_type_names: list) -> list:
+    extractors = []
+
+    for name in sequence_type_names:
+        if name in FIELD_EXTRACTORS:
+            extractors.append(FIELD_EXTRACTORS[name])
+        else:
+            logging.error(
+                f"Unknown sequence type: {name}, valid sequence types: {list(FIELD_EXTRACTORS)}")
+
+    return extractors
+
+
+for field_extractor in (TemperatureFieldExtractor(), DaylightFieldExtractor(), HumidityFieldExtractor(),
+                        WindFieldExtractor(), PrecipitationProbabilityFieldExtractor()):
+    register_field_extractor(field_extractor)
@@ -90,6 +90,47 @@ class OutputDaylightFormatter(SingleTypeOutputDataFormatter):
         return forecast_data_list
 
 
+class MultiSequenceOutputDataFormatter:
+
+    """Formats forecast sequences of all sequence types for each component. Strings of single localization
+    forecast are created once and shared by all components in this localization."""
+
+    base_time_key = 'base_time'
+    component_key = 'component'
+    forecast_data_key = 'forecast_data'
+
+    def get_formatted_data(self, component_data: list) -> list:
+        formatted_data = []
+        sequence_strings = {}
+
+        for component_set in component_data:
+            sequences = component_set[self.forecast_data_key]
+
+            if id(sequences) not in sequence_strings:
+                sequence_strings[id(sequences)] = self._create_sequence_strings(sequences)
+
+            rel_time, data_strings = sequence_strings[id(sequences)]
+
+            for sequence_type, data in data_strings.items():
+                formatted_data.append({self.component_key: component_set[self.component_key],
+                                       "time_sequence": {
+                    "@sequence_type": sequence_type,
+                    "@base_time": component_set[self.base_time_key],
+                    "@rel_time": rel_time,
+                    "@data": data}
+                })
+
+        return formatted_data
+
+    @staticmethod
+    def _create_sequence_strings(sequences: dc.ForecastSequences) -> tuple:
+        rel_time = SingleTypeOutputDataFormatter._create_converted_space_string(sequences.times)
+        data_strings = {sequence_type: SingleTypeOutputDataFormatter._create_converted_space_string(values)
+                        for sequence_type, values in sequences.values.items()}
+
+        return rel_time, data_strings
+
+
 class FinalOutputDataFormatter:
 
     def __init__(self):
@@ -111,8 +152,8 @@ class FinalOutputDataFormatter:
                 single_component_time_seq_list.append(dict_data)
             else:
                 for item in single_component_time_seq_list:
-                    if item[self.component_key] == item:
-                        item[self.time_sequence_key].append(forecast)
+                    if item[self.component_key] == forecast[self.component_key]:
+                        item[self.time_sequence_key].append(forecast[self.time_sequence_key])
 
         if single_component_time_seq_list != []:
             return single_component_time_seq_list
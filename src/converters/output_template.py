@@ -0,0 +1,117 @@
+import re
+from threading import Lock
+from xml.sax.saxutils import quoteattr
+
+import xmltodict
+
+from converters.dataclasses_converters import System
+
+
+class OutputTemplate:
+
+    """
+    Precompiled XML of system output, with slots for values, which change in each cycle (base_time, rel_time
+    and data of each time sequence). Literal parts are created by xmltodict from output with placeholder values,
+    so rendered XML is the same as xmltodict.unparse(data, pretty=True), byte for byte.
+
+    signature - system UUID, component UIDs and keys and sequence types of their time sequences,
+    template can be rendered only for output with the same signature,
+    parts - literal parts of XML, one more than slots.
+    """
+
+    slot_keys = ('@base_time', '@rel_time', '@data')
+    _placeholder = 'slot-{}-placeholder'
+    _needs_escape = re.compile('[&<>"\n\r\t]')
+
+    def __init__(self, signature: tuple, parts: list):
+        self.signature = signature
+        self.parts = parts
+
+    @classmethod
+    def compile(cls, data: dict) -> 'OutputTemplate':
+        signature, values = cls.get_signature_and_values(data)
+        placeholders = iter(range(len(values)))
+
+        system = dict(data['system'], component=[
+            dict(component, model_parameters=dict(dynamic=dict(time_sequence=[
+                {key: cls._placeholder.format(next(placeholders)) if key in cls.slot_keys else value
+                 for key, value in time_sequence.items()}
+                for time_sequence in cls._get_time_sequences(component)])))
+            for component in data['system']['component']])
+
+        xml_data = xmltodict.unparse(dict(system=system), pretty=True)
+        parts = re.split('"' + cls._placeholder.format('[0-9]+') + '"', xml_data)
+
+        return cls(signature, parts)
+
+    @classmethod
+    def get_signature_and_values(cls, data: dict) -> tuple:
+        """Returns signature of output skeleton and slot values, in order of the document."""
+
+        system = data['system']
+        components = []
+        values = []
+
+        for component in system['component']:
+            time_sequences = cls._get_time_sequences(component)
+            components.append((tuple(component), component['@UID'],
+                               tuple((tuple(time_sequence), time_sequence['@sequence_type'])
+                                     for time_sequence in time_sequences)))
+
+            for time_sequence in time_sequences:
+                values.extend(time_sequence[key] for key in cls.slot_keys)
+
+        attributes = tuple((key, value) for key, value in system.items() if key != 'component')
+
+        return (attributes, tuple(components)), values
+
+    def render(self, values: list) -> str:
+        quoted = {}
+        result = [self.parts[0]]
+
+        for value, part in zip(values, self.parts[1:]):
+            if value not in quoted:
+                quoted[value] = quoteattr(value) if self._needs_escape.search(value) else f'"{value}"'
+
+            result.append(quoted[value])
+            result.append(part)
+
+        return ''.join(result)
+
+    @staticmethod
+    def _get_time_sequences(component: dict) -> list:
+        return component['model_parameters']['dynamic']['time_sequence']
+
+
+class OutputTemplates:
+
+    """
+    Output templates of all systems. Template of the system is compiled with its first output, and compiled again
+    only when skeleton of output changes (for example component without forecast in this cycle, or changed system file).
+    """
+
+    def __init__(self):
+        self.compiled = 0
+        self.rendered = 0
+        self._templates = {}
+        self._lock = Lock()
+
+    def get_xml_string(self, system: System, data: dict) -> str:
+        signature, values = OutputTemplate.get_signature_and_values(data)
+        template = self._templates.get(system.filename)
+
+        if template is None or template.signature != signature:
+            template = OutputTemplate.compile(data)
+            self._templates[system.filename] = template
+
+            with self._lock:
+                self.compiled += 1
+
+        with self._lock:
+            self.rendered += 1
+
+        return template.render(values)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(templates=len(self._templates), compiled=self.compiled, rendered=self.rendered)
@@ -0,0 +1,93 @@
+import logging
+import time
+from datetime import datetime, timezone
+
+import converters.dataclasses_converters as dc
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:
+    ZoneInfo = None
+
+
+def get_solar_elevations(latitudes, longitudes, timestamps):
+    """Returns array of solar elevations in degrees, with row for each position and column for each
+    UNIX timestamp. Low precision solar position formulas, with error below 0.1 degree."""
+
+    latitudes = np.radians(np.asarray(latitudes, dtype=float))[:, np.newaxis]
+    longitudes = np.asarray(longitudes, dtype=float)[:, np.newaxis]
+    days = np.asarray(timestamps, dtype=float)[np.newaxis, :] / 86400 - 10957.5
+
+    mean_anomaly = np.radians(357.529 + 0.98560028 * days)
+    mean_longitude = 280.459 + 0.98564736 * days
+    ecliptic_longitude = np.radians(
+        mean_longitude + 1.915 * np.sin(mean_anomaly) + 0.020 * np.sin(2 * mean_anomaly))
+    obliquity = np.radians(23.439 - 0.00000036 * days)
+
+    right_ascension = np.degrees(np.arctan2(np.cos(obliquity) * np.sin(ecliptic_longitude),
+                                            np.cos(ecliptic_longitude)))
+    declination = np.arcsin(np.sin(obliquity) * np.sin(ecliptic_longitude))
+    sidereal_time = 280.46061837 + 360.98564736629 * days
+    hour_angle = np.radians(sidereal_time + longitudes - right_ascension)
+
+    return np.degrees(np.arcsin(np.sin(latitudes) * np.sin(declination)
+                                + np.cos(latitudes) * np.cos(declination) * np.cos(hour_angle)))
+
+
+class LocalDaylightDataclassConverter:
+
+    """
+    Computes daylight locally from solar elevation, without any API call. Daylight of all components
+    and hours is computed in single NumPy batch, for hours next full hours, like AccuWeather hourly forecasts.
+    Hour is daylight when upper edge of the sun is above the horizon (elevation above -0.833 degree).
+
+    timezone - name of time zone, in which rel_time is written. AccuWeather writes times in local time
+    of the localization, which is not known without API call, so it should be set to time zone of systems.
+    Needs optional numpy package.
+    """
+
+    horizon_elevation = -0.833
+
+    def __init__(self, hours: int = 12, timezone_name: str = 'UTC', clock=time.time):
+        self.hours = hours
+        self.timezone = self._get_timezone(timezone_name)
+        self.clock = clock
+
+    @staticmethod
+    def is_available() -> bool:
+        return np is not None
+
+    def convert(self, components: list) -> list:
+        """Returns list of ComponentDaylight lists, one list for each component."""
+
+        if components == []:
+            return []
+
+        timestamps = self._get_timestamps()
+        elevations = get_solar_elevations([float(component.latitude) for component in components],
+                                          [float(component.longitude) for component in components],
+                                          timestamps)
+        times = [datetime.fromtimestamp(timestamp, self.timezone).strftime('%H:%M:%S') for timestamp in timestamps]
+
+        return [[dc.ComponentDaylight(time_, bool(daylight)) for time_, daylight in zip(times, row)]
+                for row in (elevations > self.horizon_elevation).tolist()]
+
+    def _get_timestamps(self) -> list:
+        first_hour = (int(self.clock()) // 3600 + 1) * 3600
+        return [first_hour + hour * 3600 for hour in range(self.hours)]
+
+    @staticmethod
+    def _get_timezone(timezone_name: str):
+        if timezone_name == 'UTC' or ZoneInfo is None:
+            return timezone.utc
+
+        try:
+            return ZoneInfo(timezone_name)
+        except Exception:
+            logging.error(f"Unknown time zone: {timezone_name}, using UTC.")
+            return timezone.utc
@@ -45,3 +45,8 @@ class DictToXmlConverter:
     def get_xml_string_from_dictionary(self, dictionary: dict):
         if dictionary is not None:
             return xmltodict.unparse(dictionary, pretty=True)
+
+    def get_xml_line_from_dictionary(self, dictionary: dict):
+        """Returns XML element in single line, without XML declaration."""
+        if dictionary is not None:
+            return xmltodict.unparse(dictionary, full_document=False)
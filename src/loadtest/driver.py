@@ -0,0 +1,188 @@
+import argparse
+import json
+import logging
+import os
+import resource
+import tempfile
+import time
+from threading import Lock
+
+from common.init_module import Module
+from converters.dataclasses_converters import System
+from converters.xml_formatter import XmlToDictConverter
+
+from loadtest.stub_server import AccuWeatherStubServer, LatencyDistribution
+from loadtest.systems_generator import SyntheticSystemsGenerator
+
+
+class InstrumentedModule(Module):
+
+    """Module which records start and end time of each successful system cycle, and count of failed ones.
+    Output is saved in another thread in pipeline mode, so success is kept for each system."""
+
+    def __init__(self, config: dict):
+        super().__init__(config)
+        self.cycles = []
+        self.failed_cycles = 0
+        self.cycles_lock = Lock()
+        self.succeeded = {}
+
+    def _save_output(self, system: System, data: dict, xml_data: str = None):
+        self.succeeded[system.filename] = data is not None
+        super()._save_output(system, data, xml_data)
+
+    def _get_data_and_save_to_file(self, system: System, windows: dict = None):
+        start = time.monotonic()
+        self.succeeded[system.filename] = False
+        data = super()._get_data_and_save_to_file(system, windows)
+        end = time.monotonic()
+
+        with self.cycles_lock:
+            if self.succeeded[system.filename]:
+                self.cycles.append((system.filename, system.update_period or 60, start, end))
+            else:
+                self.failed_cycles += 1
+
+        return data
+
+
+class LoadTestDriver:
+
+    """
+    Runs Module in continous mode against local AccuWeather stub server for given time,
+    and reports achieved refresh rate, lag percentiles, API call counts and memory usage.
+
+    Lag of a refresh is the delay between two consecutive refreshes of the same system above its update period.
+    """
+
+    def __init__(self, server: AccuWeatherStubServer, systems_path: str, output_path: str,
+                 api_keys_count: int = 1, settings: dict = None):
+        self.server = server
+        self.systems_path = systems_path
+        self.output_path = output_path
+        self.api_keys = [dict(key=f"load-test-key-{index}") for index in range(api_keys_count)]
+        self.settings = dict(settings or {}, accuweather=dict(host=server.host))
+
+    def run(self, duration: float) -> dict:
+        config = dict(entry_path=self.systems_path,
+                      output_path=self.output_path,
+                      mode='continous',
+                      api_key=self.api_keys[0]['key'],
+                      api_keys=self.api_keys,
+                      settings=self.settings)
+
+        module = InstrumentedModule(config)
+        start = time.monotonic()
+        module.run()
+        time.sleep(duration)
+        module.stop()
+        elapsed = time.monotonic() - start
+
+        return self._create_report(module, elapsed)
+
+    def _create_report(self, module: InstrumentedModule, elapsed: float) -> dict:
+        systems = module.systems if isinstance(module.systems, list) else [module.systems]
+        expected_rate = sum(1 / (system.update_period or 60) for system in systems)
+        lags = self._get_lags(module.cycles)
+        cycle_times = sorted(end - start for filename, period, start, end in module.cycles)
+
+        return dict(duration=round(elapsed, 1),
+                    systems=len(systems),
+                    refreshes=len(module.cycles),
+                    failed_refreshes=module.failed_cycles,
+                    refresh_rate=round(len(module.cycles) / elapsed, 3),
+                    expected_refresh_rate=round(expected_rate, 3),
+                    lag_percentiles=self._get_percentiles(lags),
+                    cycle_time_percentiles=self._get_percentiles(cycle_times),
+                    calls=dict(self.server.calls),
+                    status_codes={str(code): count for code, count in self.server.status_codes.items()},
+                    concurrency=module.concurrency_limiter.get_stats() if module.concurrency_limiter else None,
+                    write_queue=module.write_queue.get_stats() if module.write_queue else None,
+                    providers=module.forecast_provider.get_stats() if module.forecast_provider else None,
+                    cassette=module.cassette.get_stats() if module.cassette else None,
+                    overload=module.overload_controller.get_stats() if module.overload_controller else None,
+                    pipeline=module.pipeline.get_stats() if module.pipeline else None,
+                    locations=module.location_scheduler.get_stats() if module.location_scheduler else None,
+                    rss_mb=self._get_rss_mb(),
+                    max_rss_mb=round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1))
+
+    @staticmethod
+    def _get_lags(cycles: list) -> list:
+        last_ends = {}
+        lags = []
+
+        for filename, period, start, end in sorted(cycles, key=lambda cycle: cycle[3]):
+            if filename in last_ends:
+                lags.append(max(0, end - last_ends[filename] - period))
+            last_ends[filename] = end
+
+        return sorted(lags)
+
+    @staticmethod
+    def _get_percentiles(values: list) -> dict:
+        if values == []:
+            return {}
+
+        return {f"p{percentile}": round(values[min(len(values) - 1, int(len(values) * percentile / 100))], 3)
+                for percentile in (50, 90, 99)} | dict(max=round(values[-1], 3))
+
+    @staticmethod
+    def _get_rss_mb() -> float:
+        try:
+            with open('/proc/self/status', 'r') as file:
+                for line in file:
+                    if line.startswith('VmRSS:'):
+                        return round(int(line.split()[1]) / 1024, 1)
+        except OSError:
+            return None
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description='Load test of continous mode against local AccuWeather stub server.')
+    parser.add_argument('--systems', type=int, default=100, help='count of generated system files')
+    parser.add_argument('--components', type=int, default=5, help='count of components in each system')
+    parser.add_argument('--clusters', type=int, default=50, help='count of component clusters (cities)')
+    parser.add_argument('--update-periods', default='30,60,300', help='comma-separated update periods of systems')
+    parser.add_argument('--priorities', default=None, help='comma-separated priorities of systems, for overload control')
+    parser.add_argument('--minutes', type=float, default=1, help='duration of the test')
+    parser.add_argument('--latency', default='lognormal:0.2:0.5', help='latency distribution, kind:first:second')
+    parser.add_argument('--error-rate', type=float, default=0, help='part of requests answered with 500')
+    parser.add_argument('--rate-limit', type=float, default=None, help='requests per second allowed per API key')
+    parser.add_argument('--keys', type=int, default=1, help='count of API keys')
+    parser.add_argument('--settings', default=None, help='path of settings .xml file used by Module')
+    parser.add_argument('--seed', type=int, default=None)
+
+    return parser.parse_args()
+
+
+def main():
+    arguments = get_arguments()
+    logging.basicConfig(level=logging.WARNING)
+
+    settings = {}
+    if arguments.settings is not None:
+        settings = XmlToDictConverter().get_dict_from_file(arguments.settings)['settings'] or {}
+
+    server = AccuWeatherStubServer(latency=LatencyDistribution.from_string(arguments.latency),
+                                   error_rate=arguments.error_rate,
+                                   rate_limit=arguments.rate_limit).start()
+
+    with tempfile.TemporaryDirectory() as directory:
+        systems_path = os.path.join(directory, 'systems')
+        output_path = os.path.join(directory, 'forecasts')
+        os.makedirs(output_path)
+
+        update_periods = [int(period) for period in arguments.update_periods.split(',')]
+        priorities = [int(priority) for priority in arguments.priorities.split(',')] if arguments.priorities else None
+        SyntheticSystemsGenerator(arguments.clusters, update_periods=update_periods, priorities=priorities,
+                                  seed=arguments.seed).generate(systems_path, arguments.systems, arguments.components)
+
+        driver = LoadTestDriver(server, systems_path, output_path, arguments.keys, settings)
+        report = driver.run(arguments.minutes * 60)
+
+    server.stop()
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == '__main__':
+    main()
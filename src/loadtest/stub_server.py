@@ -0,0 +1,195 @@
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+@dataclass
+class LatencyDistribution:
+    """Latency of stub server responses in seconds.
+
+    kind - 'constant', 'uniform', 'exponential' or 'lognormal',
+    first, second - parameters of the distribution: value for constant, min and max for uniform,
+    mean for exponential, median and sigma for lognormal.
+    """
+
+    kind: str = 'constant'
+    first: float = 0
+    second: float = 0
+
+    @classmethod
+    def from_string(cls, value: str) -> 'LatencyDistribution':
+        """Creates distribution from string like 'lognormal:0.2:0.5' or 'constant:0.1'."""
+
+        kind, *params = value.split(':')
+        params = [float(param) for param in params] + [0, 0]
+
+        return cls(kind, params[0], params[1])
+
+    def sample(self) -> float:
+        if self.kind == 'uniform':
+            return random.uniform(self.first, self.second)
+        elif self.kind == 'exponential':
+            return random.expovariate(1 / self.first) if self.first > 0 else 0
+        elif self.kind == 'lognormal':
+            return random.lognormvariate(math.log(self.first), self.second) if self.first > 0 else 0
+
+        return self.first
+
+
+class TokenBucket:
+    """Rate limiter, which allows rate requests per second with bursts up to rate requests."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+
+        return False
+
+
+class AccuWeatherStubServer(ThreadingHTTPServer):
+
+    """
+    Local stub of AccuWeather API, which implements geoposition search and hourly forecasts endpoints.
+    Localization key is created from geo position rounded to grid_size degrees, so near components
+    share localization, like in the real API.
+
+    latency - distribution of response latency,
+    error_rate - part of requests, which are answered with 500 status code,
+    rate_limit - count of requests per second allowed for single API key, above it 429 is returned,
+    grid_size - size in degrees of single localization.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, latency: LatencyDistribution = None, error_rate: float = 0,
+                 rate_limit: float = None, grid_size: float = 0.1):
+        super().__init__(('127.0.0.1', port), AccuWeatherStubHandler)
+        self.latency = latency or LatencyDistribution()
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.grid_size = grid_size
+        self.calls = Counter()
+        self.status_codes = Counter()
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    @property
+    def host(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> 'AccuWeatherStubServer':
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def record(self, endpoint: str, status_code: int):
+        with self._lock:
+            self.calls[endpoint] += 1
+            self.status_codes[status_code] += 1
+
+    def is_rate_limited(self, apikey: str) -> bool:
+        if self.rate_limit is None:
+            return False
+
+        with self._lock:
+            if apikey not in self._buckets:
+                self._buckets[apikey] = TokenBucket(self.rate_limit)
+
+            return not self._buckets[apikey].take()
+
+    def get_localization_key(self, geo_position: str) -> str:
+        latitude, longitude = [float(value) for value in geo_position.split(',')]
+        row = int((latitude + 90) // self.grid_size)
+        column = int((longitude + 180) // self.grid_size)
+
+        return str(row * 10 ** 5 + column)
+
+    @staticmethod
+    def get_hourly_forecasts(loc_key: str, hours: int) -> list:
+        seed = int(loc_key) % 1000
+        first_hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        forecasts = []
+
+        for hour in range(hours):
+            date_time = first_hour + timedelta(hours=hour)
+            daylight = 6 <= date_time.hour < 18
+            temperature = 40 + seed % 30 + (8 if daylight else 0)
+
+            forecasts.append({
+                'DateTime': date_time.isoformat(),
+                'EpochDateTime': int(date_time.timestamp()),
+                'IsDaylight': daylight,
+                'Temperature': {'Value': temperature, 'Unit': 'F', 'UnitType': 18},
+                'RelativeHumidity': 50 + seed % 40,
+                'Wind': {'Speed': {'Value': float(seed % 20), 'Unit': 'km/h', 'UnitType': 7},
+                         'Direction': {'Degrees': seed % 360}},
+                'PrecipitationProbability': seed % 100
+            })
+
+        return forecasts
+
+
+class AccuWeatherStubHandler(BaseHTTPRequestHandler):
+
+    geoposition_path = '/locations/v1/cities/geoposition/search'
+    hourly_path = '/forecasts/v1/hourly/'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        time.sleep(self.server.latency.sample())
+
+        if url.path == self.geoposition_path:
+            endpoint = 'geoposition'
+        elif url.path.startswith(self.hourly_path):
+            endpoint = 'hourly'
+        else:
+            return self._send(404, 'not_found', dict(Message='Unknown endpoint'))
+
+        if self.server.is_rate_limited(params.get('apikey')):
+            return self._send(429, endpoint, dict(Message='Rate limit exceeded'))
+
+        if random.random() < self.server.error_rate:
+            return self._send(500, endpoint, dict(Message='Injected error'))
+
+        if endpoint == 'geoposition':
+            body = dict(Key=self.server.get_localization_key(params['q']))
+        else:
+            horizon, loc_key = url.path[len(self.hourly_path):].split('/')
+            body = self.server.get_hourly_forecasts(loc_key, int(horizon.replace('hour', '')))
+
+        self._send(200, endpoint, body)
+
+    def _send(self, status_code: int, endpoint: str, body):
+        content = json.dumps(body).encode()
+
+        self.server.record(endpoint, status_code)
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
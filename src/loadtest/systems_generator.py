@@ -0,0 +1,73 @@
+import os
+import random
+import uuid
+
+import xmltodict
+
+
+class SyntheticSystemsGenerator:
+
+    """
+    Generator of synthetic system .xml files. Components are placed around cluster centers
+    (cities), with normal distribution of distance from the center, and coordinates rounded to
+    two decimal places like in real system files, so many components share localizations.
+
+    clusters - count of cluster centers,
+    cluster_spread - standard deviation of component distance from cluster center in degrees,
+    update_periods - list of update periods, from which each system gets random one,
+    priorities - optional list of priorities, from which each system gets random one.
+    """
+
+    def __init__(self, clusters: int = 50, cluster_spread: float = 0.2,
+                 update_periods: list = None, seed: int = None, priorities: list = None):
+        self.random = random.Random(seed)
+        self.cluster_spread = cluster_spread
+        self.update_periods = update_periods or [30, 60, 300]
+        self.priorities = priorities
+        self.centers = [(self.random.uniform(-60, 70), self.random.uniform(-180, 180))
+                        for _ in range(clusters)]
+
+    def generate(self, directory: str, systems_count: int, components_per_system: int = 5) -> list:
+        """Saves systems_count system files to directory, and returns list of their paths."""
+
+        os.makedirs(directory, exist_ok=True)
+        file_paths = []
+
+        for index in range(systems_count):
+            file_path = os.path.join(directory, f"system{index}.xml")
+
+            with open(file_path, 'w') as file:
+                file.write(self._create_system_xml(components_per_system))
+
+            file_paths.append(file_path)
+
+        return file_paths
+
+    def _create_system_xml(self, components_count: int) -> str:
+        center = self.random.choice(self.centers)
+        system = {
+            'system': {
+                '@xmlns:xsi': 'http://www.w3.org/2001/XMLSchema-instance',
+                '@UUID': str(uuid.UUID(int=self.random.getrandbits(128))),
+                '@name': '',
+                '@description': '',
+                '@update_period': str(self.random.choice(self.update_periods)),
+                'component': [self._create_component(center, index) for index in range(components_count)]
+            }
+        }
+
+        if self.priorities:
+            system['system']['@priority'] = str(self.random.choice(self.priorities))
+
+        return xmltodict.unparse(system, pretty=True)
+
+    def _create_component(self, center: tuple, index: int) -> dict:
+        latitude = self.random.gauss(center[0], self.cluster_spread)
+        longitude = self.random.gauss(center[1], self.cluster_spread)
+
+        return {
+            '@UID': str(uuid.UUID(int=self.random.getrandbits(128))),
+            '@name': chr(ord('A') + index % 26),
+            '@longitude': f"{longitude:.2f}",
+            '@latitude': f"{latitude:.2f}"
+        }
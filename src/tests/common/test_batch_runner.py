@@ -0,0 +1,94 @@
+import time
+from threading import Lock
+
+import pytest
+
+from common.batch_runner import BatchRunner
+from converters.dataclasses_converters import System
+
+
+class ConcurrentCalls:
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = Lock()
+
+    def call(self, result):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        time.sleep(0.02)
+
+        with self.lock:
+            self.in_flight -= 1
+
+        return result
+
+
+class FakeResolver:
+    def __init__(self, calls: ConcurrentCalls):
+        self.calls = calls
+        self.request_count = 0
+        self.locations = {}
+
+    def get_localization_key(self, apikey: str, geo_position: str) -> str:
+        if geo_position not in self.locations:
+            self.request_count += 1
+            self.locations[geo_position] = self.calls.call(None if geo_position == 'bad' else geo_position[0])
+
+        return self.locations[geo_position]
+
+
+class FakeStore:
+    def __init__(self, calls: ConcurrentCalls):
+        self.calls = calls
+        self.fetch_count = 0
+
+    def get_call_count(self) -> int:
+        return self.fetch_count
+
+    def get_data(self, apikey: str, loc_key: str, now=None) -> list:
+        self.fetch_count += 1
+        return self.calls.call(None if loc_key == 'x' else [loc_key])
+
+
+class FakeManager:
+    def __init__(self, resolver: FakeResolver, geo_positions: list):
+        self.resolver = resolver
+        self.geo_positions = geo_positions
+
+    def get_geo_positions(self) -> list:
+        return self.geo_positions
+
+    def resolve(self) -> list:
+        loc_keys = [self.resolver.get_localization_key('key', geo) for geo in self.geo_positions]
+        return [dict(loc_key=loc_key) for loc_key in dict.fromkeys(loc_keys) if loc_key is not None]
+
+
+def test_unique_locations_of_all_systems_share_bounded_pool_and_systems_are_saved_in_order():
+    calls = ConcurrentCalls()
+    resolver, store = FakeResolver(calls), FakeStore(calls)
+    systems = [System(f"system{index}.xml", str(index), [], 60) for index in range(6)]
+    geo_positions = {system.filename: [f"{letter}{index},0" for letter in 'abcd' for index in range(2)]
+                     for system in systems}
+    geo_positions['system5.xml'] = ['bad', 'x1,0']
+    saved = []
+
+    def save(system: System, windows: dict) -> bool:
+        saved.append(system.filename)
+        return all(windows[comp_set['loc_key']] for comp_set in FakeManager(resolver, geo_positions[system.filename]).resolve())
+
+    summary = BatchRunner(resolver, store, 'key', workers=4).run(
+        systems, lambda system: [FakeManager(resolver, geo_positions[system.filename])], save)
+
+    assert saved == [system.filename for system in systems]
+    assert calls.max_in_flight == 4
+    assert summary.geopositions == 10
+    assert summary.geoposition_failures == 1
+    assert summary.geoposition_calls == 10
+    assert summary.locations == 5
+    assert summary.forecast_calls == 5
+    assert summary.fetch_failures == 1
+    assert (summary.written, summary.failed_systems) == (5, 1)
+    assert summary.wall_time == pytest.approx(summary.resolve_time + summary.fetch_time + summary.write_time, abs=0.002)
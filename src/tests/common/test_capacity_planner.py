@@ -0,0 +1,46 @@
+from common.capacity_planner import CapacityPlanner
+from common.forecast_store import ForecastStore
+from common.location_resolver import LocationResolver
+from converters.dataclasses_converters import System
+
+
+def create_system(filename: str, positions: list, update_period: int) -> System:
+    components = [dict(UID=f"{filename}-{index}", name='', latitude=latitude, longitude=longitude)
+                  for index, (latitude, longitude) in enumerate(positions)]
+    return System(filename, filename, components, update_period)
+
+
+def create_planner(**kwargs) -> CapacityPlanner:
+    systems = [create_system('first.xml', [('1.0', '1.0'), ('1.0', '1.0'), ('2.0', '2.0')], 60),
+               create_system('second.xml', [('2.0', '2.0'), ('3.0', '3.0')], 600)]
+    location_resolver = LocationResolver({'1.0,1.0': '100', '2.0,2.0': '100'})
+    api_keys = [dict(key='first-key', quota='50'), dict(key='second-key')]
+
+    return CapacityPlanner(systems, location_resolver, ForecastStore(max_age=3600), api_keys,
+                           ['temperature', 'day_light'], request_latency=1, **kwargs)
+
+
+def test_locations_are_deduplicated():
+    report = create_planner().get_report()
+
+    assert (report['components'], report['unique_coordinates'], report['unique_locations']) == (5, 3, 2)
+    assert (report['cached_locations'], report['unresolved_coordinates'], report['dedup_ratio']) == (1, 1, 2.5)
+
+
+def test_projected_calls_per_api_key():
+    report = create_planner().get_report()
+
+    assert report['forecast_refresh_interval'] == 3600
+    assert report['calls'] == dict(geoposition_once=1, forecasts_per_hour=2.0, forecasts_per_day=48, first_day=49)
+    assert report['api_keys'] == [dict(key='...-key', quota=50, calls_per_day=24, quota_utilization=0.49),
+                                  dict(key='...-key', quota=None, calls_per_day=24, quota_utilization=None)]
+    assert report['cycles_per_hour'] == 66.0
+    assert report['max_cycle_time'] == 0.33
+    assert report['output']['mean_file_bytes'] > 0
+
+
+def test_no_forecast_calls_without_forecast_sequences():
+    report = create_planner(fetches_forecasts=False).get_report()
+
+    assert report['calls']['forecasts_per_day'] == 0
+    assert report['forecast_store_bytes'] == 0
@@ -0,0 +1,136 @@
+import gzip
+import json
+import os
+from threading import Thread
+
+from common.forecast_archive import ForecastArchive
+from converters.dataclasses_converters import System
+from converters.xml_formatter import DictToXmlConverter
+
+DAY = 86400
+START = 1662408000
+
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def create_xml_data(uuid: str, temperature: int) -> str:
+    components = [{'@UID': uid, 'model_parameters': {'dynamic': {'time_sequence': {
+        '@sequence_type': 'temperature', '@rel_time': '21:00:00', '@data': str(temperature)}}}}
+        for uid in ('A', 'B')]
+    return DictToXmlConverter().get_xml_string_from_dictionary({'system': {'@UUID': uuid, 'component': components}})
+
+
+def create_archive(path: str, **kwargs) -> tuple:
+    clock = FakeClock(START)
+    return ForecastArchive(str(path), clock=clock, **kwargs), clock
+
+
+def test_query_returns_forecasts_of_system_in_time_range(tmp_path):
+    archive, clock = create_archive(tmp_path, partition='hour')
+    first, second = System('first.xml', '1', []), System('second.xml', '2', [])
+
+    for hour in range(3):
+        clock.now = START + hour * 3600
+        archive.append(first, create_xml_data('1', hour))
+        archive.append(second, create_xml_data('2', 100 + hour))
+
+    forecasts = archive.query('1', START + 3600, START + 3 * 3600)
+    assert [archived_at for archived_at, _ in forecasts] == [START + 3600, START + 2 * 3600]
+    assert forecasts[0][1] == create_xml_data('1', 1)
+
+    forecasts = archive.query('2', START, START + 3600, component_uid='B')
+    assert forecasts == [(START, {'UID': 'B', 'model_parameters': {'dynamic': {'time_sequence': {
+        'sequence_type': 'temperature', 'rel_time': '21:00:00', 'data': '100'}}}})]
+
+
+def test_expired_segments_are_removed(tmp_path):
+    archive, clock = create_archive(tmp_path, retention_days=2)
+    system = System('first.xml', '1', [])
+
+    for day in range(4):
+        clock.now = START + day * DAY
+        archive.append(system, create_xml_data('1', day))
+
+    archive.flush()
+    assert len(os.listdir(tmp_path)) == 6
+    assert [data for _, data in archive.query('1', START, START + 4 * DAY)] == [
+        create_xml_data('1', day) for day in (1, 2, 3)]
+
+
+def test_unknown_compression_falls_back_to_gzip(tmp_path):
+    archive, _ = create_archive(tmp_path, compression='lz4')
+    archive.append(System('first.xml', '1', []), create_xml_data('1', 0))
+    archive.flush()
+
+    assert archive.compression == 'gzip'
+    assert os.listdir(tmp_path) != [] and all(name.endswith(('.gz', '.idx')) for name in os.listdir(tmp_path))
+
+
+def test_forecasts_are_compressed_in_batches_and_read_with_codec_of_their_batch(tmp_path):
+    archive, clock = create_archive(tmp_path, batch_size=3, flush_interval=600)
+    first, second = System('first.xml', '1', []), System('second.xml', '2', [])
+
+    for minute in range(4):
+        clock.now = START + minute * 60
+        archive.append(first, create_xml_data('1', minute))
+        archive.append(second, create_xml_data('2', minute))
+
+    with open(tmp_path / '20220905.idx') as file:
+        records = [json.loads(line) for line in file]
+    assert len(records) == 6 and len({record['offset'] for record in records}) == 2
+
+    archive.flush()
+    assert sorted(os.listdir(tmp_path)) == ['20220905.idx', '20220905.xml.gz']
+    assert {record['codec'] for record in records} == {'gzip'}
+
+    archive.compression = 'zstd'
+    assert [data for _, data in archive.query('2', START, START + 3600)] == [
+        create_xml_data('2', minute) for minute in range(4)]
+
+
+def test_not_full_batch_is_written_after_flush_interval_and_old_records_are_readable(tmp_path):
+    archive, clock = create_archive(tmp_path, batch_size=10, flush_interval=60)
+    system = System('first.xml', '1', [])
+    archive.append(system, create_xml_data('1', 0))
+    assert os.listdir(tmp_path) == []
+
+    clock.now = START + 60
+    archive.append(system, create_xml_data('1', 1))
+    assert sorted(os.listdir(tmp_path)) == ['20220905.idx', '20220905.xml.gz']
+
+    content = gzip.compress(create_xml_data('1', 2).encode())
+    offset = os.path.getsize(tmp_path / '20220905.xml.gz')
+    with open(tmp_path / '20220905.xml.gz', 'ab') as file:
+        file.write(content)
+    with open(tmp_path / '20220905.idx', 'a') as file:
+        file.write(json.dumps(dict(uuid='1', filename='first.xml', archived_at=START + 120,
+                                   offset=offset, length=len(content))) + '\n')
+
+    assert [data for _, data in archive.query('1', START, START + 3600)] == [
+        create_xml_data('1', hour) for hour in range(3)]
+
+
+def test_batches_appended_by_many_threads_are_all_readable(tmp_path):
+    archive, clock = create_archive(tmp_path, batch_size=4)
+    systems = [System(f'{index}.xml', str(index), []) for index in range(8)]
+
+    def append(system: System):
+        for temperature in range(10):
+            archive.append(system, create_xml_data(system.uuid, temperature))
+
+    threads = [Thread(target=append, args=(system,)) for system in systems]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for system in systems:
+        forecasts = archive.query(system.uuid, START, START + 1)
+        assert sorted(forecast for _, forecast in forecasts) == sorted(create_xml_data(system.uuid, temperature)
+                                                                       for temperature in range(10))
@@ -0,0 +1,50 @@
+import time
+
+from common.forecast_notifier import ForecastNotifier, ForecastSubscriber
+
+
+def wait_for(condition, timeout: float = 2):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def create_notifier(tmp_path, **kwargs) -> ForecastNotifier:
+    return ForecastNotifier(str(tmp_path / 'forecasts.sock'), **kwargs).start()
+
+
+def test_subscriber_receives_published_events(tmp_path):
+    notifier = create_notifier(tmp_path)
+    subscriber = ForecastSubscriber(notifier.socket_path, timeout=2)
+    wait_for(lambda: notifier.get_stats()['subscribers'] == 1)
+
+    notifier.publish(dict(uuid='1', path='/out/first_forecast.xml', base_time='2022-09-05T22:37:08', hash='abc'))
+    notifier.publish(dict(uuid='2', path='/out/second_forecast.xml', base_time='2022-09-05T22:37:09', hash='def'))
+
+    assert subscriber.receive() == dict(uuid='1', path='/out/first_forecast.xml', base_time='2022-09-05T22:37:08',
+                                        hash='abc', sequence=1)
+    assert subscriber.receive()['sequence'] == 2
+
+    notifier.stop()
+    assert subscriber.receive() is None
+    subscriber.close()
+
+
+def test_oldest_events_are_dropped_for_slow_subscriber(tmp_path):
+    notifier = create_notifier(tmp_path, queue_size=2)
+    subscriber = ForecastSubscriber(notifier.socket_path, timeout=2)
+    wait_for(lambda: notifier.get_stats()['subscribers'] == 1)
+
+    for number in range(6):
+        notifier.publish(dict(uuid=str(number), payload='x' * 1024 * 1024))
+
+    assert notifier.get_stats()['published'] == 6
+    assert notifier.get_stats()['dropped'] >= 3
+
+    sequences = [subscriber.receive()['sequence']]
+    while sequences[-1] != 6:
+        sequences.append(subscriber.receive()['sequence'])
+    assert len(sequences) <= 3
+
+    notifier.stop()
+    subscriber.close()
@@ -0,0 +1,96 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from common.forecast_store import ForecastStore
+
+START = datetime(2022, 9, 5, 20, 30, tzinfo=timezone.utc)
+
+
+def create_hourly_data(hours: int) -> list:
+    first_hour = START.replace(minute=0) + timedelta(hours=1)
+    return [{'DateTime': (first_hour + timedelta(hours=hour)).isoformat(),
+             'Temperature': {'Value': hour, 'Unit': 'C'}} for hour in range(hours)]
+
+
+class FakeForecastsRequest:
+    calls = 0
+    hours = 72
+
+    def __init__(self, details: bool = False):
+        self.details = details
+
+    def get_data(self, apikey: str, localization_id: str) -> list:
+        FakeForecastsRequest.calls += 1
+        return create_hourly_data(72)
+
+
+def create_store(**kwargs) -> ForecastStore:
+    FakeForecastsRequest.calls = 0
+    return ForecastStore(FakeForecastsRequest, **kwargs)
+
+
+def test_window_is_sliced_relative_to_now():
+    store = create_store(max_age=10800)
+
+    window = store.get_data('key', '123', START)
+    assert len(window) == 12
+    assert window[0]['DateTime'] == '2022-09-05T21:00:00+00:00'
+
+    window = store.get_data('key', '123', START + timedelta(hours=2))
+    assert window[0]['DateTime'] == '2022-09-05T23:00:00+00:00'
+    assert FakeForecastsRequest.calls == 1
+
+
+def test_refetch_when_data_is_too_old():
+    store = create_store(max_age=3600)
+
+    store.get_data('key', '123', START)
+    store.get_data('key', '123', START + timedelta(minutes=59))
+    assert FakeForecastsRequest.calls == 1
+
+    store.get_data('key', '123', START + timedelta(hours=1))
+    assert FakeForecastsRequest.calls == 2
+
+
+def test_refetch_when_remaining_horizon_is_too_short():
+    store = create_store(max_age=10 ** 6, min_remaining_hours=12)
+
+    store.get_data('key', '123', START)
+    store.get_data('key', '123', START + timedelta(hours=60))
+    assert FakeForecastsRequest.calls == 1
+
+    store.get_data('key', '123', START + timedelta(hours=61))
+    assert FakeForecastsRequest.calls == 2
+
+
+def test_each_localization_is_fetched_separately():
+    store = create_store()
+
+    store.get_data('key', '123', START)
+    store.get_data('key', '456', START)
+    store.get_data('key', '123', START)
+
+    assert FakeForecastsRequest.calls == 2
+
+
+def test_concurrent_fetches_are_counted_and_provider_calls_are_taken_from_provider():
+    store = create_store()
+
+    with ThreadPoolExecutor(16) as executor:
+        list(executor.map(lambda index: store.get_data('key', str(index), START), range(200)))
+
+    assert store.fetch_count == 200
+    assert store.get_call_count() == 200
+
+    class FakeProvider:
+        def get_data(self, apikey: str, loc_key: str, hours: int, details: bool = False) -> list:
+            return create_hourly_data(12)
+
+        def get_call_count(self) -> int:
+            return 2
+
+    store = ForecastStore(FakeForecastsRequest, provider=FakeProvider())
+    store.get_data('key', '123', START)
+
+    assert store.fetch_count == 1
+    assert store.get_call_count() == 2
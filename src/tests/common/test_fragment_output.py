@@ -0,0 +1,90 @@
+import glob
+import os
+
+from common.file_manger import SystemsXmlFileManager
+from common.fragment_output import FragmentOutputReader, FragmentOutputWriter
+from converters.dataclasses_converters import System
+from converters.xml_formatter import DictToXmlConverter
+
+
+def create_component(uid: str, base_time: str, temperatures: str) -> dict:
+    return {'@UID': uid,
+            'model_parameters': {'dynamic': {'time_sequence': [
+                {'@sequence_type': 'temperature', '@base_time': base_time,
+                 '@rel_time': '23:00:00 00:00:00', '@data': temperatures},
+                {'@sequence_type': 'day_light', '@base_time': base_time,
+                 '@rel_time': '23:00:00 00:00:00', '@data': 'False False'}]}}}
+
+
+def create_data(uuid: str, components: list) -> dict:
+    return {'system': {'@xmlns:xsi': 'http://www.w3.org/2001/XMLSchema-instance', '@UUID': uuid,
+                       'component': components}}
+
+
+def test_shared_sequences_are_written_once_and_flattened_to_files_layout(tmp_path):
+    writer = FragmentOutputWriter(str(tmp_path))
+    file_manager = SystemsXmlFileManager(fragment_writer=writer)
+    first = create_data('1', [create_component('a', '2022-09-05T22:37:08', '14 13'),
+                              create_component('b', '2022-09-05T22:37:08', '10 9')])
+    second = create_data('2', [create_component('c', '2022-09-05T22:38:00', '14 13')])
+
+    assert file_manager.save_data(System('system1.xml', '1', None, None), first, str(tmp_path)) is None
+    file_manager.save_data(System('system2.xml', '2', None, None), second, str(tmp_path))
+
+    assert writer.get_stats() == dict(written=2, reused=1, removed=0, referenced=2)
+    assert sorted(os.listdir(tmp_path)) == ['fragments', 'system1_forecast.index.xml', 'system2_forecast.index.xml']
+
+    reader = FragmentOutputReader(str(tmp_path))
+    converter = DictToXmlConverter()
+    assert reader.flatten(str(tmp_path / 'system1_forecast.index.xml')) == converter.get_xml_string_from_dictionary(first)
+    assert reader.flatten(str(tmp_path / 'system2_forecast.index.xml')) == converter.get_xml_string_from_dictionary(second)
+
+    destination = tmp_path / 'flat'
+    destination.mkdir()
+    assert [os.path.basename(path) for path in reader.flatten_all(str(destination))] == [
+        'system1_forecast.xml', 'system2_forecast.xml']
+
+
+def test_unreferenced_fragments_are_removed_after_retention(tmp_path):
+    now = [os.path.getmtime(tmp_path)]
+    writer = FragmentOutputWriter(str(tmp_path), retention=60, clock=lambda: now[0])
+
+    writer.get_index('system1.xml', create_data('1', [create_component('a', '2022-09-05T22:37:08', '14 13')]))
+    writer.get_index('system1.xml', create_data('1', [create_component('a', '2022-09-05T23:37:08', '12 11')]))
+    writer.collect_garbage()
+    assert writer.get_stats()['removed'] == 0
+
+    now[0] += 3600
+    writer.collect_garbage()
+
+    assert writer.get_stats()['removed'] == 1
+    assert len(glob.glob(str(tmp_path / 'fragments' / '*' / '*.xml'))) == 1
+
+
+def test_fragments_referenced_by_index_on_disk_are_kept_after_restart(tmp_path):
+    now = [os.path.getmtime(tmp_path)]
+    writer = FragmentOutputWriter(str(tmp_path), retention=60, clock=lambda: now[0])
+    SystemsXmlFileManager(fragment_writer=writer).save_data(
+        System('system1.xml', '1', None, None), create_data('1', [create_component('a', 'x', '14 13')]), str(tmp_path))
+    writer.get_index('system2.xml', create_data('2', [create_component('b', 'x', '10 9')]))
+
+    now[0] += 3600
+    restarted = FragmentOutputWriter(str(tmp_path), retention=60, clock=lambda: now[0])
+    restarted.get_index('system3.xml', create_data('3', [create_component('c', 'x', '5 5')]))
+
+    assert restarted.get_stats() == dict(written=1, reused=0, removed=1, referenced=2)
+    assert FragmentOutputReader(str(tmp_path)).get_data(str(tmp_path / 'system1_forecast.index.xml')) == create_data(
+        '1', [create_component('a', 'x', '14 13')])
+
+
+def test_reused_fragment_is_touched(tmp_path):
+    writer = FragmentOutputWriter(str(tmp_path), retention=60)
+    data = create_data('1', [create_component('a', 'x', '14 13')])
+    writer.get_index('system1.xml', data)
+    path = glob.glob(str(tmp_path / 'fragments' / '*' / '*.xml'))[0]
+    os.utime(path, (0, 0))
+
+    writer.get_index('system2.xml', data)
+
+    assert writer.get_stats()['reused'] == 1
+    assert os.path.getmtime(path) > 0
@@ -0,0 +1,124 @@
+import time
+
+from common.forecast_store import ForecastStore
+from common.init_module import Module
+from common.state_snapshot import StateSnapshot
+from common.tracing import tracer
+from weather_requests.request import DEFAULT_ACCUWEATHER_HOST, Request, RequestCreator
+
+SYSTEM_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<system UUID="00000000-0000-2000-8000-00805F9B34FB" update_period="60">
+    <component UID="0df319f4-9d79-4e4f-b5c5-df1c28b49f57" name="A" longitude="-21.90" latitude="64.13">
+    </component>
+</system>"""
+
+
+def create_module(tmp_path, settings: dict, mode: str = 'single_time') -> Module:
+    systems_path = tmp_path / 'systems'
+    systems_path.mkdir(exist_ok=True)
+    (systems_path / 'system1.xml').write_text(SYSTEM_XML)
+    output_path = tmp_path / 'forecasts'
+    output_path.mkdir(exist_ok=True)
+
+    return Module(dict(entry_path=str(systems_path), output_path=str(output_path), mode=mode,
+                       api_key='key', settings=settings))
+
+
+def test_shared_request_state_is_reset_when_module_stops(tmp_path):
+    module = create_module(tmp_path, dict(concurrency_limiter=None, tracing=None,
+                                          accuweather=dict(host='http://127.0.0.1:1')))
+
+    assert Request.key_pool is module.key_pool
+    assert Request.concurrency_limiter is module.concurrency_limiter
+    assert RequestCreator.host == 'http://127.0.0.1:1'
+    assert tracer.enabled
+
+    module.stop()
+
+    assert Request.key_pool is None
+    assert Request.concurrency_limiter is None
+    assert Request.cassette is None
+    assert RequestCreator.host == DEFAULT_ACCUWEATHER_HOST
+    assert not tracer.enabled
+
+
+def test_notifier_and_read_api_are_not_started_in_single_time_run(tmp_path):
+    module = create_module(tmp_path, dict(notifier=None, read_api=dict(port='0')))
+
+    assert module.notifier is None
+    assert module.read_api is None
+    assert not (tmp_path / 'forecasts' / '.forecasts.sock').exists()
+
+
+def test_shared_table_is_closed_when_module_stops(tmp_path):
+    module = create_module(tmp_path, dict(shared_table=None))
+    module.stop()
+
+    assert module.shared_table.table.closed
+
+
+def test_pipeline_is_not_started_when_batch_run_takes_precedence(tmp_path):
+    module = create_module(tmp_path, dict(pipeline=dict(processes='false'), batch=None))
+
+    assert module.batch_runner is not None
+    assert module.pipeline is None
+
+
+def test_single_time_run_stops_pipeline_and_writers(tmp_path):
+    module = create_module(tmp_path, dict(pipeline=dict(processes='false'), write_behind=None))
+    module.forecasts_managers = []
+    module.run()
+
+    assert module.stop_event.is_set()
+    assert not any(thread.is_alive() for _, thread in module.pipeline._threads)
+    assert not any(writer.is_alive() for writer in module.write_queue._writers)
+
+
+class LocationFreeManager:
+    def resolve(self) -> list:
+        return []
+
+    def is_resolved(self) -> bool:
+        return True
+
+
+class LocationFreeManagerCreator:
+    def get_forecast_manager(self, system):
+        return LocationFreeManager()
+
+
+def test_location_free_system_is_regenerated_by_own_timer_after_initial_delay(tmp_path):
+    (tmp_path / 'forecasts').mkdir()
+    StateSnapshot(str(tmp_path / 'forecasts' / '.state_snapshot.json')).save(
+        ForecastStore(), {'system1.xml': time.time() - 0.5})
+    module = create_module(tmp_path, dict(location_scheduling=None, warm_restart=dict(jitter='0')), mode='continous')
+    module.systems[0].update_period = 1
+    module.forecasts_managers = [LocationFreeManagerCreator()]
+    cycles = []
+    module._get_data_and_save_to_file = lambda system, windows=None: cycles.append((time.monotonic(), windows))
+
+    start = time.monotonic()
+    module.run()
+    time.sleep(1.8)
+    module.stop()
+
+    delays = [cycle_start - start for cycle_start, _ in cycles]
+    assert len(delays) == 2 and 0.4 < delays[0] < 0.8 and 1.4 < delays[1] < 1.8
+    assert all(windows is None for _, windows in cycles)
+
+
+def test_dry_run_creates_no_output_sinks_and_stops_module(tmp_path, capsys):
+    module = create_module(tmp_path, dict(output=dict(layout='fragments', templates='true'), concurrency_limiter=None,
+                                          write_behind=None, archive=None), mode='dry_run')
+
+    assert module.fragment_writer is None
+    assert module.output_templates is None
+    assert module.write_queue is None
+    assert module.archive is None
+
+    module.run()
+
+    assert '"api_keys"' in capsys.readouterr().out
+    assert module.stop_event.is_set()
+    assert Request.concurrency_limiter is None
+    assert list((tmp_path / 'forecasts').iterdir()) == []
@@ -0,0 +1,52 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import weather_requests.request as req
+from common.location_resolver import LocationResolver
+
+
+def patch_geoposition_request(monkeypatch, answers: dict) -> list:
+    calls = []
+
+    def get_data(self, apikey: str, geo_position: str) -> dict:
+        calls.append(geo_position)
+        time.sleep(0.05)
+        loc_key = answers.get(geo_position)
+        return dict(Key=loc_key) if loc_key is not None else None
+
+    monkeypatch.setattr(req.AccuWeatherGeopositionRequest, 'get_data', get_data)
+    return calls
+
+
+def test_resolved_and_seeded_geo_positions_are_served_from_cache(monkeypatch):
+    calls = patch_geoposition_request(monkeypatch, {'64.13,-21.90': '190390'})
+    resolver = LocationResolver({'65.68,-18.09': '190391'})
+
+    assert resolver.get_localization_key('key', '64.13,-21.90') == '190390'
+    assert resolver.get_localization_key('key', '64.13,-21.90') == '190390'
+    assert resolver.get_localization_key('key', '65.68,-18.09') == '190391'
+
+    assert calls == ['64.13,-21.90']
+    assert resolver.request_count == 1
+    assert resolver.get_geo_position('190391') == '65.68,-18.09'
+    assert resolver.get_locations() == {'65.68,-18.09': '190391', '64.13,-21.90': '190390'}
+
+
+def test_failed_geo_position_is_requested_again():
+    resolver = LocationResolver()
+    resolver._request_localization_key = lambda apikey, geo_position: None
+
+    assert resolver.get_localization_key('key', '0,0') is None
+    assert resolver.get_cached_localization_key('0,0') is None
+
+
+def test_concurrent_calls_for_the_same_geo_position_send_single_request(monkeypatch):
+    calls = patch_geoposition_request(monkeypatch, {'64.13,-21.90': '190390', '65.68,-18.09': '190391'})
+    resolver = LocationResolver()
+
+    with ThreadPoolExecutor(8) as executor:
+        loc_keys = list(executor.map(lambda index: resolver.get_localization_key(
+            'key', ['64.13,-21.90', '65.68,-18.09'][index % 2]), range(16)))
+
+    assert loc_keys == ['190390', '190391'] * 8
+    assert sorted(calls) == ['64.13,-21.90', '65.68,-18.09']
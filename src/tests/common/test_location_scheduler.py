@@ -0,0 +1,111 @@
+from common.location_scheduler import LocationScheduler
+from converters.dataclasses_converters import System
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeForecastStore:
+    def __init__(self):
+        self.windows = {}
+        self.calls = []
+        self.fetch_count = 0
+
+    def get_call_count(self) -> int:
+        return self.fetch_count
+
+    def get_data(self, apikey: str, loc_key: str, now=None) -> list:
+        self.calls.append(loc_key)
+        return self.windows.get(loc_key)
+
+
+def create_scheduler(store: FakeForecastStore, clock: FakeClock) -> LocationScheduler:
+    return LocationScheduler(store, 'key', default_period=60, workers=2, clock=clock)
+
+
+def test_shared_location_is_refreshed_once_at_the_shortest_period():
+    store, clock = FakeForecastStore(), FakeClock()
+    store.windows = {'a': [{'DateTime': '1'}], 'b': [{'DateTime': '2'}]}
+    scheduler = create_scheduler(store, clock)
+    first, second = System('first.xml', '1', [], 30), System('second.xml', '2', [], 300)
+
+    scheduler.subscribe(first, ['a'])
+    scheduler.subscribe(second, ['a', 'b'])
+    updates = scheduler.run_due()
+
+    assert sorted(store.calls) == ['a', 'b']
+    assert updates == [(first, {'a': store.windows['a']}), (second, store.windows)]
+    assert updates[0][1]['a'] is updates[1][1]['a']
+    assert scheduler.get_next_run() == 30
+
+    clock.now = 30
+    assert scheduler.run_due() == []
+    assert sorted(store.calls) == ['a', 'a', 'b']
+
+    scheduler.stop()
+
+
+def test_only_subscribers_of_changed_window_are_regenerated():
+    store, clock = FakeForecastStore(), FakeClock()
+    store.windows = {'a': [{'DateTime': '1'}], 'b': [{'DateTime': '2'}]}
+    scheduler = create_scheduler(store, clock)
+    first, second = System('first.xml', '1', [], 60), System('second.xml', '2', [], 60)
+    scheduler.subscribe(first, ['a'])
+    scheduler.subscribe(second, ['b'])
+    scheduler.run_due()
+
+    clock.now = 60
+    store.windows = {'a': [{'DateTime': '3'}]}
+
+    assert scheduler.run_due() == [(first, {'a': [{'DateTime': '3'}]})]
+
+    stats = scheduler.get_stats()
+    assert stats['refreshes'] == 4
+    assert stats['updates'] == 3
+    assert stats['failures'] == 1
+    assert stats['regenerations'] == 3
+
+    scheduler.stop()
+
+
+def test_new_subscriber_of_known_location_gets_its_window_without_refresh():
+    store, clock = FakeForecastStore(), FakeClock()
+    store.windows = {'a': [{'DateTime': '1'}]}
+    scheduler = create_scheduler(store, clock)
+    scheduler.subscribe(System('first.xml', '1', [], 60), ['a'])
+    scheduler.run_due()
+
+    clock.now = 10
+    second = System('second.xml', '2', [], 60)
+    scheduler.subscribe(second, ['a'])
+    scheduler.subscribe(second, ['a'])
+
+    assert scheduler.run_due() == [(second, {'a': [{'DateTime': '1'}]})]
+    assert store.calls == ['a']
+
+    scheduler.subscribe(second, [])
+    assert scheduler.get_stats()['subscriptions'] == 1
+
+    scheduler.stop()
+
+
+def test_retried_system_is_regenerated_in_the_next_tick():
+    store, clock = FakeForecastStore(), FakeClock()
+    store.windows = {'a': [{'DateTime': '1'}]}
+    scheduler = create_scheduler(store, clock)
+    system = System('first.xml', '1', [], 60)
+    scheduler.subscribe(system, ['a'])
+    scheduler.run_due()
+
+    scheduler.retry(system)
+    scheduler.retry(System('unknown.xml', '2', [], 60))
+
+    assert scheduler.run_due() == [(system, {'a': [{'DateTime': '1'}]})]
+    assert store.calls == ['a']
+
+    scheduler.stop()
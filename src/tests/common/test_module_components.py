@@ -0,0 +1,30 @@
+from common.module_components import ModuleComponentsCreator
+
+
+def test_output_sinks_are_not_created_in_dry_run(tmp_path):
+    settings = dict(write_behind=None, archive=None, shared_table=None, pipeline=None,
+                    output=dict(layout='fragments', templates='true'))
+    components = ModuleComponentsCreator(settings, str(tmp_path), 'dry_run')
+
+    assert components.get_write_queue() is None
+    assert components.get_forecast_archive() is None
+    assert components.get_shared_forecast_table() is None
+    assert components.get_fragment_writer() is None
+    assert components.get_output_templates() is None
+    assert components.get_pipeline(None, None, None) is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_services_are_created_only_in_continous_mode(tmp_path):
+    settings = dict(notifier=None, read_api=dict(port='0'))
+
+    components = ModuleComponentsCreator(settings, str(tmp_path), 'single_time')
+    assert components.get_forecast_notifier() is None
+    assert components.get_read_api() is None
+
+    components = ModuleComponentsCreator(settings, str(tmp_path), 'continous')
+    notifier, read_api = components.get_forecast_notifier(), components.get_read_api()
+    assert notifier is not None and read_api is not None
+
+    notifier.stop()
+    read_api.stop()
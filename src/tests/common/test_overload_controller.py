@@ -0,0 +1,63 @@
+from common.overload_controller import DEFER, RUN, SHED, OverloadController
+from converters.dataclasses_converters import System
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def create_system(priority: int = None) -> System:
+    return System('system.xml', 'uuid', [], 60, priority)
+
+
+def test_low_priority_is_deferred_before_normal_and_critical_runs_always():
+    controller = OverloadController(max_cycles=4, critical_priority=2, clock=FakeClock())
+
+    assert [controller.admit(create_system(0), 60) for _ in range(3)] == [RUN, RUN, DEFER]
+    assert [controller.admit(create_system(1), 60) for _ in range(3)] == [RUN, RUN, DEFER]
+    assert controller.admit(create_system(2), 60) == RUN
+
+    stats = controller.get_stats()
+    assert stats['in_flight'] == 5
+    assert stats['deferred'] == 2
+    assert stats['priorities'][0]['deferred'] == 1
+
+
+def test_deferred_cycle_is_shed_when_deadline_cannot_be_met():
+    clock = FakeClock()
+    controller = OverloadController(max_cycles=1, smoothing=1, clock=clock)
+    controller.admit(create_system(), 60)
+    controller.complete(create_system(), 10, 60)
+    controller.admit(create_system(), 60)
+
+    assert controller.admit(create_system(0), 60) == DEFER
+    assert controller.admit(create_system(0), 60, deferred=True) == DEFER
+
+    clock.now = 55
+    assert controller.admit(create_system(0), 60, deferred=True) == SHED
+
+    stats = controller.get_stats()['priorities'][0]
+    assert stats['deferred'] == 1
+    assert stats['shed'] == 1
+
+
+def test_missed_deadlines_reduce_admission_but_one_cycle_can_always_run():
+    clock = FakeClock()
+    controller = OverloadController(max_cycles=8, critical_priority=2, smoothing=1, clock=clock)
+
+    controller.admit(create_system(), 60)
+    clock.now = 70
+    controller.complete(create_system(), 70, 60)
+    controller.skip(create_system(), 2)
+
+    assert controller.admit(create_system(), 200) == RUN
+    assert controller.admit(create_system(), 200) == DEFER
+
+    stats = controller.get_stats()
+    assert stats['missed_deadlines'] == 1
+    assert stats['skipped'] == 2
+    assert stats['miss_rate'] == 1
@@ -0,0 +1,77 @@
+import time
+from threading import Event
+
+import pytest
+
+from common.pipeline import Pipeline, PipelineStage, SystemCycle, serialize_cycle
+from converters.dataclasses_converters import System
+from converters.xml_formatter import DictToXmlConverter
+
+
+def test_items_pass_all_stages_and_stages_overlap():
+    pipeline = Pipeline([PipelineStage('fetch', lambda item: time.sleep(0.05) or item + 1, workers=4),
+                         PipelineStage('format', lambda item: item * 2, workers=1)]).start()
+
+    start = time.monotonic()
+    futures = [pipeline.submit(item) for item in range(8)]
+    results = [future.result(timeout=5) for future in futures]
+    elapsed = time.monotonic() - start
+    pipeline.stop()
+
+    assert results == [(item + 1) * 2 for item in range(8)]
+    assert elapsed < 8 * 0.05
+
+    stats = pipeline.get_stats()
+    assert stats['fetch']['processed'] == 8
+    assert stats['format']['processed'] == 8
+    assert stats['fetch']['utilization'] > stats['format']['utilization']
+
+
+def test_error_fails_only_its_item_and_none_finishes_item_early():
+    def fetch(item):
+        if item == 1:
+            raise ValueError('upstream error')
+        return None if item == 2 else item
+
+    pipeline = Pipeline([PipelineStage('fetch', fetch), PipelineStage('format', lambda item: item * 10)]).start()
+    futures = [pipeline.submit(item) for item in range(4)]
+
+    assert futures[0].result(timeout=5) == 0
+    with pytest.raises(ValueError):
+        futures[1].result(timeout=5)
+    assert futures[2].result(timeout=5) is None
+    assert futures[3].result(timeout=5) == 30
+    pipeline.stop()
+
+    stats = pipeline.get_stats()
+    assert stats['fetch']['errors'] == 1
+    assert stats['format']['processed'] == 2
+
+
+def test_full_queue_blocks_previous_stage():
+    release = Event()
+    pipeline = Pipeline([PipelineStage('fetch', lambda item: item, queue_size=1),
+                         PipelineStage('write', lambda item: release.wait() and item, queue_size=1)]).start()
+
+    futures = [pipeline.submit(item) for item in range(4)]
+    time.sleep(0.1)
+
+    stats = pipeline.get_stats()
+    assert stats['fetch']['processed'] == 3
+    assert stats['fetch']['queue_depth'] == 1
+    assert stats['write']['queue_depth'] == 1
+    assert pipeline.capacity == 4
+
+    release.set()
+    assert [future.result(timeout=5) for future in futures] == [0, 1, 2, 3]
+    pipeline.stop()
+
+
+def test_serialize_stage_in_process_pool():
+    data = {'system': {'@UUID': '1', 'component': [{'@UID': 'a'}]}}
+    pipeline = Pipeline([PipelineStage('serialize', serialize_cycle, processes=True)]).start()
+
+    cycle = pipeline.submit(SystemCycle(System('system.xml', '1', [], 60), data=data)).result(timeout=60)
+    pipeline.stop()
+
+    assert cycle.xml_data == DictToXmlConverter().get_xml_string_from_dictionary(data)
@@ -0,0 +1,53 @@
+import json
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from common.read_api import ForecastReadApi
+from converters.dataclasses_converters import System
+
+DATA = {'system': {'@UUID': '1', 'component': [
+    {'@UID': uid, 'model_parameters': {'dynamic': {'time_sequence': {
+        '@sequence_type': 'temperature', '@rel_time': '21:00:00 22:00:00', '@data': data}}}}
+    for uid, data in (('A', '11 12'), ('B', '8 9'))]}}
+
+
+def get(url: str, headers: dict = None):
+    try:
+        with urlopen(Request(url, headers=headers or {})) as response:
+            return response.status, response.headers, response.read()
+    except HTTPError as error:
+        return error.code, error.headers, b''
+
+
+def test_latest_forecasts_are_served_as_xml_and_json():
+    read_api = ForecastReadApi(port=0).start()
+    read_api.update(System('first.xml', '1', []), DATA)
+
+    status, headers, content = get(f"{read_api.url}/systems/1")
+    assert status == 200 and headers['Content-Type'] == 'application/xml'
+    assert b'<system UUID="1">' in content
+
+    status, _, content = get(f"{read_api.url}/components/B.json")
+    assert json.loads(content) == {'component': {'UID': 'B', 'model_parameters': {'dynamic': {'time_sequence': {
+        'sequence_type': 'temperature', 'rel_time': '21:00:00 22:00:00', 'data': '8 9'}}}}}
+
+    assert json.loads(get(f"{read_api.url}/systems")[2]) == ['1']
+    assert get(f"{read_api.url}/systems/2")[0] == 404
+
+    read_api.stop()
+
+
+def test_conditional_get_with_etag():
+    read_api = ForecastReadApi(port=0).start()
+    system = System('first.xml', '1', [])
+    read_api.update(system, DATA)
+
+    _, headers, _ = get(f"{read_api.url}/systems/1", {'Accept': 'application/json'})
+    etag = headers['ETag']
+    assert get(f"{read_api.url}/systems/1?format=json", {'If-None-Match': etag})[0] == 304
+
+    read_api.update(system, {'system': dict(DATA['system'], component=DATA['system']['component'][:1])})
+    status, headers, _ = get(f"{read_api.url}/systems/1.json", {'If-None-Match': etag})
+    assert status == 200 and headers['ETag'] != etag
+
+    read_api.stop()
@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta, timezone
+
+from common.refresh_planner import RefreshPlanner
+
+START = datetime(2022, 9, 5, 20, 30, tzinfo=timezone.utc)
+
+
+def create_hourly_data(temperature: int) -> list:
+    return [{'DateTime': f'2022-09-05T{hour}:00:00+00:00',
+             'Temperature': {'Value': temperature, 'Unit': 'C'}} for hour in range(21, 24)]
+
+
+def test_unknown_localization_is_stale():
+    assert RefreshPlanner().is_stale('123', START) == True
+
+
+def test_localization_is_fresh_until_expected_publication():
+    planner = RefreshPlanner(default_publish_period=3600, lead_time=60)
+    planner.record('123', create_hourly_data(10), START)
+
+    assert planner.is_stale('123', START + timedelta(minutes=58)) == False
+    assert planner.is_stale('123', START + timedelta(minutes=59)) == True
+
+
+def test_publish_period_follows_observed_changes():
+    planner = RefreshPlanner(default_publish_period=3600, min_publish_period=900,
+                             max_publish_period=21600, smoothing=1)
+
+    planner.record('123', create_hourly_data(10), START)
+    planner.record('123', create_hourly_data(10), START + timedelta(hours=1))
+    planner.record('123', create_hourly_data(11), START + timedelta(hours=3))
+
+    state = planner.get_state('123')
+    assert state.publish_period == 3 * 3600
+    assert state.changed_at == START + timedelta(hours=3)
+
+
+def test_select_only_stale_localizations():
+    planner = RefreshPlanner(default_publish_period=3600)
+    planner.record('123', create_hourly_data(10), START)
+
+    assert planner.select_stale(['123', '456'], START) == ['456']
@@ -0,0 +1,121 @@
+import math
+from threading import Thread
+
+from common.shared_forecast_table import SharedForecastTable, SharedForecastTableReader
+from converters.dataclasses_converters import System
+
+SYSTEM = System('first.xml', '1', [])
+
+
+def create_data(temperatures: dict, daylight: str = 'True False') -> dict:
+    return {'system': {'@UUID': '1', 'component': [
+        {'@UID': uid, 'model_parameters': {'dynamic': {'time_sequence': [
+            {'@sequence_type': 'temperature', '@base_time': '2022-09-05T22:37:08',
+             '@rel_time': '23:00:00 00:00:00', '@data': data},
+            {'@sequence_type': 'day_light', '@base_time': '2022-09-05T22:37:08',
+             '@rel_time': '23:00:00 00:00:00', '@data': daylight}]}}}
+        for uid, data in temperatures.items()]}}
+
+
+def test_reader_gets_rows_updated_in_place(tmp_path):
+    path = str(tmp_path / 'forecasts.table')
+    table = SharedForecastTable(path, capacity=4, hours=3)
+    table.update(SYSTEM, create_data({'A': '11 12', 'B': '-3 -4'}))
+
+    reader = SharedForecastTableReader(path)
+    row = reader.read('B')
+    assert (row.uid, row.base_time, row.rel_times, row.temperature, row.daylight, row.version) == (
+        'B', '2022-09-05T22:37:08', (82800, 0), (-3.0, -4.0), (True, False), 2)
+
+    table.update(SYSTEM, create_data({'B': '5 6', 'C': '7 8'}, 'False False'))
+    assert reader.read('B').temperature == (5.0, 6.0)
+    assert reader.read('B').version == 4
+    assert [row.uid for row in reader.read_all()] == ['A', 'B', 'C']
+    assert reader.read('D') is None
+
+    reader.close()
+    table.close()
+
+
+def test_reader_index_is_rebuilt_after_writer_restart(tmp_path):
+    path = str(tmp_path / 'forecasts.table')
+    table = SharedForecastTable(path, capacity=4, hours=2)
+    table.update(SYSTEM, create_data({'A': '1 1', 'B': '2 2'}))
+    reader = SharedForecastTableReader(path)
+    assert reader.read('B').temperature == (2.0, 2.0)
+    table.close()
+
+    table = SharedForecastTable(path, capacity=4, hours=2)
+    table.update(SYSTEM, create_data({'B': '3 3'}))
+
+    assert reader.read('B').temperature == (3.0, 3.0)
+    assert reader.read('A') is None
+    assert [row.uid for row in reader.read_all()] == ['B']
+
+    table.update(SYSTEM, create_data({'C': '4 4', 'A': '5 5'}))
+    assert [(row.uid, row.temperature) for row in reader.read_all()] == [
+        ('B', (3.0, 3.0)), ('C', (4.0, 4.0)), ('A', (5.0, 5.0))]
+
+    reader.close()
+    table.close()
+
+
+def test_rows_above_capacity_are_not_saved(tmp_path):
+    path = str(tmp_path / 'forecasts.table')
+    table = SharedForecastTable(path, capacity=1, hours=2)
+    table.update(SYSTEM, create_data({'A': '11 12', 'B': '1 2'}))
+
+    assert SharedForecastTableReader(path).read('B') is None
+    table.close()
+
+
+def test_reads_are_consistent_during_updates(tmp_path):
+    path = str(tmp_path / 'forecasts.table')
+    table = SharedForecastTable(path, capacity=1, hours=2)
+    table.update(SYSTEM, create_data({'A': '0 0'}))
+    reader = SharedForecastTableReader(path)
+
+    def write():
+        for value in range(2000):
+            table.update(SYSTEM, create_data({'A': f'{value} {value}'}))
+
+    writer = Thread(target=write)
+    writer.start()
+    while writer.is_alive():
+        row = reader.read('A')
+        assert row.temperature[0] == row.temperature[1] and not math.isnan(row.temperature[0])
+    writer.join()
+
+    reader.close()
+    table.close()
+
+
+def test_table_of_other_layout_is_replaced_without_truncating_mapped_file(tmp_path):
+    path = str(tmp_path / 'forecasts.table')
+    table = SharedForecastTable(path, capacity=4, hours=2)
+    table.update(SYSTEM, create_data({'A': '1 1'}))
+    reader = SharedForecastTableReader(path)
+    table.close()
+
+    table = SharedForecastTable(path, capacity=1, hours=2)
+    table.update(SYSTEM, create_data({'B': '2 2'}))
+
+    assert reader.read('A').temperature == (1.0, 1.0)
+    new_reader = SharedForecastTableReader(path)
+    assert [row.uid for row in new_reader.read_all()] == ['B']
+
+    new_reader.close()
+    reader.close()
+    table.close()
+
+
+def test_too_long_uids_are_not_saved(tmp_path):
+    path = str(tmp_path / 'forecasts.table')
+    table = SharedForecastTable(path, capacity=4, hours=2)
+    table.update(SYSTEM, create_data({'A' * 65: '1 1', 'B' * 64: '2 2'}))
+    reader = SharedForecastTableReader(path)
+
+    assert [row.uid for row in reader.read_all()] == ['B' * 64]
+
+    reader.close()
+    table.close()
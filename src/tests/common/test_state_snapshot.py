@@ -0,0 +1,94 @@
+import json
+import shutil
+import time
+from datetime import datetime, timedelta, timezone
+
+from common.forecast_store import ForecastStore
+from common.init_module import Module
+from common.state_snapshot import StateSnapshot
+
+NOW = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+SYSTEM_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<system UUID="00000000-0000-2000-8000-00805F9B34FB" update_period="60">
+    <component UID="0df319f4-9d79-4e4f-b5c5-df1c28b49f57" name="A" longitude="-21.90" latitude="64.13">
+    </component>
+</system>"""
+
+
+def create_hourly_data(hours: int) -> list:
+    return [{'DateTime': (NOW + timedelta(hours=hour + 1)).isoformat(),
+             'Temperature': {'Value': hour, 'Unit': 'C'}} for hour in range(hours)]
+
+
+def test_forecasts_and_schedule_phases_are_restored_from_saved_snapshot(tmp_path):
+    store = ForecastStore()
+    store.add_entry('190390', NOW, create_hourly_data(12))
+    snapshot_path = str(tmp_path / 'snapshot.json')
+
+    StateSnapshot(snapshot_path).save(store, {'system1.xml': 1000.0})
+    snapshot = StateSnapshot(snapshot_path).load()
+    restored_store = ForecastStore()
+    snapshot.restore_forecast_store(restored_store)
+
+    assert snapshot.schedule_phases == {'system1.xml': 1000.0}
+    assert restored_store.get_entry('190390').fetched_at == NOW
+    assert restored_store.get_data('key', '190390', NOW) == create_hourly_data(12)
+    assert restored_store.fetch_count == 0
+    assert not (tmp_path / 'snapshot.json.tmp').exists()
+
+
+def test_snapshot_of_other_version_or_invalid_file_is_ignored(tmp_path):
+    snapshot_path = tmp_path / 'snapshot.json'
+    snapshot_path.write_text(json.dumps(dict(version=0, forecasts={'1': {}}, schedule_phases={'a': 1})))
+    assert StateSnapshot(str(snapshot_path)).load().schedule_phases == {}
+
+    snapshot_path.write_text('{')
+    assert StateSnapshot(str(snapshot_path)).load().forecasts == {}
+
+
+def create_module(tmp_path, jitter: str, last_run: float = None) -> Module:
+    systems_path = tmp_path / 'systems'
+    systems_path.mkdir(exist_ok=True)
+    (systems_path / 'system1.xml').write_text(SYSTEM_XML)
+    output_path = tmp_path / 'forecasts'
+    output_path.mkdir(exist_ok=True)
+
+    if last_run is not None:
+        StateSnapshot(str(output_path / '.state_snapshot.json')).save(ForecastStore(), {'system1.xml': last_run})
+
+    return Module(dict(entry_path=str(systems_path), output_path=str(output_path), mode='single_time',
+                       api_key='key', settings=dict(warm_restart=dict(jitter=jitter))))
+
+
+def test_system_resumes_at_its_previous_phase_with_jitter(tmp_path):
+    module = create_module(tmp_path, '0', last_run=time.time() - 20)
+    system = module._get_systems_list()[0]
+    assert 39 < module._get_initial_delay(system, 60) <= 40
+
+    module = create_module(tmp_path, '5', last_run=time.time() - 20)
+    delays = [module._get_initial_delay(system, 60) for _ in range(50)]
+    assert all(39 < delay <= 45 for delay in delays)
+    assert max(delays) - min(delays) > 1
+
+
+def test_system_without_phase_starts_at_once_and_overdue_within_jitter(tmp_path):
+    module = create_module(tmp_path, '120')
+    system = module._get_systems_list()[0]
+    assert all(module._get_initial_delay(system, 60) == 0 for _ in range(50))
+
+    shutil.rmtree(tmp_path / 'forecasts')
+    module = create_module(tmp_path, '120', last_run=time.time() - 600)
+    assert all(0 <= module._get_initial_delay(system, 60) <= 60 for _ in range(50))
+
+    shutil.rmtree(tmp_path / 'forecasts')
+    module = create_module(tmp_path, '0', last_run=time.time() - 600)
+    assert module._get_initial_delay(system, 60) == 0
+
+
+def test_state_is_saved_when_module_stops(tmp_path):
+    module = create_module(tmp_path, '0')
+    module.schedule_phases['system1.xml'] = 1000.0
+    module.stop()
+
+    snapshot = StateSnapshot(str(tmp_path / 'forecasts' / '.state_snapshot.json')).load()
+    assert snapshot.schedule_phases == {'system1.xml': 1000.0}
@@ -0,0 +1,71 @@
+import os
+
+from converters.dataclasses_converters import System
+from common.system_manifest import SystemManifest
+
+SYSTEM_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<system UUID="00000000-0000-2000-8000-00805F9B34FB" update_period="20">
+    <component UID="0df319f4-9d79-4e4f-b5c5-df1c28b49f57" name="A" longitude="-21.90" latitude="64.13">
+    </component>
+</system>"""
+
+
+def create_system_file(tmp_path, content: str = SYSTEM_XML) -> str:
+    file_path = str(tmp_path / 'system1.xml')
+    with open(file_path, 'w') as file:
+        file.write(content)
+
+    return file_path
+
+
+def create_system() -> System:
+    component = {'UID': '0df319f4-9d79-4e4f-b5c5-df1c28b49f57', 'name': 'A',
+                 'longitude': '-21.90', 'latitude': '64.13'}
+    return System('system1.xml', '00000000-0000-2000-8000-00805F9B34FB', component, 20)
+
+
+def test_system_is_loaded_from_saved_manifest(tmp_path):
+    file_path = create_system_file(tmp_path)
+    manifest_path = str(tmp_path / 'manifest.json')
+
+    manifest = SystemManifest(manifest_path)
+    manifest.add_system(file_path, create_system())
+    manifest.save({'64.13,-21.90': '190390'})
+
+    loaded_manifest = SystemManifest(manifest_path).load()
+
+    assert loaded_manifest.get_system(file_path) == create_system()
+    assert loaded_manifest.locations == {'64.13,-21.90': '190390'}
+
+
+def test_touched_file_with_the_same_content_is_valid(tmp_path):
+    file_path = create_system_file(tmp_path)
+    manifest = SystemManifest(str(tmp_path / 'manifest.json'))
+    manifest.add_system(file_path, create_system())
+
+    os.utime(file_path, (0, 0))
+
+    assert manifest.get_system(file_path) == create_system()
+
+
+def test_changed_file_is_invalid(tmp_path):
+    file_path = create_system_file(tmp_path)
+    manifest = SystemManifest(str(tmp_path / 'manifest.json'))
+    manifest.add_system(file_path, create_system())
+
+    create_system_file(tmp_path, SYSTEM_XML.replace('update_period="20"', 'update_period="30"'))
+
+    assert manifest.get_system(file_path) is None
+
+
+def test_entries_of_removed_files_are_dropped_on_save(tmp_path):
+    file_path = create_system_file(tmp_path)
+    manifest_path = str(tmp_path / 'manifest.json')
+
+    manifest = SystemManifest(manifest_path)
+    manifest.add_system(file_path, create_system())
+    manifest.save()
+    os.remove(file_path)
+    manifest.save()
+
+    assert SystemManifest(manifest_path).load().files == {}
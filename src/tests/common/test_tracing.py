@@ -0,0 +1,100 @@
+import json
+from threading import Thread
+
+import pytest
+
+from common.trace_summary import TraceSummary
+from common.tracing import Span, Tracer, get_critical_path
+
+
+def create_span(name: str, span_id: str, parent_id: str, start: float, end: float) -> Span:
+    return Span(name, 'trace', span_id, parent_id, start, end)
+
+
+def test_critical_path_follows_spans_which_ended_last():
+    root = create_span('cycle', 'root', None, 0, 10)
+    spans = [root,
+             create_span('resolve_locations', 'resolve', 'root', 0, 2),
+             create_span('geoposition', 'geo', 'resolve', 0.5, 1.5),
+             create_span('fetch_forecasts', 'fetch', 'root', 2, 9),
+             create_span('fetch_forecast', 'first', 'fetch', 2, 4),
+             create_span('fetch_forecast', 'second', 'fetch', 4, 8.5),
+             create_span('write', 'write', 'root', 9, 9.5)]
+
+    assert [span.span_id for span in get_critical_path(root, spans)] == [
+        'root', 'resolve', 'geo', 'fetch', 'first', 'second', 'write']
+
+
+def test_cycle_trace_is_written_when_root_span_closes(tmp_path):
+    tracer = Tracer()
+    tracer.configure(str(tmp_path / 'traces.jsonl'))
+
+    with tracer.span('cycle', system_uuid='1'):
+        with tracer.span('fetch_forecasts') as span:
+            span.set_attribute('locations', 2)
+        with tracer.span('write', bytes=100):
+            pass
+
+    with open(tmp_path / 'traces.jsonl') as file:
+        traces = [json.loads(line) for line in file]
+
+    assert len(traces) == 1
+    assert traces[0]['attributes'] == {'system_uuid': '1'}
+    assert [span['name'] for span in traces[0]['spans']] == ['cycle', 'fetch_forecasts', 'write']
+    assert traces[0]['spans'][1]['parent_id'] == traces[0]['spans'][0]['span_id']
+    assert [span['name'] for span in traces[0]['critical_path']] == ['cycle', 'fetch_forecasts', 'write']
+
+    summary = TraceSummary(traces).get_report()
+    assert summary['cycles'] == 1
+    assert summary['stages']['write']['count'] == 1
+    assert sum(stage['critical_path_share'] for stage in summary['stages'].values()) == pytest.approx(1, abs=0.002)
+
+
+def test_spans_of_other_thread_are_nested_in_passed_context(tmp_path):
+    tracer = Tracer()
+    tracer.configure(str(tmp_path / 'traces.jsonl'))
+
+    def request(context):
+        with tracer.use_context(context), tracer.span('provider'):
+            pass
+
+    with tracer.span('cycle'):
+        with tracer.span('fetch_forecast') as span:
+            thread = Thread(target=request, args=(tracer.get_context(),))
+            thread.start()
+            thread.join()
+
+    with open(tmp_path / 'traces.jsonl') as file:
+        traces = [json.loads(line) for line in file]
+
+    assert len(traces) == 1
+    spans = {span['name']: span for span in traces[0]['spans']}
+    assert spans['provider']['parent_id'] == span.span_id
+
+
+def test_disabled_tracer_writes_nothing(tmp_path):
+    tracer = Tracer()
+
+    with tracer.span('cycle') as span:
+        span.set_attribute('status_code', 200)
+
+    assert not tracer.enabled
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_trace_file_is_rotated_over_max_size(tmp_path):
+    tracer = Tracer()
+    path = tmp_path / 'traces.jsonl'
+    tracer.configure(str(path), max_size=1000, backup_count=2)
+
+    for index in range(20):
+        with tracer.span('cycle', system_uuid=str(index)):
+            pass
+
+    assert path.stat().st_size <= 1000
+    assert (tmp_path / 'traces.jsonl.1').stat().st_size <= 1000
+    assert (tmp_path / 'traces.jsonl.2').exists()
+    assert not (tmp_path / 'traces.jsonl.3').exists()
+
+    with open(path) as file:
+        assert json.loads(file.readlines()[-1])['attributes'] == {'system_uuid': '19'}
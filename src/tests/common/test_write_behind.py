@@ -0,0 +1,105 @@
+from threading import Event, Thread
+
+from common.file_manger import SystemsXmlFileManager
+from common.write_behind import WriteBehindQueue
+from converters.dataclasses_converters import System
+
+
+def test_files_are_written_in_background(tmp_path):
+    write_queue = WriteBehindQueue(writers=2)
+    written = []
+
+    for index in range(10):
+        write_queue.submit(str(tmp_path / f"{index}.xml"), f"content {index}", lambda index=index: written.append(index))
+
+    assert write_queue.flush(timeout=2)
+    assert sorted(written) == list(range(10))
+    assert (tmp_path / '7.xml').read_text() == 'content 7'
+    assert write_queue.get_stats()['written'] == 10
+
+    write_queue.stop()
+
+
+def test_only_the_newest_pending_version_is_written(tmp_path):
+    write_queue = WriteBehindQueue(writers=1, fsync=True)
+    blocked = Event()
+    write_queue.submit(str(tmp_path / 'blocker.xml'), 'blocker', blocked.wait)
+    while write_queue.get_stats()['in_flight'] == 0:
+        pass
+    written = []
+
+    for version in range(5):
+        write_queue.submit(str(tmp_path / 'system_forecast.xml'), f"version {version}",
+                           lambda version=version: written.append(version))
+
+    assert write_queue.get_stats()['queue_depth'] == 1
+    blocked.set()
+    write_queue.flush(timeout=2)
+
+    assert (tmp_path / 'system_forecast.xml').read_text() == 'version 4'
+    assert written == [4]
+    assert write_queue.get_stats() | dict(flush_latency_p50=None, flush_latency_max=None) == dict(
+        queue_depth=0, in_flight=0, submitted=6, written=2, coalesced=4, errors=0,
+        flush_latency_p50=None, flush_latency_max=None)
+
+    write_queue.stop()
+
+
+def test_write_errors_are_counted(tmp_path):
+    write_queue = WriteBehindQueue(writers=1)
+    write_queue.submit(str(tmp_path / 'missing' / 'system_forecast.xml'), 'content')
+    write_queue.flush(timeout=2)
+
+    assert write_queue.get_stats()['errors'] == 1
+    write_queue.stop()
+
+
+def test_failed_callback_and_fsync_do_not_stop_writer(tmp_path, monkeypatch):
+    write_queue = WriteBehindQueue(writers=1, fsync=True)
+    written = []
+
+    def fail():
+        raise RuntimeError('subscriber failed')
+
+    write_queue.submit(str(tmp_path / 'first.xml'), 'first', fail)
+    assert write_queue.flush(timeout=2)
+
+    def fail_fsync(fileno: int):
+        raise OSError('disk failed')
+
+    monkeypatch.setattr('common.write_behind.os.fsync', fail_fsync)
+    write_queue.submit(str(tmp_path / 'second.xml'), 'second', lambda: written.append('second'))
+    assert write_queue.flush(timeout=2)
+
+    monkeypatch.undo()
+    write_queue.submit(str(tmp_path / 'third.xml'), 'third', lambda: written.append('third'))
+    assert write_queue.flush(timeout=2)
+
+    assert written == ['third']
+    assert write_queue.get_stats()['written'] == 2
+    assert write_queue.get_stats()['errors'] == 2
+    write_queue.stop()
+
+
+def test_delta_is_cleared_only_after_snapshot_is_written(tmp_path):
+    write_queue = WriteBehindQueue(writers=1)
+    file_manager = SystemsXmlFileManager(write_queue=write_queue)
+    system = System('system.xml', '1', [])
+    blocked = Event()
+    write_queue.submit(str(tmp_path / 'blocker.xml'), 'blocker', blocked.wait)
+    (tmp_path / 'system_forecast.delta').write_text('old delta\n')
+
+    file_manager.save_data(system, {'system': {'@UUID': '1'}}, str(tmp_path))
+    clearing = Thread(target=file_manager.clear_delta, args=(system, str(tmp_path)))
+    clearing.start()
+    clearing.join(0.2)
+
+    assert clearing.is_alive()
+    assert (tmp_path / 'system_forecast.delta').read_text() == 'old delta\n'
+
+    blocked.set()
+    clearing.join(2)
+
+    assert (tmp_path / 'system_forecast.xml').exists()
+    assert (tmp_path / 'system_forecast.delta').read_text() == ''
+    write_queue.stop()
@@ -45,3 +45,6 @@ def test_output_for_initialization_config():
 def test_output_for_valid_args():
     assert Config()._is_valid(['main.py', 'systems', 'forecasts', '-c']) == True
 
+
+def test_dry_run_mode_name():
+    assert Config._get_mode_name('-d') == 'dry_run'
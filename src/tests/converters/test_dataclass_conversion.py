@@ -72,3 +72,11 @@ def test_component_conversion():
 
     for index, component in enumerate(components_converted):
         assert components_converted[index] == components_dataclasses[index]
+
+
+def test_system_conversion_priority_and_deadline():
+    system = dict(DICT_XML_DATA_PERIOD['system'], priority='2', deadline='45')
+
+    converted = SystemDataclassConverter().convert({'system': system})
+
+    assert (converted.priority, converted.deadline) == (2, 45)
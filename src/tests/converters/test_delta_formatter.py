@@ -0,0 +1,60 @@
+import copy
+
+from converters.dataclasses_converters import System
+from converters.delta_formatter import DeltaOutputDataFormatter
+
+SYSTEM = System('system1.xml', '00000000-0000-2000-8000-00805F9B34FB', [], None)
+
+
+def create_output(first_data: str, second_data: str) -> dict:
+    def component(uid: str, data: str) -> dict:
+        return {'@UID': uid, 'model_parameters': {'dynamic': {'time_sequence': [
+            {'@sequence_type': 'temperature', '@base_time': '2022-09-05T20:00:00',
+             '@rel_time': '21:00:00 22:00:00', '@data': data}]}}}
+
+    return {'system': {'@UUID': SYSTEM.uuid, 'component': [component('A', first_data), component('B', second_data)]}}
+
+
+def test_first_cycle_is_snapshot():
+    is_snapshot, data = DeltaOutputDataFormatter().get_formatted_data(SYSTEM, create_output('1 2', '3 4'))
+
+    assert is_snapshot == True
+    assert data['system']['@sequence'] == '1'
+
+
+def test_delta_contains_only_changed_components():
+    formatter = DeltaOutputDataFormatter(snapshot_every=10)
+    formatter.get_formatted_data(SYSTEM, create_output('1 2', '3 4'))
+
+    is_snapshot, delta = formatter.get_formatted_data(SYSTEM, create_output('1 2', '3 5'))
+
+    assert is_snapshot == False
+    assert delta['system_delta']['@sequence'] == '2'
+    assert [component['@UID'] for component in delta['system_delta']['component']] == ['B']
+
+
+def test_nothing_is_emitted_without_changes():
+    formatter = DeltaOutputDataFormatter(snapshot_every=10)
+    formatter.get_formatted_data(SYSTEM, create_output('1 2', '3 4'))
+
+    assert formatter.get_formatted_data(SYSTEM, create_output('1 2', '3 4')) == (False, None)
+
+
+def test_snapshot_is_emitted_periodically():
+    formatter = DeltaOutputDataFormatter(snapshot_every=2)
+
+    snapshots = [formatter.get_formatted_data(SYSTEM, create_output('1 2', str(cycle)))[0] for cycle in range(4)]
+
+    assert snapshots == [True, False, True, False]
+
+
+def test_applied_delta_gives_the_newest_output():
+    formatter = DeltaOutputDataFormatter(snapshot_every=10)
+    _, snapshot = formatter.get_formatted_data(SYSTEM, create_output('1 2', '3 4'))
+    newest = create_output('1 2', '3 5')
+    _, delta = formatter.get_formatted_data(SYSTEM, newest)
+
+    applied = DeltaOutputDataFormatter.apply_delta(copy.deepcopy(snapshot), delta)
+
+    assert applied['system']['component'] == newest['system']['component']
+    assert applied['system']['@sequence'] == '2'
@@ -0,0 +1,46 @@
+from converters.dataclasses_converters import AccuWeatherMultiSequenceDataclassConverter, Component, ForecastSequences
+from converters.field_extractors import get_field_extractors
+from converters.output_data_formatter import MultiSequenceOutputDataFormatter
+
+FORECASTS = [
+    {'DateTime': '2022-09-05T21:00:00+00:00', 'IsDaylight': False, 'Temperature': {'Value': 50, 'Unit': 'F'},
+     'RelativeHumidity': 80, 'Wind': {'Speed': {'Value': 10.0, 'Unit': 'mi/h'}}, 'PrecipitationProbability': 20},
+    {'DateTime': '2022-09-05T22:00:00+00:00', 'IsDaylight': True, 'Temperature': {'Value': 11, 'Unit': 'C'},
+     'RelativeHumidity': 85, 'Wind': {'Speed': {'Value': 5.5, 'Unit': 'km/h'}}, 'PrecipitationProbability': 0}
+]
+
+SEQUENCE_TYPES = ['temperature', 'day_light', 'humidity', 'wind', 'precipitation_probability']
+
+
+def test_all_sequences_are_extracted_in_single_pass():
+    converter = AccuWeatherMultiSequenceDataclassConverter(get_field_extractors(SEQUENCE_TYPES))
+
+    assert converter.convert(FORECASTS) == ForecastSequences(
+        ['21:00:00', '22:00:00'],
+        {'temperature': [10, 11],
+         'day_light': [False, True],
+         'humidity': [80, 85],
+         'wind': [16.1, 5.5],
+         'precipitation_probability': [20, 0]})
+
+
+def test_unknown_sequence_type_is_skipped():
+    extractors = get_field_extractors(['temperature', 'unknown'])
+
+    assert [extractor.sequence_type_name for extractor in extractors] == ['temperature']
+
+
+def test_multi_sequence_formatter_creates_time_sequence_for_each_type():
+    sequences = ForecastSequences(['21:00:00', '22:00:00'], {'temperature': [10, 11], 'day_light': [False, True]})
+    component = Component('0df319f4-9d79-4e4f-b5c5-df1c28b49f57', '64.13', '-21.90', 'A')
+
+    formatted = MultiSequenceOutputDataFormatter().get_formatted_data(
+        [dict(base_time='2022-09-05T20:37:08', component=component, forecast_data=sequences)])
+
+    assert formatted == [
+        {'component': component,
+         'time_sequence': {'@sequence_type': 'temperature', '@base_time': '2022-09-05T20:37:08',
+                           '@rel_time': '21:00:00 22:00:00', '@data': '10 11'}},
+        {'component': component,
+         'time_sequence': {'@sequence_type': 'day_light', '@base_time': '2022-09-05T20:37:08',
+                           '@rel_time': '21:00:00 22:00:00', '@data': 'False True'}}]
@@ -0,0 +1,41 @@
+from converters.dataclasses_converters import System
+from converters.output_template import OutputTemplates
+from converters.xml_formatter import DictToXmlConverter
+
+SYSTEM = System('system1.xml', '00000000-0000-2000-8000-00805F9B34FB', [], None)
+
+
+def create_output(base_time: str, data: str, uids: tuple = ('A', 'B')) -> dict:
+    def component(uid: str) -> dict:
+        return {'@UID': uid, 'model_parameters': {'dynamic': {'time_sequence': [
+            {'@sequence_type': 'temperature', '@base_time': base_time,
+             '@rel_time': '21:00:00 22:00:00', '@data': data},
+            {'@sequence_type': 'day_light', '@base_time': base_time,
+             '@rel_time': '21:00:00 22:00:00', '@data': 'True False'}]}}}
+
+    return {'system': {'@xmlns:xsi': 'http://www.w3.org/2001/XMLSchema-instance', '@UUID': SYSTEM.uuid,
+                       'component': [component(uid) for uid in uids]}}
+
+
+def test_rendered_output_is_the_same_as_xmltodict_output():
+    templates = OutputTemplates()
+    converter = DictToXmlConverter()
+
+    for output in (create_output('2022-09-05T20%:00:00', '1 2'),
+                   create_output('2022-09-05T21%:00:00', '-1 <2> & "3"'),
+                   create_output("it's", "\"quoted\" 'both'\n\t")):
+        assert templates.get_xml_string(SYSTEM, output) == converter.get_xml_string_from_dictionary(output)
+
+    assert templates.get_stats() == dict(templates=1, compiled=1, rendered=3)
+
+
+def test_template_is_compiled_again_when_output_skeleton_changes():
+    templates = OutputTemplates()
+    templates.get_xml_string(SYSTEM, create_output('2022-09-05T20%:00:00', '1 2'))
+
+    output = create_output('2022-09-05T20%:00:00', '1 2', uids=('A',))
+    assert templates.get_xml_string(SYSTEM, output) == DictToXmlConverter().get_xml_string_from_dictionary(output)
+
+    output['system']['@sequence'] = '2'
+    assert templates.get_xml_string(SYSTEM, output) == DictToXmlConverter().get_xml_string_from_dictionary(output)
+    assert templates.get_stats()['compiled'] == 3
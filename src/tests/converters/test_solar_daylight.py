@@ -0,0 +1,34 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from converters.dataclasses_converters import Component
+from converters.solar_daylight import LocalDaylightDataclassConverter, get_solar_elevations
+
+np = pytest.importorskip('numpy')
+
+
+def timestamp(*args) -> float:
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+def test_solar_elevations_of_all_positions_and_times():
+    timestamps = [timestamp(2022, 6, 21, 0), timestamp(2022, 6, 21, 12), timestamp(2022, 12, 21, 12)]
+    elevations = get_solar_elevations([0, 69.65], [0, 18.96], timestamps)
+
+    assert elevations.shape == (2, 3)
+    assert elevations[0, 1] == pytest.approx(66.6, abs=0.5)
+    assert elevations[0, 0] < -60
+    assert elevations[1, 0] > 0
+    assert elevations[1, 2] < 0
+
+
+def test_daylight_sequence_of_each_component():
+    converter = LocalDaylightDataclassConverter(hours=3, clock=lambda: timestamp(2022, 9, 5, 18, 30))
+    components = [Component('A', '64.13', '-21.90', 'A'), Component('B', '-33.87', '151.21', 'B')]
+
+    daylight = converter.convert(components)
+
+    assert [[(item.time, item.daylight) for item in sequence] for sequence in daylight] == [
+        [('19:00:00', True), ('20:00:00', True), ('21:00:00', False)],
+        [('19:00:00', False), ('20:00:00', False), ('21:00:00', True)]]
@@ -0,0 +1,46 @@
+import requests
+
+from loadtest.stub_server import AccuWeatherStubServer, LatencyDistribution
+from loadtest.systems_generator import SyntheticSystemsGenerator
+from common.file_manger import SystemsXmlFileManager
+
+
+def test_latency_distribution_from_string():
+    assert LatencyDistribution.from_string('uniform:0.1:0.3') == LatencyDistribution('uniform', 0.1, 0.3)
+    assert LatencyDistribution.from_string('constant:0.2').sample() == 0.2
+
+
+def test_stub_server_endpoints():
+    server = AccuWeatherStubServer().start()
+
+    try:
+        geoposition = requests.get(f"{server.host}/locations/v1/cities/geoposition/search",
+                                   params=dict(apikey='key', q='64.13,-21.90')).json()
+        forecasts = requests.get(f"{server.host}/forecasts/v1/hourly/72hour/{geoposition['Key']}",
+                                 params=dict(apikey='key')).json()
+    finally:
+        server.stop()
+
+    assert len(forecasts) == 72
+    assert server.calls == {'geoposition': 1, 'hourly': 1}
+
+
+def test_stub_server_rate_limit():
+    server = AccuWeatherStubServer(rate_limit=1).start()
+
+    try:
+        status_codes = [requests.get(f"{server.host}/forecasts/v1/hourly/12hour/1",
+                                     params=dict(apikey='key')).status_code for _ in range(2)]
+    finally:
+        server.stop()
+
+    assert status_codes == [200, 429]
+
+
+def test_generated_systems_can_be_loaded(tmp_path):
+    SyntheticSystemsGenerator(clusters=2, seed=1).generate(str(tmp_path), 3, components_per_system=4)
+
+    systems = SystemsXmlFileManager().get_data(str(tmp_path))
+
+    assert len(systems) == 3
+    assert all(len(system.components) == 4 for system in systems)
@@ -0,0 +1,60 @@
+from weather_requests.api_key_pool import ApiKeyPool
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_requests_are_spread_across_keys():
+    pool = ApiKeyPool([dict(key='first'), dict(key='second')])
+
+    keys = [pool.acquire() for _ in range(4)]
+
+    assert keys.count('first') == 2
+    assert keys.count('second') == 2
+
+
+def test_key_is_not_used_after_quota_is_exhausted():
+    pool = ApiKeyPool([dict(key='first', quota='1'), dict(key='second', quota='3')])
+
+    keys = [pool.acquire() for _ in range(4)]
+
+    assert keys.count('first') == 1
+    assert keys.count('second') == 3
+    assert pool.acquire() is None
+    assert pool.get_remaining_capacity() == 0
+
+
+def test_quota_is_reset_after_quota_period():
+    clock = FakeClock()
+    pool = ApiKeyPool([dict(key='first', quota='1')], quota_period=60, clock=clock)
+
+    assert pool.acquire() == 'first'
+    assert pool.acquire() is None
+
+    clock.now = 60
+    assert pool.acquire() == 'first'
+
+
+def test_key_cools_down_after_error_status_code():
+    clock = FakeClock()
+    pool = ApiKeyPool([dict(key='first'), dict(key='second')], cooldowns={429: 30}, clock=clock)
+
+    pool.report('first', 429)
+    assert [pool.acquire() for _ in range(2)] == ['second', 'second']
+
+    clock.now = 30
+    assert pool.acquire() == 'first'
+
+
+def test_success_status_code_does_not_cool_down_key():
+    pool = ApiKeyPool([dict(key='first')])
+
+    pool.report('first', 200)
+
+    assert pool.acquire() == 'first'
@@ -0,0 +1,58 @@
+import gzip
+import json
+
+from loadtest.stub_server import AccuWeatherStubServer
+from weather_requests.cassette import Cassette
+from weather_requests.request import AccuWeather12HoursForecastsRequest, Request, RequestCreator
+
+
+def request_forecasts(host: str, cassette: Cassette) -> list:
+    RequestCreator.host = host
+    Request.cassette = cassette
+
+    try:
+        return [AccuWeather12HoursForecastsRequest().get_data('secret', loc_key) for loc_key in ('1', '2', '1')]
+    finally:
+        RequestCreator.host = 'http://dataservice.accuweather.com'
+        Request.cassette = None
+
+
+def test_recorded_responses_are_replayed_without_api_calls(tmp_path):
+    path = str(tmp_path / 'requests.cassette')
+    server = AccuWeatherStubServer().start()
+    recording = Cassette(path, 'record')
+
+    try:
+        recorded = request_forecasts(server.host, recording)
+    finally:
+        server.stop()
+        recording.close()
+
+    with gzip.open(path, 'rt') as file:
+        content = file.read()
+    assert len(content.splitlines()) == 3
+    assert 'secret' not in content
+
+    delays = []
+    cassette = Cassette(path, 'replay', speed=10, sleep=delays.append)
+    replayed = request_forecasts('http://127.0.0.1:1', cassette)
+
+    assert replayed == recorded
+    assert len(delays) == 3
+    assert cassette.get_stats()['replayed'] == 3
+
+
+def test_replay_shifts_forecast_times_by_whole_hours(tmp_path):
+    path = str(tmp_path / 'requests.cassette')
+    forecasts = [{'DateTime': '2022-09-05T23:00:00+02:00', 'EpochDateTime': 1662411600}]
+
+    recording = Cassette(path, 'record', clock=lambda: 1000)
+    recording.record('http://dataservice.accuweather.com/forecasts/v1/hourly/12hour/1', dict(apikey='key'), 200,
+                     json.dumps(forecasts), 0.5)
+    recording.close()
+
+    cassette = Cassette(path, 'replay', clock=lambda: 1000 + 2.5 * 3600, sleep=lambda delay: None)
+    response = cassette.replay('http://127.0.0.1:8000/forecasts/v1/hourly/12hour/1', dict(apikey='other'))
+
+    assert response.json() == [{'DateTime': '2022-09-06T01:00:00+02:00', 'EpochDateTime': 1662418800}]
+    assert cassette.replay('http://127.0.0.1:8000/forecasts/v1/hourly/12hour/2', {}).status_code == 404
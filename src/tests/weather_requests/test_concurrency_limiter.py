@@ -0,0 +1,63 @@
+from threading import Thread
+
+from weather_requests.concurrency_limiter import AdaptiveConcurrencyLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def complete_requests(limiter: AdaptiveConcurrencyLimiter, count: int, latency: float, status_code: int = 200):
+    for _ in range(count):
+        assert limiter.acquire(timeout=0)
+        limiter.release(latency, status_code)
+
+
+def test_limit_grows_while_latency_holds():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=5)
+
+    complete_requests(limiter, 3, 0.1)
+    assert limiter.get_stats()['limit'] == 3
+
+    complete_requests(limiter, 100, 0.15)
+    assert limiter.get_stats()['limit'] == 5
+
+
+def test_limit_backs_off_once_per_baseline_latency():
+    clock = FakeClock()
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=16, clock=clock)
+    complete_requests(limiter, 1, 1)
+
+    complete_requests(limiter, 3, 1, status_code=429)
+    assert limiter.get_stats()['limit'] == 8
+
+    clock.now = 2
+    complete_requests(limiter, 1, 5)
+    assert limiter.get_stats()['limit'] == 4
+
+    clock.now = 4
+    limiter.acquire()
+    limiter.release(1, failed=True)
+    assert limiter.get_stats()['limit'] == 2
+    assert limiter.get_stats()['decreases'] == 3
+
+
+def test_requests_above_limit_wait_in_queue():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+    limiter.acquire()
+    assert not limiter.acquire(timeout=0.01)
+
+    waiting = Thread(target=limiter.acquire)
+    waiting.start()
+    while limiter.get_stats()['queue_depth'] == 0:
+        pass
+
+    assert limiter.get_stats()['in_flight'] == 1
+    limiter.release(0.1)
+    waiting.join(timeout=1)
+    assert limiter.get_stats() | dict(baseline_latency=None) == dict(
+        limit=2, in_flight=1, queue_depth=0, requests=2, decreases=0, baseline_latency=None)
@@ -0,0 +1,140 @@
+import json
+import time
+
+import requests
+
+from common.location_resolver import LocationResolver
+from converters.field_extractors import get_field_extractors
+from weather_requests.cassette import Cassette
+from weather_requests.providers import ForecastProvider, HedgedForecastProvider, OpenMeteoProvider
+
+import converters.dataclasses_converters as dc
+
+
+class StubProvider(ForecastProvider):
+
+    def __init__(self, name: str, latency: float = 0, temperature: float = 20, valid: bool = True):
+        self.name = name
+        self.latency = latency
+        self.temperature = temperature
+        self.valid = valid
+        self.requests = []
+
+    def get_data(self, apikey: str, loc_key: str, geo_position: str, hours: int, details: bool = False) -> list:
+        self.requests.append((loc_key, geo_position))
+        time.sleep(self.latency)
+
+        if not self.valid:
+            return None
+
+        return [self._get_hourly_forecast(dc.ComponentTemperature(f'2022-09-05T{hour:02}:00:00+02:00',
+                                                                  self.temperature, 'F'),
+                                          dc.ComponentDaylight(f'2022-09-05T{hour:02}:00:00+02:00', hour < 20))
+                for hour in range(12, 12 + hours)]
+
+
+def test_fast_primary_is_not_hedged():
+    primary, secondary = StubProvider('primary'), StubProvider('secondary')
+    provider = HedgedForecastProvider([primary, secondary], hedge_delay=0.5)
+
+    data = provider.get_data('key', '123', 12)
+
+    assert len(data) == 12
+    assert secondary.requests == []
+    stats = provider.get_stats()
+    assert stats['hedged'] == 0
+    assert stats['providers']['primary']['wins'] == 1
+    assert stats['providers']['primary']['win_rate'] == 1
+    assert stats['providers']['secondary']['calls'] == 0
+
+
+def test_slow_primary_is_raced_by_secondary():
+    primary = StubProvider('primary', latency=0.5)
+    secondary = StubProvider('secondary', temperature=50)
+    resolver = LocationResolver({'54.35,18.64': '123'})
+    provider = HedgedForecastProvider([primary, secondary], resolver, hedge_delay=0.05)
+
+    start = time.monotonic()
+    data = provider.get_data('key', '123', 12)
+
+    assert time.monotonic() - start < 0.4
+    assert data[0]['Temperature'] == {'Value': 10, 'Unit': 'C'}
+    assert secondary.requests == [('123', '54.35,18.64')]
+    stats = provider.get_stats()
+    assert stats['hedged'] == 1
+    assert stats['providers']['primary']['wins'] == 0
+    assert stats['providers']['secondary']['wins'] == 1
+
+
+def test_failed_provider_is_replaced_without_delay():
+    provider = HedgedForecastProvider([StubProvider('primary', valid=False), StubProvider('secondary')],
+                                      hedge_delay=10)
+
+    start = time.monotonic()
+    assert len(provider.get_data('key', '123', 12)) == 12
+    assert time.monotonic() - start < 1
+
+    stats = provider.get_stats()['providers']
+    assert stats['primary']['failures'] == 1
+    assert stats['secondary']['wins'] == 1
+
+
+def test_all_providers_failed():
+    provider = HedgedForecastProvider([StubProvider('primary', valid=False), StubProvider('secondary', valid=False)],
+                                      hedge_delay=0.01)
+
+    assert provider.get_data('key', '123', 12) is None
+    assert provider.get_stats()['providers']['secondary']['failures'] == 1
+
+
+def test_forecast_is_failed_after_timeout_when_providers_hang():
+    provider = HedgedForecastProvider([StubProvider('primary', latency=1), StubProvider('secondary', latency=1)],
+                                      hedge_delay=0.01, timeout=0.1, workers=1)
+
+    start = time.monotonic()
+    assert provider.get_data('key', '123', 12) is None
+    assert time.monotonic() - start < 0.5
+    assert provider.get_stats()['timeouts'] == 1
+
+    provider.stop()
+    assert provider.get_stats()['providers']['secondary']['calls'] == 0
+
+
+def create_open_meteo_response() -> dict:
+    return dict(utc_offset_seconds=7200,
+                hourly=dict(time=['2022-09-05T22:00', '2022-09-05T23:00', '2022-09-06T00:00'],
+                            temperature_2m=[15.2, 14.6, 13.9],
+                            is_day=[0, 0, 0],
+                            relative_humidity_2m=[80, 82, 85],
+                            wind_speed_10m=[10.5, 9.7, 8.1],
+                            precipitation_probability=[0, 5, 10]))
+
+
+def test_open_meteo_requests_are_replayed_from_cassette_without_requests(tmp_path, monkeypatch):
+    path = str(tmp_path / 'requests.cassette')
+    recording = Cassette(path, 'record', clock=lambda: 1000)
+    params = dict(latitude='64.13', longitude='-21.90', hourly=OpenMeteoProvider.hourly_fields,
+                  forecast_hours=3, timezone='auto')
+    recording.record(f"{OpenMeteoProvider.host}{OpenMeteoProvider.endpoint}", params, 200,
+                     json.dumps(create_open_meteo_response()), 0.5)
+    recording.close()
+
+    def get(*args, **kwargs):
+        raise AssertionError('request sent during replay')
+
+    monkeypatch.setattr(requests, 'get', get)
+    cassette = Cassette(path, 'replay', speed=float('inf'), clock=lambda: 1000 + 3600)
+    forecasts = OpenMeteoProvider(cassette).get_data(None, '1', '64.13,-21.90', 2)
+
+    assert [forecast['DateTime'] for forecast in forecasts] == ['2022-09-06T00:00:00+02:00',
+                                                                '2022-09-06T01:00:00+02:00']
+    assert cassette.get_stats()['replayed'] == 1
+
+
+def test_open_meteo_response_is_converted_to_accuweather_forecasts():
+    forecasts = OpenMeteoProvider()._convert_response(create_open_meteo_response())
+
+    assert [forecast['DateTime'] for forecast in forecasts] == ['2022-09-05T23:00:00+02:00',
+                                                                '2022-09-06T00:00:00+02:00']
+    extractors = get_field_extractors(['temperature', 'day_light', 'humidity', 'wind', 'precipitation_probability'])
+    assert [extractor.extract(forecasts[0]) for extractor in extractors] == [14, False, 82, 9.7, 5]
@@ -0,0 +1,60 @@
+import requests
+
+from weather_requests.api_key_pool import ApiKeyPool
+from weather_requests.concurrency_limiter import AdaptiveConcurrencyLimiter
+from weather_requests.request import AccuWeather12HoursForecastsRequest, REQUEST_TIMEOUT, Request
+
+
+class FakeLimiter(AdaptiveConcurrencyLimiter):
+    def __init__(self, events: list):
+        super().__init__()
+        self.events = events
+
+    def acquire(self, timeout: float = None) -> bool:
+        self.events.append('limiter')
+        return super().acquire(timeout)
+
+
+class FakeKeyPool(ApiKeyPool):
+    def __init__(self, events: list, keys: list):
+        super().__init__(keys)
+        self.events = events
+
+    def acquire(self) -> str:
+        self.events.append('key')
+        return super().acquire()
+
+
+def request_with(monkeypatch, limiter: AdaptiveConcurrencyLimiter, key_pool: ApiKeyPool, get):
+    monkeypatch.setattr(Request, 'concurrency_limiter', limiter)
+    monkeypatch.setattr(Request, 'key_pool', key_pool)
+    monkeypatch.setattr(requests.Session, 'get', get)
+
+    return AccuWeather12HoursForecastsRequest().get_data('secret', '1')
+
+
+def test_timeout_is_reported_to_limiter_as_failure(monkeypatch):
+    events = []
+    timeouts = []
+    limiter = FakeLimiter(events)
+
+    def get(session, url, params=None, timeout=None):
+        timeouts.append(timeout)
+        raise requests.exceptions.ReadTimeout('timed out')
+
+    assert request_with(monkeypatch, limiter, FakeKeyPool(events, [dict(key='a')]), get) is None
+    assert timeouts == [REQUEST_TIMEOUT]
+    assert events == ['limiter', 'key']
+    assert limiter.in_flight == 0
+    assert limiter.decreases == 1
+
+
+def test_limiter_slot_is_released_without_failure_when_no_key_is_available(monkeypatch):
+    limiter = FakeLimiter([])
+
+    def get(session, url, params=None, timeout=None):
+        raise AssertionError('request without API key')
+
+    assert request_with(monkeypatch, limiter, FakeKeyPool([], []), get) is None
+    assert limiter.in_flight == 0
+    assert limiter.decreases == 0
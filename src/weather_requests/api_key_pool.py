@@ -0,0 +1,130 @@
+import logging
+import time
+from dataclasses import dataclass
+from threading import Lock
+
+
+@dataclass
+class ApiKeyState:
+    """Usage state of single API key.
+
+    quota - count of calls allowed in single quota period, None means unlimited,
+    used - count of calls in current quota period,
+    cooldown_until - timestamp, until which key is not used after error status code.
+    """
+
+    key: str
+    quota: int = None
+    used: int = 0
+    total_calls: int = 0
+    errors: int = 0
+    period_start: float = 0
+    cooldown_until: float = 0
+
+    def remaining(self) -> float:
+        if self.quota is None:
+            return float('inf')
+
+        return max(self.quota - self.used, 0)
+
+
+class ApiKeyPool:
+
+    """
+    Pool of API keys, which spreads requests across all of them. Each request gets the key with
+    the lowest usage ratio in current quota period. Keys which returned one of cooldown status codes
+    are not used until their cooldown ends.
+
+    keys - list of dictionaries with 'key' and optional 'quota' values,
+    quota_period - length of quota period in seconds, AccuWeather quotas are daily,
+    cooldowns - cooldown in seconds for specific status codes.
+    """
+
+    default_cooldowns = {401: 3600, 403: 3600, 429: 60, 503: 300}
+
+    def __init__(self, keys: list, quota_period: int = 86400, cooldowns: dict = None, clock=time.time):
+        self.quota_period = quota_period
+        self.cooldowns = cooldowns if cooldowns is not None else dict(self.default_cooldowns)
+        self.clock = clock
+        self._lock = Lock()
+        self._states = [ApiKeyState(key['key'], self._get_quota(key), period_start=clock())
+                        for key in keys]
+
+    def acquire(self) -> str:
+        """Returns the least used available key and counts the call, or None if all keys are
+        exhausted or cooling down."""
+
+        with self._lock:
+            now = self.clock()
+            available = [state for state in self._states if self._is_available(state, now)]
+
+            if available == []:
+                return None
+
+            state = min(available, key=self._get_usage_ratio)
+            state.used += 1
+            state.total_calls += 1
+
+            return state.key
+
+    def report(self, key: str, status_code: int):
+        """Reports response status code for the key, cooldown status codes put the key on cooldown."""
+
+        if status_code not in self.cooldowns:
+            return
+
+        with self._lock:
+            for state in self._states:
+                if state.key == key:
+                    state.errors += 1
+                    state.cooldown_until = self.clock() + self.cooldowns[status_code]
+                    logging.warning(
+                        f"API key {self.mask_key(key)} returned status code {status_code}, cooling down for {self.cooldowns[status_code]} sec.")
+
+    def get_remaining_capacity(self) -> float:
+        """Count of calls left in current quota period for all keys, which are not cooling down."""
+
+        with self._lock:
+            now = self.clock()
+            return sum(state.remaining() for state in self._states if self._is_available(state, now))
+
+    def get_stats(self) -> list:
+        with self._lock:
+            now = self.clock()
+            return [dict(key=self.mask_key(state.key),
+                         quota=state.quota,
+                         used=state.used,
+                         remaining=state.remaining(),
+                         total_calls=state.total_calls,
+                         errors=state.errors,
+                         cooling_down=state.cooldown_until > now) for state in self._states]
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    @staticmethod
+    def mask_key(key: str) -> str:
+        """Only the last four characters of the key are shown in logs and reports."""
+
+        return f"...{key[-4:]}"
+
+    def _is_available(self, state: ApiKeyState, now: float) -> bool:
+        if now - state.period_start >= self.quota_period:
+            state.period_start = now
+            state.used = 0
+
+        return state.cooldown_until <= now and state.remaining() > 0
+
+    @staticmethod
+    def _get_usage_ratio(state: ApiKeyState) -> float:
+        if state.quota is None:
+            return state.used / 10 ** 9
+
+        return state.used / state.quota
+
+    @staticmethod
+    def _get_quota(key: dict) -> int:
+        quota = key.get('quota')
+
+        if quota is not None:
+            return int(quota)
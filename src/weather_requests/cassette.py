@@ -0,0 +1,198 @@
+import gzip
+import json
+import logging
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from threading import Lock
+from urllib.parse import urlsplit
+
+
+@dataclass
+class CassetteEntry:
+    """Single recorded request and its response.
+
+    path - path of the request url, so cassette can be replayed against another host,
+    params - request params without API key,
+    recorded_at - UNIX timestamp of the response,
+    latency - time in seconds from sending the request to the response.
+    """
+
+    path: str
+    params: dict
+    status_code: int
+    text: str
+    recorded_at: float
+    latency: float
+
+    @property
+    def key(self) -> tuple:
+        return get_request_key(self.path, self.params)
+
+
+class CassetteResponse:
+
+    """Replayed response with the part of requests.Response interface, which is used by Request."""
+
+    def __init__(self, status_code: int, text: str):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode()
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def get_request_key(path: str, params: dict) -> tuple:
+    return path, tuple(sorted((key, str(value)) for key, value in params.items() if key != 'apikey'))
+
+
+class Cassette:
+
+    """
+    Record/replay transport of Request and forecast providers. In record mode every response is appended
+    to gzip compressed JSON lines cassette file, with its latency. Cassette file is opened once, at the first
+    recorded response, and new gzip member is written until close. In replay mode responses are served
+    from cassette without any API call, after original latency divided by speed ('inf' serves them at once).
+
+    Responses of the same request are replayed in recorded order, and the last one is repeated, when replay
+    makes more requests than recording. Not recorded requests get 404 response.
+    Forecast times ('DateTime' and 'EpochDateTime', and 'time' of Open-Meteo hourly forecasts) of replayed
+    responses are shifted by whole hours, which passed from the start of recording to the start of replay,
+    so recorded forecasts stay in the future.
+    API keys are never written to cassette.
+
+    path - path of the cassette file,
+    mode - 'record' or 'replay',
+    speed - replay speed factor, for example 10 replays ten times faster than recorded latencies.
+    """
+
+    date_time_key = 'DateTime'
+    epoch_date_time_key = 'EpochDateTime'
+    hourly_key = 'hourly'
+    hourly_time_key = 'time'
+
+    def __init__(self, path: str, mode: str = 'replay', speed: float = 1.0, clock=time.time, sleep=time.sleep):
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self.clock = clock
+        self.sleep = sleep
+        self.recorded = 0
+        self.replayed = 0
+        self.missed = 0
+        self._responses = {}
+        self._file = None
+        self._lock = Lock()
+        self._time_shift = timedelta(0)
+
+        if mode == 'replay':
+            self._load()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == 'replay'
+
+    def record(self, url: str, params: dict, status_code: int, text: str, latency: float):
+        entry = CassetteEntry(urlsplit(url).path, {key: value for key, value in params.items() if key != 'apikey'},
+                              status_code, text, self.clock(), latency)
+        line = json.dumps(asdict(entry), separators=(',', ':')) + '\n'
+
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._file = gzip.open(self.path, 'at')
+                self._file.write(line)
+                self.recorded += 1
+            except OSError as error:
+                logging.error(f"Cannot record request to cassette {self.path}: {error}")
+
+    def close(self):
+        """Writes the end of recorded gzip member, so cassette can be replayed."""
+
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def replay(self, url: str, params: dict) -> CassetteResponse:
+        key = get_request_key(urlsplit(url).path, params)
+
+        with self._lock:
+            responses = self._responses.get(key)
+
+            if not responses:
+                self.missed += 1
+                logging.error(f"Request is not recorded in cassette: {url}, params: {dict(key[1])}")
+                return CassetteResponse(404, 'Request is not recorded in cassette')
+
+            entry = responses.popleft() if len(responses) > 1 else responses[0]
+            self.replayed += 1
+
+        self.sleep(entry.latency / self.speed)
+
+        return CassetteResponse(entry.status_code, self._shift_times(entry.text))
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(mode=self.mode, recorded=self.recorded, replayed=self.replayed, missed=self.missed,
+                        time_shift_hours=self._time_shift.total_seconds() / 3600)
+
+    def _load(self):
+        entries = []
+
+        try:
+            with gzip.open(self.path, 'rt') as file:
+                entries = [CassetteEntry(**json.loads(line)) for line in file if line.strip()]
+        except (OSError, EOFError, ValueError, TypeError) as error:
+            logging.error(f"Cannot load cassette {self.path}: {error}")
+
+        for entry in entries:
+            self._responses.setdefault(entry.key, deque()).append(entry)
+
+        if entries != []:
+            hours = int((self.clock() - min(entry.recorded_at for entry in entries)) // 3600)
+            self._time_shift = timedelta(hours=hours)
+
+        logging.info(f"Loaded {len(entries)} responses from cassette {self.path}, "
+                     f"time shift: {self._time_shift.total_seconds() / 3600:.0f} hours")
+
+    def _shift_times(self, text: str) -> str:
+        if not self._time_shift:
+            return text
+
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return text
+
+        for forecast in data if isinstance(data, list) else [data]:
+            if isinstance(forecast, dict):
+                self._shift_forecast_times(forecast)
+
+        if isinstance(data, dict) and isinstance(data.get(self.hourly_key), dict):
+            self._shift_hourly_times(data[self.hourly_key])
+
+        return json.dumps(data)
+
+    def _shift_hourly_times(self, hourly: dict):
+        times = hourly.get(self.hourly_time_key)
+
+        if isinstance(times, list):
+            try:
+                hourly[self.hourly_time_key] = [(datetime.fromisoformat(time_) + self._time_shift).isoformat(
+                    timespec='minutes') for time_ in times]
+            except (TypeError, ValueError):
+                pass
+
+    def _shift_forecast_times(self, forecast: dict):
+        if isinstance(forecast.get(self.date_time_key), str):
+            try:
+                time_ = datetime.fromisoformat(forecast[self.date_time_key])
+                forecast[self.date_time_key] = (time_ + self._time_shift).isoformat()
+            except ValueError:
+                pass
+
+        if isinstance(forecast.get(self.epoch_date_time_key), int):
+            forecast[self.epoch_date_time_key] += int(self._time_shift.total_seconds())
@@ -0,0 +1,97 @@
+import time
+from threading import Condition
+
+
+class AdaptiveConcurrencyLimiter:
+
+    """
+    Limits count of requests in flight with AIMD (additive increase, multiplicative decrease).
+    Limit grows by one request per limit of successful responses, as long as latency stays below
+    latency_tolerance times the baseline latency. Limit is multiplied by backoff on rising latency,
+    connection errors and throttling status codes, but at most once per baseline latency,
+    so many responses of single overloaded moment decrease the limit only once.
+
+    Baseline is the lowest observed latency, which slowly drifts to current latency, so it follows
+    permanent changes of upstream latency.
+    Requests above the limit wait in queue, current limit and queue depth are returned by get_stats.
+    """
+
+    throttling_status_codes = (429, 503)
+
+    def __init__(self, initial_limit: int = 4, min_limit: int = 1, max_limit: int = 64,
+                 latency_tolerance: float = 2.0, backoff: float = 0.5, smoothing: float = 0.01,
+                 clock=time.monotonic):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.backoff = backoff
+        self.smoothing = smoothing
+        self.clock = clock
+        self.baseline_latency = None
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.requests = 0
+        self.decreases = 0
+        self._last_decrease = None
+        self._condition = Condition()
+
+    def acquire(self, timeout: float = None) -> bool:
+        """Waits until request can be sent. Returns False if timeout passed first."""
+
+        with self._condition:
+            self.queue_depth += 1
+            acquired = self._condition.wait_for(lambda: self.in_flight < int(self.limit), timeout)
+            self.queue_depth -= 1
+
+            if acquired:
+                self.in_flight += 1
+                self.requests += 1
+
+            return acquired
+
+    def release(self, latency: float, status_code: int = None, failed: bool = False):
+        """Reports finished request. failed means connection error or timeout."""
+
+        with self._condition:
+            self.in_flight -= 1
+
+            if failed or status_code in self.throttling_status_codes:
+                self._decrease()
+            else:
+                self._update_baseline(latency)
+                if latency <= self.baseline_latency * self.latency_tolerance:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                else:
+                    self._decrease()
+
+            self._condition.notify_all()
+
+    def cancel(self):
+        """Releases acquired slot of request, which was not sent, without changing the limit."""
+
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def get_stats(self) -> dict:
+        with self._condition:
+            return dict(limit=int(self.limit), in_flight=self.in_flight, queue_depth=self.queue_depth,
+                        requests=self.requests, decreases=self.decreases,
+                        baseline_latency=round(self.baseline_latency, 3) if self.baseline_latency else None)
+
+    def _update_baseline(self, latency: float):
+        if self.baseline_latency is None or latency < self.baseline_latency:
+            self.baseline_latency = latency
+        else:
+            self.baseline_latency += self.smoothing * (latency - self.baseline_latency)
+
+    def _decrease(self):
+        now = self.clock()
+
+        if self._last_decrease is not None and now - self._last_decrease < (self.baseline_latency or 0):
+            return
+
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+        self.decreases += 1
@@ -0,0 +1,281 @@
+import logging
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from queue import Empty, Queue
+from threading import Lock
+
+import requests
+
+import converters.dataclasses_converters as dc
+from common.tracing import tracer
+
+from weather_requests.cassette import Cassette
+from weather_requests.request import HOURLY_FORECASTS_REQUESTS
+
+
+class ForecastProvider(ABC):
+
+    """
+    Base backend of hourly forecasts. Forecasts of every provider are returned as AccuWeather hourly forecasts,
+    which are used by forecast store and field extractors. Specific providers should map responses of their backend
+    to ComponentTemperature and ComponentDaylight, and return them with _get_hourly_forecast.
+
+    name - name of the provider in settings and stats,
+    cassette - record/replay transport of provider requests, so replay does not send any request.
+    """
+
+    name: str = None
+
+    def __init__(self, cassette: Cassette = None):
+        self.cassette = cassette
+
+    @abstractmethod
+    def get_data(self, apikey: str, loc_key: str, geo_position: str, hours: int, details: bool = False) -> list:
+        """Should return list of hourly forecasts for next hours, or None if request failed.
+        AccuWeather providers use localization key, other providers use geo position (lat,lon)."""
+        pass
+
+    @staticmethod
+    def _get_hourly_forecast(temperature: dc.ComponentTemperature, daylight: dc.ComponentDaylight,
+                             **details) -> dict:
+        """Time of temperature should be full ISO date time with UTC offset.
+        Details are additional fields of AccuWeather hourly forecast, like 'RelativeHumidity'."""
+
+        return dict({'DateTime': temperature.time,
+                     'IsDaylight': daylight.daylight,
+                     'Temperature': {'Value': temperature.temperature, 'Unit': temperature.unit}},
+                    **details)
+
+
+class AccuWeatherProvider(ForecastProvider):
+
+    """Hourly forecasts of AccuWeather, which are already in required format.
+    Requests use cassette of Request, so it is not used here."""
+
+    name = 'accuweather'
+
+    def get_data(self, apikey: str, loc_key: str, geo_position: str, hours: int, details: bool = False) -> list:
+        return HOURLY_FORECASTS_REQUESTS[hours](details).get_data(apikey, loc_key)
+
+
+class OpenMeteoProvider(ForecastProvider):
+
+    """
+    Hourly forecasts of Open-Meteo, which does not need API key, so pool keys are never sent to it.
+    Times are written in local time of the geo position, like AccuWeather does. Open-Meteo returns also
+    the current hour, which is skipped.
+    """
+
+    name = 'open_meteo'
+    host: str = 'https://api.open-meteo.com'
+    endpoint: str = '/v1/forecast'
+    hourly_fields = 'temperature_2m,is_day,relative_humidity_2m,wind_speed_10m,precipitation_probability'
+    timeout = 10
+
+    def get_data(self, apikey: str, loc_key: str, geo_position: str, hours: int, details: bool = False) -> list:
+        if geo_position is None:
+            return None
+
+        response = self._get_response(geo_position, hours)
+        if response is None:
+            return None
+
+        try:
+            return self._convert_response(response)[:hours]
+        except (KeyError, TypeError, ValueError) as key:
+            logging.error(f'Invalid key ({key}) in Open-Meteo response, cannot convert forecasts')
+
+    def _get_response(self, geo_position: str, hours: int) -> dict:
+        latitude, longitude = geo_position.split(',')
+        url = f"{self.host}{self.endpoint}"
+        params = dict(latitude=latitude, longitude=longitude, hourly=self.hourly_fields,
+                      forecast_hours=hours + 1, timezone='auto')
+
+        try:
+            with tracer.span('request', url=url) as span:
+                response = self._send_request(url, params)
+                span.set_attribute('status_code', response.status_code)
+                span.set_attribute('bytes', len(response.content))
+        except requests.exceptions.RequestException as error:
+            logging.error(error)
+            return None
+
+        if response.status_code != 200:
+            logging.error(
+                f'Request error for url: {url}. Status code: {response.status_code}, Message: {response.text}')
+            return None
+
+        return response.json()
+
+    def _send_request(self, url: str, params: dict):
+        if self.cassette is None:
+            return requests.get(url, params=params, timeout=self.timeout)
+
+        if self.cassette.replaying:
+            return self.cassette.replay(url, params)
+
+        start = time.monotonic()
+        response = requests.get(url, params=params, timeout=self.timeout)
+        self.cassette.record(url, params, response.status_code, response.text, time.monotonic() - start)
+
+        return response
+
+    def _convert_response(self, response: dict) -> list:
+        hourly = response['hourly']
+        offset = timezone(timedelta(seconds=response.get('utc_offset_seconds', 0)))
+        forecasts = []
+
+        for index, time_ in enumerate(hourly['time'][1:], start=1):
+            date_time = datetime.fromisoformat(time_).replace(tzinfo=offset).isoformat()
+            temperature = dc.ComponentTemperature(date_time, hourly['temperature_2m'][index], 'C')
+            daylight = dc.ComponentDaylight(date_time, bool(hourly['is_day'][index]))
+            forecasts.append(self._get_hourly_forecast(
+                temperature, daylight,
+                RelativeHumidity=hourly['relative_humidity_2m'][index],
+                Wind={'Speed': {'Value': hourly['wind_speed_10m'][index], 'Unit': 'km/h'}},
+                PrecipitationProbability=hourly['precipitation_probability'][index]))
+
+        return forecasts
+
+
+FORECAST_PROVIDERS = {provider.name: provider for provider in (AccuWeatherProvider, OpenMeteoProvider)}
+
+
+@dataclass
+class ProviderStats:
+    """Stats of single provider.
+
+    calls - count of started requests, including hedged ones,
+    wins - count of answers used as result,
+    failures - count of requests without valid answer,
+    latencies - latencies of the last 1000 requests in seconds.
+    """
+
+    calls: int = 0
+    wins: int = 0
+    failures: int = 0
+    latencies: list = field(default_factory=list)
+
+
+class HedgedForecastProvider:
+
+    """
+    Requests hourly forecasts from the first provider, and if it does not answer within hedge_delay seconds,
+    also from the next one, and so on. The first valid answer is returned, slower requests are not cancelled,
+    but their answers are dropped. If provider fails, the next one is requested at once.
+    Providers, which need geo position, get the first geo position resolved to the localization key.
+    Requests run in one bounded pool of workers, and the caller waits at most timeout seconds for valid answer.
+
+    providers - list of providers in order of preference,
+    location_resolver - resolver of localization keys, used to find geo position of localization key,
+    hedge_delay - latency in seconds, after which the next provider is requested,
+    timeout - seconds, after which forecast is failed, even if some requests are still running,
+    workers - count of requests of all providers running at the same time.
+    """
+
+    def __init__(self, providers: list, location_resolver=None, hedge_delay: float = 1.0, timeout: float = 30,
+                 workers: int = 16):
+        self.providers = providers
+        self.location_resolver = location_resolver
+        self.hedge_delay = hedge_delay
+        self.timeout = timeout
+        self.hedged = 0
+        self.timeouts = 0
+        self.stats = {provider.name: ProviderStats() for provider in providers}
+        self._lock = Lock()
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='forecast-provider')
+
+    def get_data(self, apikey: str, loc_key: str, hours: int, details: bool = False) -> list:
+        geo_position = self.location_resolver.get_geo_position(loc_key) if self.location_resolver else None
+        deadline = time.monotonic() + self.timeout
+        answers = Queue()
+        waiting = list(self.providers)
+        running = 0
+
+        while waiting or running:
+            if waiting:
+                self._start_request(waiting.pop(0), answers, apikey, loc_key, geo_position, hours, details)
+                running += 1
+
+            remaining = deadline - time.monotonic()
+
+            try:
+                provider, data = answers.get(timeout=max(min(self.hedge_delay, remaining) if waiting else remaining, 0))
+            except Empty:
+                if time.monotonic() >= deadline:
+                    logging.error(f"No forecast provider answered for localization {loc_key} in {self.timeout} s.")
+                    with self._lock:
+                        self.timeouts += 1
+                    return None
+
+                with self._lock:
+                    self.hedged += 1
+                continue
+
+            running -= 1
+
+            if self._is_valid(data):
+                with self._lock:
+                    self.stats[provider.name].wins += 1
+                return data
+
+        return None
+
+    def get_call_count(self) -> int:
+        """Count of requests started for all providers, including hedged ones."""
+
+        with self._lock:
+            return sum(stats.calls for stats in self.stats.values())
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(hedged=self.hedged,
+                        timeouts=self.timeouts,
+                        providers={name: self._get_provider_stats(stats) for name, stats in self.stats.items()})
+
+    def _start_request(self, provider: ForecastProvider, answers: Queue, *args):
+        self._executor.submit(self._request, provider, answers, tracer.get_context(), *args)
+
+    def stop(self):
+        """Drops requests, which did not start yet, running requests are not waited for."""
+
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _request(self, provider: ForecastProvider, answers: Queue, context, *args):
+        start = time.monotonic()
+        data = None
+
+        with self._lock:
+            self.stats[provider.name].calls += 1
+
+        try:
+            with tracer.use_context(context), tracer.span('provider', provider=provider.name):
+                data = provider.get_data(*args)
+        except Exception:
+            logging.exception(f"Forecast provider {provider.name} failed")
+        finally:
+            with self._lock:
+                stats = self.stats[provider.name]
+                stats.latencies = (stats.latencies + [time.monotonic() - start])[-1000:]
+                if not self._is_valid(data):
+                    stats.failures += 1
+
+            answers.put((provider, data))
+
+    @staticmethod
+    def _is_valid(data) -> bool:
+        return isinstance(data, list) and data != []
+
+    @staticmethod
+    def _get_provider_stats(stats: ProviderStats) -> dict:
+        latencies = sorted(stats.latencies)
+
+        return dict(calls=stats.calls,
+                    wins=stats.wins,
+                    win_rate=round(stats.wins / stats.calls, 3) if stats.calls else None,
+                    failures=stats.failures,
+                    latency_p50=round(latencies[len(latencies) // 2], 4) if latencies else None,
+                    latency_p90=round(latencies[int(len(latencies) * 0.9)], 4) if latencies else None)
@@ -1,13 +1,32 @@
 import logging
+import time
 from abc import ABC, abstractmethod
 
 import requests
 from requests.adapters import HTTPAdapter
 
+from common.tracing import tracer
+
+from weather_requests.api_key_pool import ApiKeyPool
+from weather_requests.cassette import Cassette
+from weather_requests.concurrency_limiter import AdaptiveConcurrencyLimiter
+
+DEFAULT_ACCUWEATHER_HOST = 'http://dataservice.accuweather.com'
+REQUEST_TIMEOUT = (5, 30)
+
 
 class Request:
 
-    """Base request class which returns data for specific endpoint and params set in credentials."""
+    """Base request class which returns data for specific endpoint and params set in credentials.
+    If key_pool is set, 'apikey' param is replaced with the key acquired from the pool for each request,
+    and response status code is reported back to the pool.
+    If concurrency_limiter is set, count of requests in flight across all threads is limited by it, API key
+    is acquired only after waiting for the limiter, and timeouts and connection errors are reported as failures.
+    If cassette is set, responses are recorded to it, or replayed from it without sending the request."""
+
+    key_pool: ApiKeyPool = None
+    concurrency_limiter: AdaptiveConcurrencyLimiter = None
+    cassette: Cassette = None
 
     def __init__(self):
         self.url: str = None
@@ -29,14 +48,71 @@ class Request:
         session = requests.Session()
         session.mount("https://", HTTPAdapter(max_retries=2))
 
+        if self.concurrency_limiter is not None:
+            self.concurrency_limiter.acquire()
+
+        start = time.monotonic()
+        request_params = None
+        response = None
+
         try:
-            response = session.get(self.url, params=self.request_params)
+            request_params = self._get_request_params()
+            if request_params is None:
+                return None
+
+            with tracer.span('request', url=self.url) as span:
+                response = self._send_request(session, request_params)
+                span.set_attribute('status_code', response.status_code)
+                span.set_attribute('bytes', len(response.content))
+
+            self._report_status_code(request_params, response)
             if self._proper_status_code(response):
                 return response.json()
 
-        except requests.exceptions.ConnectionError as error:
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as error:
             logging.error(error)
 
+        finally:
+            self._release_concurrency_limiter(start, request_params, response)
+
+    def _send_request(self, session: requests.Session, request_params: dict):
+        if self.cassette is None:
+            return session.get(self.url, params=request_params, timeout=REQUEST_TIMEOUT)
+
+        if self.cassette.replaying:
+            return self.cassette.replay(self.url, request_params)
+
+        start = time.monotonic()
+        response = session.get(self.url, params=request_params, timeout=REQUEST_TIMEOUT)
+        self.cassette.record(self.url, request_params, response.status_code, response.text,
+                             time.monotonic() - start)
+
+        return response
+
+    def _release_concurrency_limiter(self, start: float, request_params: dict, response: requests.Response):
+        if self.concurrency_limiter is not None:
+            if request_params is None:
+                self.concurrency_limiter.cancel()
+            elif response is None:
+                self.concurrency_limiter.release(time.monotonic() - start, failed=True)
+            else:
+                self.concurrency_limiter.release(time.monotonic() - start, response.status_code)
+
+    def _get_request_params(self) -> dict:
+        if self.key_pool is None:
+            return self.request_params
+
+        apikey = self.key_pool.acquire()
+        if apikey is None:
+            logging.error(f'No API key available for url: {self.url}, all keys are exhausted or cooling down.')
+            return None
+
+        return dict(self.request_params, apikey=apikey)
+
+    def _report_status_code(self, request_params: dict, response: requests.Response):
+        if self.key_pool is not None:
+            self.key_pool.report(request_params['apikey'], response.status_code)
+
     def _proper_status_code(self, response: requests.Response):
         """Checks if response has proper status code, if not logs an error."""
         if response.status_code in self.error_status_codes:
@@ -48,6 +124,12 @@ class Request:
 
 class RequestCreator(ABC):
 
+    """Base request creator. Url of the request is created from host and specific endpoint.
+    Host is shared by all requests, so it can be changed for example to local stub server."""
+
+    host: str = DEFAULT_ACCUWEATHER_HOST
+    endpoint: str = None
+
     def __init__(self):
         self.request = Request()
         self.url = None
@@ -61,6 +143,10 @@ class RequestCreator(ABC):
     def get_data(self):
         pass
 
+    @property
+    def base_url(self) -> str:
+        return f"{self.host}{self.endpoint}"
+
 
 class AccuWeatherGeopositionRequest(RequestCreator):
     """Geoposition Search for specific latitude and longitude, which needs to be provided via kwargs in get_data method.
@@ -69,37 +155,88 @@ class AccuWeatherGeopositionRequest(RequestCreator):
     apikey = Provided API Key,
     q = Text to search for, should be comma-separated lat/lon pair (lat,lon)."""
 
-    base_url = 'http://dataservice.accuweather.com/locations/v1/cities/geoposition/search'
+    endpoint = '/locations/v1/cities/geoposition/search'
 
     def get_data(self, apikey: str, geo_position: str) -> list:
         self._set_credentials_for_request(apikey, geo_position)
         return self.request.get_data()
 
     def _set_credentials_for_request(self, apikey: str, geo_position: str):
-        self.error_status_codes = [400, 401, 403, 404, 500, 503]
+        self.error_status_codes = [400, 401, 403, 404, 429, 500, 503]
         self.url = self.base_url
         self.request.set_credentials(
             self.url, self.error_status_codes, apikey=apikey, q=geo_position)
 
 
-class AccuWeather12HoursForecastsRequest(RequestCreator):
+class AccuWeatherHourlyForecastsRequest(RequestCreator):
 
-    """Forecasts search for specific localization, provided by ID in endpoint.
+    """Base hourly forecasts search for specific localization, provided by ID in endpoint.
+    Specific requests should set forecast horizon in hours and endpoint.
 
     request credentials kwargs:
-    apikey = Provided API Key"""
+    apikey = Provided API Key,
+    details = 'true' if full details (like humidity or wind) should be returned."""
 
-    base_url = 'http://dataservice.accuweather.com/forecasts/v1/hourly/12hour'
+    hours: int = None
+
+    def __init__(self, details: bool = False):
+        super().__init__()
+        self.details = details
 
     def get_data(self, apikey: str, localization_id: str) -> list:
         self._set_credentials_for_request(apikey, localization_id)
         return self.request.get_data()
 
     def _set_credentials_for_request(self, apikey: str, localization_id: str) -> None:
-        self.error_status_codes = [400, 401, 403, 404, 500, 503]
+        self.error_status_codes = [400, 401, 403, 404, 429, 500, 503]
         self.url = self._set_url(localization_id)
-        self.request.set_credentials(
-            self.url, self.error_status_codes, apikey=apikey)
+
+        if self.details:
+            self.request.set_credentials(
+                self.url, self.error_status_codes, apikey=apikey, details='true')
+        else:
+            self.request.set_credentials(
+                self.url, self.error_status_codes, apikey=apikey)
 
     def _set_url(self, localization_id: str) -> str:
         return f"{self.base_url}/{localization_id}"
+
+
+class AccuWeather12HoursForecastsRequest(AccuWeatherHourlyForecastsRequest):
+
+    """Forecasts search for next 12 hours for specific localization, provided by ID in endpoint."""
+
+    hours = 12
+    endpoint = '/forecasts/v1/hourly/12hour'
+
+
+class AccuWeather24HoursForecastsRequest(AccuWeatherHourlyForecastsRequest):
+
+    """Forecasts search for next 24 hours for specific localization, provided by ID in endpoint."""
+
+    hours = 24
+    endpoint = '/forecasts/v1/hourly/24hour'
+
+
+class AccuWeather72HoursForecastsRequest(AccuWeatherHourlyForecastsRequest):
+
+    """Forecasts search for next 72 hours for specific localization, provided by ID in endpoint."""
+
+    hours = 72
+    endpoint = '/forecasts/v1/hourly/72hour'
+
+
+class AccuWeather120HoursForecastsRequest(AccuWeatherHourlyForecastsRequest):
+
+    """Forecasts search for next 120 hours for specific localization, provided by ID in endpoint."""
+
+    hours = 120
+    endpoint = '/forecasts/v1/hourly/120hour'
+
+
+HOURLY_FORECASTS_REQUESTS = {
+    request.hours: request for request in (AccuWeather12HoursForecastsRequest,
+                                           AccuWeather24HoursForecastsRequest,
+                                           AccuWeather72HoursForecastsRequest,
+                                           AccuWeather120HoursForecastsRequest)
+}